@@ -0,0 +1,58 @@
+"""Compare per-call latency of connect-per-call queries with pooled ItemPackage connections.
+
+    python benchmarks/bench_connections.py --calls 5000
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gospellibrary.item_packages import ItemPackage
+from gospellibrary.tests.fixtures import create_item_package, item_id
+
+
+def connect_per_call(path, uri):
+    if not os.path.isfile(path):
+        return None
+
+    with sqlite3.connect(path) as db:
+        c = db.cursor()
+        try:
+            c.execute('''SELECT * FROM subitem WHERE uri=?''', [uri])
+            return c.fetchone()
+        finally:
+            c.close()
+
+
+def measure(calls, fn):
+    start = time.time()
+    for _ in range(calls):
+        fn()
+    return (time.time() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=5000)
+    args = parser.parse_args()
+
+    cache_path = tempfile.mkdtemp()
+    try:
+        path = create_item_package(os.path.join(cache_path, 'v4', 'languages', 'eng', 'item_packages', str(item_id(0)), '1', 'Package.sqlite'), subitem_count=50, paragraph_count=50)
+        uri = '/scriptures/book-0/25'
+
+        with ItemPackage(item_id=str(item_id(0)), item_version=1, cache_path=cache_path) as item_package:
+            print('{:<20} {:>14}'.format('mode', 'usec per call'))
+            print('{:<20} {:>14.1f}'.format('connect-per-call', measure(args.calls, lambda: connect_per_call(path, uri))))
+            print('{:<20} {:>14.1f}'.format('pooled', measure(args.calls, lambda: item_package.subitem(uri))))
+    finally:
+        shutil.rmtree(cache_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Compare peak RSS and wall time of buffered vs. streaming item package fetches.
+
+    python benchmarks/bench_fetch.py --subitems 400 --paragraphs 200
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import requests
+
+from gospellibrary.fetch import fetch_xz
+from gospellibrary.tests.fixtures import FixtureServer, create_site, item_id
+
+try:
+    import lzma
+except ImportError:
+    from backports import lzma
+
+
+def peak_rss():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def buffered_fetch(session, url, path):
+    r = session.get(url)
+    if r.status_code == 200:
+        try:
+            os.makedirs(os.path.dirname(path))
+        except OSError:
+            pass
+
+        with lzma.open(BytesIO(r.content)) as xz_file:
+            with open(path, 'wb') as f:
+                f.write(xz_file.read())
+
+
+def run_child(mode, url, cache_path):
+    path = os.path.join(cache_path, mode, 'Package.sqlite')
+    start = time.time()
+    if mode == 'buffered':
+        buffered_fetch(requests.Session(), url, path)
+    else:
+        fetch_xz(requests.Session(), url, path)
+    elapsed = time.time() - start
+    print('{} {:.3f} {} {}'.format(mode, elapsed, peak_rss(), os.path.getsize(path)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--subitems', type=int, default=200)
+    parser.add_argument('--paragraphs', type=int, default=200)
+    parser.add_argument('--child', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    root = tempfile.mkdtemp()
+    cache_path = tempfile.mkdtemp()
+    try:
+        create_site(root, item_count=1, subitem_count=args.subitems, paragraph_count=args.paragraphs)
+        with FixtureServer(root) as server:
+            url = server.base_url + 'v4/languages/eng/item-packages/{}/1.xz'.format(item_id(0))
+            print('{:<10} {:>10} {:>16} {:>14}'.format('mode', 'seconds', 'peak RSS (KiB)', 'sqlite bytes'))
+            for mode in ('buffered', 'streaming'):
+                output = subprocess.check_output([sys.executable, __file__, '--child', mode, url, cache_path]).decode('utf-8')
+                name, elapsed, max_rss, size = output.split()
+                print('{:<10} {:>10} {:>16} {:>14}'.format(name, elapsed, max_rss, size))
+    finally:
+        shutil.rmtree(root)
+        shutil.rmtree(cache_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Compare CatalogDB.items() with lazily parsed rows against the previous eager dict_factory.
+
+    python benchmarks/bench_items.py --items 30000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gospellibrary.catalogs import CatalogDB, catalog_path
+from gospellibrary.tests.fixtures import create_catalog
+
+try:
+    from urllib.parse import urljoin
+except ImportError:
+    from urlparse import urljoin
+
+
+class EagerCatalogDB(CatalogDB):
+    def dict_factory(self, cursor, row):
+        obj = {}
+        for i, column in enumerate(cursor.description):
+            name = column[0]
+            value = row[i]
+            if name not in obj:
+                if name in ['version', 'latest_version'] and value is not None:
+                    obj['version'] = value
+                if name in ['cover_renditions', 'item_cover_renditions'] and value is not None:
+                    base_url = urljoin(self.base_url, self.schema_version)
+
+                    renditions = []
+                    for rendition in value.splitlines():
+                        size, url = rendition.split(',', 1)
+                        width, height = size.split('x', 1)
+                        renditions.append(dict(
+                            width=width,
+                            height=height,
+                            url=urljoin(base_url, url),
+                        ))
+                    obj[name] = renditions
+                    obj['raw_' + name] = value
+                else:
+                    obj[name] = value
+        return obj
+
+
+def measure(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        fn()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=30000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    cache_path = tempfile.mkdtemp()
+    try:
+        create_catalog(catalog_path(1, cache_path=cache_path), item_count=args.items)
+        print('{:<34} {:>10}'.format('mode', 'msec'))
+        with EagerCatalogDB(catalog_version=1, cache_path=cache_path) as catalog:
+            print('{:<34} {:>10.1f}'.format('eager dict_factory', measure(args.repeat, catalog.items)))
+        with CatalogDB(catalog_version=1, cache_path=cache_path) as catalog:
+            print('{:<34} {:>10.1f}'.format('lazy rows', measure(args.repeat, catalog.items)))
+            print('{:<34} {:>10.1f}'.format('lazy rows, uri of every row', measure(args.repeat, lambda: [item['uri'] for item in catalog.items()])))
+            print('{:<34} {:>10.1f}'.format('lazy rows, renditions of every row', measure(args.repeat, lambda: [item['item_cover_renditions'] for item in catalog.items()])))
+    finally:
+        shutil.rmtree(cache_path)
+
+
+if __name__ == '__main__':
+    main()
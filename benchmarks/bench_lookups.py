@@ -0,0 +1,56 @@
+"""Compare resolving item URIs one CatalogDB.item() call at a time with a single items_by_uris() call.
+
+    python benchmarks/bench_lookups.py --items 30000 --lookups 1000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gospellibrary.catalogs import CatalogDB, catalog_path
+from gospellibrary.tests.fixtures import create_catalog, item_uri
+
+
+def open_and_lookup(cache_path, uri):
+    with CatalogDB(catalog_version=1, cache_path=cache_path) as catalog:
+        return catalog.item(uri=uri)
+
+
+def measure(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        fn()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=30000)
+    parser.add_argument('--lookups', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    cache_path = tempfile.mkdtemp()
+    try:
+        create_catalog(catalog_path(1, cache_path=cache_path), item_count=args.items)
+        uris = [item_uri(index) for index in random.Random(0).sample(range(args.items), args.lookups)]
+
+        print('{:<34} {:>10}'.format('mode', 'msec'))
+        print('{:<34} {:>10.1f}'.format('open + item() per uri', measure(args.repeat, lambda: [open_and_lookup(cache_path, uri) for uri in uris])))
+        with CatalogDB(catalog_version=1, cache_path=cache_path) as catalog:
+            print('{:<34} {:>10.1f}'.format('item() per uri', measure(args.repeat, lambda: [catalog.item(uri=uri) for uri in uris])))
+            print('{:<34} {:>10.1f}'.format('items_by_uris()', measure(args.repeat, lambda: catalog.items_by_uris(uris))))
+    finally:
+        shutil.rmtree(cache_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Compare paragraph-at-a-time html() calls with a single bulk paragraphs() call.
+
+    python benchmarks/bench_paragraphs.py --paragraphs 60 --repeat 200
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gospellibrary.item_packages import ItemPackage
+from gospellibrary.tests.fixtures import create_item_package, item_id
+
+
+def measure(repeat, fn):
+    start = time.time()
+    for _ in range(repeat):
+        fn()
+    return (time.time() - start) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--paragraphs', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    cache_path = tempfile.mkdtemp()
+    try:
+        create_item_package(os.path.join(cache_path, 'v4', 'languages', 'eng', 'item_packages', str(item_id(0)), '1', 'Package.sqlite'), subitem_count=10, paragraph_count=args.paragraphs)
+        uri = '/scriptures/book-0/5'
+        chapter = ['p{}'.format(i) for i in range(1, args.paragraphs + 1)]
+        verses = ['p{}'.format(i) for i in range(21, 44)]
+
+        with ItemPackage(item_id=str(item_id(0)), item_version=1, cache_path=cache_path) as item_package:
+            print('{:<14} {:<14} {:>12}'.format('scenario', 'mode', 'msec'))
+            for scenario, paragraph_ids, spec in (('full chapter', chapter, None), ('verse range', verses, 'p21-p43')):
+                print('{:<14} {:<14} {:>12.3f}'.format(scenario, 'html()', measure(args.repeat, lambda: [item_package.html(subitem_uri=uri, paragraph_id=paragraph_id) for paragraph_id in paragraph_ids])))
+                print('{:<14} {:<14} {:>12.3f}'.format(scenario, 'paragraphs()', measure(args.repeat, lambda: item_package.paragraphs(uri, spec))))
+    finally:
+        shutil.rmtree(cache_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Compare disk footprint and query latency of decompressed and compressed-at-rest item packages.
+
+    python benchmarks/bench_storage.py --subitems 200 --paragraphs 100 --repeat 20
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gospellibrary.cache_manager import CacheManager
+from gospellibrary.fetch import STORAGE_COMPRESSED, STORAGE_DECOMPRESSED, working_cache_path
+from gospellibrary.item_packages import ItemPackage, item_package_path
+from gospellibrary.tests.fixtures import compress, create_item_package, item_id
+
+
+def query(cache_path, storage, cache_manager=None):
+    with ItemPackage(item_id=item_id(0), item_version=1, cache_path=cache_path, cache_manager=cache_manager, storage=storage) as item_package:
+        return item_package.subitem_html(item_package.subitem('/scriptures/book-0/5')['id'])
+
+
+def measure(repeat, fn, before=None):
+    elapsed = 0.0
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.time()
+        fn()
+        elapsed += time.time() - start
+    return elapsed / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--subitems', type=int, default=200)
+    parser.add_argument('--paragraphs', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    cache_path = tempfile.mkdtemp()
+    try:
+        path = create_item_package(item_package_path(item_id(0), 1, cache_path=cache_path), subitem_count=args.subitems, paragraph_count=args.paragraphs)
+        compress(path, path + '.xz')
+        manager = CacheManager(max_bytes=0, cache_path=working_cache_path(cache_path))
+
+        print('{:<24} {:>12} {:>14}'.format('mode', 'msec', 'bytes at rest'))
+        print('{:<24} {:>12.3f} {:>14}'.format('decompressed', measure(args.repeat, lambda: query(cache_path, STORAGE_DECOMPRESSED)), os.path.getsize(path)))
+        print('{:<24} {:>12.3f} {:>14}'.format('compressed (cold)', measure(args.repeat, lambda: query(cache_path, STORAGE_COMPRESSED), before=manager.evict), os.path.getsize(path + '.xz')))
+        print('{:<24} {:>12.3f} {:>14}'.format('compressed (warm)', measure(args.repeat, lambda: query(cache_path, STORAGE_COMPRESSED)), os.path.getsize(path + '.xz')))
+    finally:
+        shutil.rmtree(cache_path)
+
+
+if __name__ == '__main__':
+    main()
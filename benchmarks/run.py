@@ -0,0 +1,177 @@
+"""Run the benchmark scenarios against a synthetic site served from a local HTTP server.
+
+Each scenario runs in its own process so peak RSS is reported per scenario:
+
+    python benchmarks/run.py --json results.json
+    python benchmarks/run.py --scenarios warm_query items_listing --compare results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gospellibrary.catalogs import CatalogDB
+from gospellibrary.item_packages import ItemPackage
+from gospellibrary.sync import sync_language
+from gospellibrary.tests.fixtures import FixtureServer, compress, create_catalog, create_site, item_id, subitem_uri
+
+SCENARIOS = ['cold_fetch', 'warm_query', 'items_listing', 'paragraph_extraction', 'bulk_sync']
+
+
+def peak_rss():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def create_benchmark_site(root, args):
+    create_site(root, item_count=args.packages, subitem_count=args.subitems, paragraph_count=args.paragraphs)
+    catalog_path = create_catalog(os.path.join(root, '.build', 'eng', 'catalogs', 'large', 'Catalog.sqlite'), item_count=max(args.catalog_items, args.packages))
+    compress(catalog_path, os.path.join(root, 'v4', 'languages', 'eng', 'catalogs', '1.xz'))
+
+
+def timed(iterations, fn):
+    latencies = []
+    for i in range(iterations):
+        start = time.time()
+        fn(i)
+        latencies.append(time.time() - start)
+    return latencies
+
+
+def cold_fetch(args, base_url, cache_path):
+    def fetch(i):
+        with ItemPackage(item_id=item_id(i % args.packages), item_version=1, base_url=base_url, cache_path=os.path.join(cache_path, str(i))) as item_package:
+            item_package.file_id()
+
+    return timed(args.iterations, fetch), 1, 'packages'
+
+
+def warm_query(args, base_url, cache_path):
+    rng = random.Random(0)
+    queries = [(subitem_uri(0, rng.randrange(args.subitems)), 'p{}'.format(rng.randrange(args.paragraphs) + 1)) for _ in range(args.queries)]
+    with ItemPackage(item_id=item_id(0), item_version=1, base_url=base_url, cache_path=cache_path) as item_package:
+        item_package.file_id()
+        return timed(len(queries), lambda i: item_package.html(subitem_uri=queries[i][0], paragraph_id=queries[i][1])), 1, 'queries'
+
+
+def items_listing(args, base_url, cache_path):
+    with CatalogDB(catalog_version=1, base_url=base_url, cache_path=cache_path) as catalog:
+        count = len(catalog.items())
+        return timed(args.iterations, lambda i: catalog.items()), count, 'items'
+
+
+def paragraph_extraction(args, base_url, cache_path):
+    rng = random.Random(0)
+    uris = [subitem_uri(0, rng.randrange(args.subitems)) for _ in range(args.queries)]
+    with ItemPackage(item_id=item_id(0), item_version=1, base_url=base_url, cache_path=cache_path) as item_package:
+        item_package.file_id()
+        return timed(len(uris), lambda i: item_package.paragraphs(uris[i])), args.paragraphs, 'paragraphs'
+
+
+def bulk_sync(args, base_url, cache_path):
+    item_ids = set(item_id(i) for i in range(args.packages))
+
+    def sync(i):
+        result = sync_language('eng', item_filter=lambda item: item['id'] in item_ids, catalog_version=1, base_url=base_url, cache_path=os.path.join(cache_path, str(i)))
+        if result.synced != args.packages:
+            raise RuntimeError('Synced {} of {} item packages'.format(result.synced, args.packages))
+
+    return timed(args.sync_iterations, sync), args.packages, 'packages'
+
+
+def run_child(args):
+    cache_path = tempfile.mkdtemp()
+    try:
+        latencies, units, unit = globals()[args.child](args, args.base_url, cache_path)
+    finally:
+        shutil.rmtree(cache_path)
+
+    print(json.dumps(dict(
+        count=len(latencies),
+        p50_ms=percentile(latencies, 50) * 1e3,
+        p99_ms=percentile(latencies, 99) * 1e3,
+        mean_ms=sum(latencies) / len(latencies) * 1e3,
+        throughput=units * len(latencies) / sum(latencies),
+        throughput_unit='{}/s'.format(unit),
+        peak_rss_kib=peak_rss(),
+    )))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--catalog-items', type=int, default=10000)
+    parser.add_argument('--packages', type=int, default=20)
+    parser.add_argument('--subitems', type=int, default=60)
+    parser.add_argument('--paragraphs', type=int, default=40)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--sync-iterations', type=int, default=3)
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='print p50 ratios against a previous --json file')
+    parser.add_argument('--child', choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    config = dict((name, getattr(args, name)) for name in ('catalog_items', 'packages', 'subitems', 'paragraphs', 'iterations', 'queries', 'sync_iterations'))
+    passthrough = []
+    for name, value in sorted(config.items()):
+        passthrough += ['--' + name.replace('_', '-'), str(value)]
+
+    results = {}
+    root = tempfile.mkdtemp()
+    try:
+        create_benchmark_site(root, args)
+        with FixtureServer(root) as server:
+            for scenario in args.scenarios:
+                output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--child', scenario, '--base-url', server.base_url] + passthrough)
+                results[scenario] = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(root)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['scenarios']
+
+    print('{:<22} {:>8} {:>10} {:>10} {:>25} {:>14}{}'.format('scenario', 'count', 'p50 ms', 'p99 ms', 'throughput', 'peak RSS KiB', '   p50 / baseline' if baseline else ''))
+    for scenario in args.scenarios:
+        result = results[scenario]
+        line = '{:<22} {:>8} {:>10.3f} {:>10.3f} {:>12.1f} {:<12} {:>14}'.format(scenario, result['count'], result['p50_ms'], result['p99_ms'], result['throughput'], result['throughput_unit'], result['peak_rss_kib'])
+        if baseline and scenario in baseline:
+            line += '   {:>15.2f}'.format(result['p50_ms'] / baseline[scenario]['p50_ms'])
+        print(line)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(dict(config=config, python=platform.python_version(), platform=platform.platform(), scenarios=results), f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import os
+import tempfile
+
+try:
+    from urllib.parse import urljoin
+except ImportError:
+    from urlparse import urljoin
+
+import aiohttp
+
+from gospellibrary.catalogs import CatalogDB, DEFAULT_BASE_URL, DEFAULT_CACHE_PATH, DEFAULT_ISO639_3_CODE, DEFAULT_SCHEMA_VERSION, catalog_path, catalog_url
+from gospellibrary.fetch import DEFAULT_CHUNK_SIZE, FileLock, decompress_xz, makedirs
+from gospellibrary.item_packages import ItemPackage, item_package_path, item_package_url
+
+DEFAULT_MAX_CONNECTIONS = 16
+DEFAULT_EXECUTOR_WORKERS = 4
+
+
+class AsyncClient:
+    def __init__(self, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, cache_path=DEFAULT_CACHE_PATH, max_connections=DEFAULT_MAX_CONNECTIONS, executor_workers=DEFAULT_EXECUTOR_WORKERS, session=None, executor=None):
+        self.schema_version = schema_version
+        self.base_url = base_url
+        self.cache_path = cache_path
+        self.max_connections = max_connections
+        self.executor = executor if executor is not None else ThreadPoolExecutor(max_workers=executor_workers)
+        self.__owns_executor = executor is None
+        self.__session = session
+        self.__owns_session = session is None
+        self.__inflight = {}
+
+    @property
+    def session(self):
+        if self.__session is None:
+            self.__session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_connections))
+        return self.__session
+
+    async def close(self):
+        if self.__owns_session and self.__session is not None:
+            await self.__session.close()
+            self.__session = None
+        if self.__owns_executor:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.get_event_loop().run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def get_json(self, url):
+        async with self.session.get(url) as r:
+            if r.status == 200:
+                return await r.json(content_type=None)
+
+    async def fetch_xz(self, url, path):
+        if os.path.isfile(path):
+            return path
+
+        task = self.__inflight.get(path)
+        if task is None:
+            task = asyncio.ensure_future(self.__fetch_xz(url, path))
+            self.__inflight[path] = task
+            task.add_done_callback(lambda _: self.__inflight.pop(path, None))
+        return await asyncio.shield(task)
+
+    async def __fetch_xz(self, url, path):
+        lock = FileLock(path)
+        await self.run(lock.acquire)
+        try:
+            if os.path.isfile(path):
+                return path
+            return await self.__download_xz(url, path)
+        finally:
+            lock.release()
+
+    async def __download_xz(self, url, path):
+        async with self.session.get(url) as r:
+            if r.status != 200:
+                return None
+
+            makedirs(os.path.dirname(path))
+            fd, xz_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.' + os.path.basename(path) + '.', suffix='.xz')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    async for chunk in r.content.iter_chunked(DEFAULT_CHUNK_SIZE):
+                        await self.run(f.write, chunk)
+                return await self.run(decompress_xz, xz_path, path)
+            finally:
+                os.remove(xz_path)
+
+
+async def get_languages(client):
+    return await client.get_json(urljoin(client.base_url, '{schema_version}/languages/languages.json'.format(schema_version=client.schema_version)))
+
+
+async def current_catalog_version(client, iso639_3_code=DEFAULT_ISO639_3_CODE):
+    index = await client.get_json(urljoin(client.base_url, '{schema_version}/languages/{iso639_3_code}/index.json'.format(schema_version=client.schema_version, iso639_3_code=iso639_3_code)))
+    if index is not None:
+        return index.get('catalogVersion', None)
+
+
+class AsyncCatalogDB:
+    def __init__(self, client, iso639_3_code=DEFAULT_ISO639_3_CODE, catalog_version=None, cache=None):
+        self.client = client
+        self.iso639_3_code = iso639_3_code
+        self.catalog_version = catalog_version
+        self.cache = cache
+        self.__catalog = None
+
+    async def catalog(self):
+        if self.__catalog is None:
+            if not self.catalog_version:
+                self.catalog_version = await current_catalog_version(self.client, iso639_3_code=self.iso639_3_code)
+            path = catalog_path(self.catalog_version, iso639_3_code=self.iso639_3_code, schema_version=self.client.schema_version, cache_path=self.client.cache_path)
+            if not await self.client.fetch_xz(catalog_url(self.catalog_version, iso639_3_code=self.iso639_3_code, schema_version=self.client.schema_version, base_url=self.client.base_url), path):
+                return None
+            if self.__catalog is None:
+                self.__catalog = CatalogDB(iso639_3_code=self.iso639_3_code, catalog_version=self.catalog_version, schema_version=self.client.schema_version, base_url=self.client.base_url, cache_path=self.client.cache_path, cache=self.cache)
+        return self.__catalog
+
+    async def __call(self, name, *args, **kwargs):
+        catalog = await self.catalog()
+        if catalog is None:
+            return None
+        return await self.client.run(getattr(catalog, name), *args, **kwargs)
+
+    async def exists(self):
+        return await self.catalog() is not None
+
+    def close(self):
+        if self.__catalog is not None:
+            self.__catalog.close()
+
+    async def language_name(self, language_id):
+        return await self.__call('language_name', language_id)
+
+    async def item_categories(self):
+        return await self.__call('item_categories')
+
+    async def collection(self, collection_id):
+        return await self.__call('collection', collection_id)
+
+    async def sections(self, collection_id):
+        return await self.__call('sections', collection_id)
+
+    async def collections(self, section_ids):
+        return await self.__call('collections', section_ids)
+
+    async def items(self, section_ids=None):
+        return await self.__call('items', section_ids)
+
+    async def nodes(self, section_ids):
+        return await self.__call('nodes', section_ids)
+
+    async def item(self, item_id=None, uri=None):
+        return await self.__call('item', item_id=item_id, uri=uri)
+
+    async def tree(self, snapshot=True):
+        return await self.__call('tree', snapshot=snapshot)
+
+
+class AsyncItemPackage:
+    def __init__(self, client, item_id, item_version, iso639_3_code=DEFAULT_ISO639_3_CODE, cache=None):
+        self.client = client
+        self.item_id = item_id
+        self.item_version = item_version
+        self.iso639_3_code = iso639_3_code
+        self.cache = cache
+        self.__item_package = None
+
+    async def item_package(self):
+        if self.__item_package is None:
+            path = item_package_path(self.item_id, self.item_version, iso639_3_code=self.iso639_3_code, schema_version=self.client.schema_version, cache_path=self.client.cache_path)
+            if not await self.client.fetch_xz(item_package_url(self.item_id, self.item_version, iso639_3_code=self.iso639_3_code, schema_version=self.client.schema_version, base_url=self.client.base_url), path):
+                return None
+            if self.__item_package is None:
+                self.__item_package = ItemPackage(item_id=self.item_id, item_version=self.item_version, iso639_3_code=self.iso639_3_code, schema_version=self.client.schema_version, base_url=self.client.base_url, cache_path=self.client.cache_path, cache=self.cache)
+        return self.__item_package
+
+    async def __call(self, name, *args, **kwargs):
+        item_package = await self.item_package()
+        if item_package is None:
+            return None
+        return await self.client.run(getattr(item_package, name), *args, **kwargs)
+
+    async def exists(self):
+        return await self.item_package() is not None
+
+    def close(self):
+        if self.__item_package is not None:
+            self.__item_package.close()
+
+    async def file_id(self):
+        return await self.__call('file_id')
+
+    async def html(self, subitem_uri=None, paragraph_id=None):
+        return await self.__call('html', subitem_uri=subitem_uri, paragraph_id=paragraph_id)
+
+    async def paragraphs(self, subitem_uri, paragraph_ids=None):
+        return await self.__call('paragraphs', subitem_uri, paragraph_ids)
+
+    async def subitems(self):
+        return await self.__call('subitems')
+
+    async def subitem(self, uri):
+        return await self.__call('subitem', uri)
+
+    async def subitem_html(self, subitem_id):
+        return await self.__call('subitem_html', subitem_id)
+
+    async def related_audio_items(self, subitem_id):
+        return await self.__call('related_audio_items', subitem_id)
+
+    async def related_video_items(self, subitem_id):
+        return await self.__call('related_video_items', subitem_id)
+
+    async def related_content_items(self, subitem_id):
+        return await self.__call('related_content_items', subitem_id)
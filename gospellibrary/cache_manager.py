@@ -0,0 +1,171 @@
+import os
+import shutil
+import threading
+import time
+
+from gospellibrary.fetch import FileLock
+from gospellibrary.pruning import directory_size
+
+DEFAULT_SCHEMA_VERSION = 'v4'
+DEFAULT_CACHE_PATH = '/tmp/python-gospel-library'
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+DEFAULT_TOUCH_INTERVAL = 60
+DEFAULT_RESCAN_INTERVAL = 60
+
+ENTRY_FILENAMES = {
+    'catalogs': 'Catalog.sqlite',
+    'item_packages': 'Package.sqlite',
+}
+
+
+class CacheManager:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, schema_version=DEFAULT_SCHEMA_VERSION, cache_path=DEFAULT_CACHE_PATH, touch_interval=DEFAULT_TOUCH_INTERVAL, rescan_interval=DEFAULT_RESCAN_INTERVAL):
+        self.max_bytes = max_bytes
+        self.schema_version = schema_version
+        self.cache_path = cache_path
+        self.touch_interval = touch_interval
+        self.rescan_interval = rescan_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.__touched = {}
+        self.__index = None
+        self.__refreshed_at = 0
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+        self.__evict_lock = threading.Lock()
+
+    def entries(self):
+        languages_path = os.path.join(self.cache_path, self.schema_version, 'languages')
+        if not os.path.isdir(languages_path):
+            return
+
+        for iso639_3_code in sorted(os.listdir(languages_path)):
+            for kind, filename in sorted(ENTRY_FILENAMES.items()):
+                kind_path = os.path.join(languages_path, iso639_3_code, kind)
+                if not os.path.isdir(kind_path):
+                    continue
+                for directory, _, filenames in os.walk(kind_path):
+                    if filename in filenames:
+                        entry = self.entry(os.path.join(directory, filename))
+                        if entry is not None:
+                            yield entry
+
+    def entry(self, path):
+        languages_path = os.path.join(self.cache_path, self.schema_version, 'languages')
+        parts = os.path.relpath(path, languages_path).split(os.sep)
+        if len(parts) < 3 or parts[0] == os.pardir or ENTRY_FILENAMES.get(parts[1]) != parts[-1]:
+            return None
+
+        try:
+            last_access = os.path.getmtime(path)
+        except OSError:
+            return None
+        return dict(path=path, language=parts[0], kind=parts[1], bytes=directory_size(os.path.dirname(path)), last_access=last_access)
+
+    def refresh(self):
+        refreshed_at = time.time()
+        index = dict((entry['path'], entry) for entry in self.entries())
+        with self.__lock:
+            for path, entry in index.items():
+                previous = (self.__index or {}).get(path)
+                if previous is not None and previous['last_access'] > entry['last_access']:
+                    entry['last_access'] = previous['last_access']
+            self.__index = index
+            self.__bytes = sum(entry['bytes'] for entry in index.values())
+            self.__refreshed_at = refreshed_at
+
+    def __load(self):
+        if self.__index is None:
+            self.refresh()
+
+    def record_access(self, path, hit):
+        self.__load()
+        with self.__lock:
+            known = path in self.__index
+        entry = None if hit and known else self.entry(path)
+        now = time.time()
+        with self.__lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if entry is not None:
+                previous = self.__index.get(path)
+                if previous is not None:
+                    self.__bytes -= previous['bytes']
+                self.__index[path] = entry
+                self.__bytes += entry['bytes']
+            if path in self.__index:
+                self.__index[path]['last_access'] = now
+            if now - self.__touched.get(path, 0) < self.touch_interval:
+                return
+            self.__touched[path] = now
+
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+
+    def evict(self, max_bytes=None):
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        evicted = []
+        self.__load()
+        if time.time() - self.__refreshed_at >= self.rescan_interval:
+            self.refresh()
+        with self.__evict_lock:
+            with self.__lock:
+                if self.__bytes <= max_bytes:
+                    return evicted
+                entries = sorted(self.__index.values(), key=lambda entry: entry['last_access'])
+                total = self.__bytes
+
+            for entry in entries:
+                if total <= max_bytes:
+                    break
+
+                if not os.path.isfile(entry['path']):
+                    total -= entry['bytes']
+                    with self.__lock:
+                        if self.__index.pop(entry['path'], None) is not None:
+                            self.__bytes -= entry['bytes']
+                    continue
+
+                lock = FileLock(entry['path'])
+                if not lock.acquire(blocking=False):
+                    continue
+                try:
+                    shutil.rmtree(os.path.dirname(entry['path']), ignore_errors=True)
+                finally:
+                    lock.release()
+                try:
+                    os.rmdir(os.path.dirname(os.path.dirname(entry['path'])))
+                except OSError:
+                    pass
+
+                total -= entry['bytes']
+                evicted.append(entry)
+                with self.__lock:
+                    if self.__index.pop(entry['path'], None) is not None:
+                        self.__bytes -= entry['bytes']
+                    self.evictions += 1
+                    self.evicted_bytes += entry['bytes']
+                    self.__touched.pop(entry['path'], None)
+
+        return evicted
+
+    def stats(self):
+        self.__load()
+        with self.__lock:
+            requests = self.hits + self.misses
+            return dict(
+                bytes=self.__bytes,
+                entries=len(self.__index),
+                max_bytes=self.max_bytes,
+                hits=self.hits,
+                misses=self.misses,
+                hit_rate=float(self.hits) / requests if requests else 0.0,
+                evictions=self.evictions,
+                evicted_bytes=self.evicted_bytes,
+            )
@@ -0,0 +1,138 @@
+from collections import OrderedDict
+import functools
+import sys
+import threading
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def approximate_size(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(v) for v in value)
+    return size
+
+
+def freeze(value):
+    if isinstance(value, Mapping):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def copy_value(value):
+    if isinstance(value, dict):
+        return type(value)((k, copy_value(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return [copy_value(v) for v in value]
+    if isinstance(value, Mapping) and hasattr(value, 'copy'):
+        return value.copy()
+    return value
+
+
+class LRUCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.bytes = 0
+        self.__entries = OrderedDict()
+        self.__versions = {}
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key, default=None):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self.__entries.pop(key)
+            self.__entries[key] = entry
+            return entry[0]
+
+    def put(self, key, value):
+        size = approximate_size(value)
+        with self.__lock:
+            previous = self.__entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            if size > self.max_bytes:
+                return
+
+            self.__entries[key] = (value, size)
+            self.bytes += size
+            while len(self.__entries) > self.max_entries or self.bytes > self.max_bytes:
+                (_, (_, evicted_size)) = self.__entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_load(self, key, load):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = load()
+            if value is not None:
+                self.put(key, value)
+        return copy_value(value)
+
+    def set_version(self, namespace, version):
+        with self.__lock:
+            current_version = self.__versions.get(namespace)
+            if current_version is not None and version <= current_version:
+                return
+
+            self.__versions[namespace] = version
+            if current_version is not None:
+                self.__invalidate(lambda key: key[0] == namespace and key[1] != version)
+
+    def invalidate(self, namespace=None):
+        with self.__lock:
+            self.__invalidate(lambda key: namespace is None or key[0] == namespace)
+
+    def __invalidate(self, predicate):
+        for key in [key for key in self.__entries if predicate(key)]:
+            (_, size) = self.__entries.pop(key)
+            self.bytes -= size
+            self.invalidations += 1
+
+    def stats(self):
+        with self.__lock:
+            return dict(
+                entries=len(self.__entries),
+                bytes=self.bytes,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                invalidations=self.invalidations,
+            )
+
+
+def cached(method):
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.cache is None:
+            return method(self, *args, **kwargs)
+
+        key = (self.cache_namespace, self.cache_version, name, freeze(args), freeze(kwargs))
+        return self.cache.get_or_load(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
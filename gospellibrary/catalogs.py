@@ -1,204 +1,467 @@
-from io import BytesIO
 import requests
 import os
-import sqlite3
+import sys
+import threading
+from collections import OrderedDict
 
 try:
-    from urllib.parse import urljoin
+    from collections.abc import Mapping
 except ImportError:
-    from urlparse import urljoin
+    from collections import Mapping
 
 try:
-    import lzma
+    from urllib.parse import urljoin
 except ImportError:
-    from backports import lzma
+    from urlparse import urljoin
+
+from gospellibrary.caching import cached
+from gospellibrary.connections import open_cached
+from gospellibrary.fetch import STORAGE_COMPRESSED, STORAGE_DECOMPRESSED, fetch_compressed, fetch_xz, working_cache_path
+from gospellibrary.http_cache import DEFAULT_TTL, fetch_json
+from gospellibrary.navigation import CatalogTree
 
 DEFAULT_ISO639_3_CODE = 'eng'
 DEFAULT_SCHEMA_VERSION = 'v4'
 DEFAULT_BASE_URL = 'https://edge.ldscdn.org/mobile/GospelStudy/production/'
 DEFAULT_CACHE_PATH = '/tmp/python-gospel-library'
+DEFAULT_POLL_INTERVAL = 300
+DEFAULT_BATCH_SIZE = 500
 
 
-def get_languages(schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=requests.Session()):
+def get_languages(schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=requests.Session(), cache_path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL):
     languages_url = urljoin(base_url, '{schema_version}/languages/languages.json'.format(schema_version=schema_version))
-    r = session.get(languages_url)
-    if r.status_code == 200:
-        return r.json()
+    return fetch_json(session, languages_url, cache_path=cache_path, ttl=ttl)
 
 
-def current_catalog_version(iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=requests.Session()):
+def current_catalog_version(iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=requests.Session(), cache_path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL):
     index_url = urljoin(base_url, '{schema_version}/languages/{iso639_3_code}/index.json'.format(schema_version=schema_version, iso639_3_code=iso639_3_code))
-    r = session.get(index_url)
-    if r.status_code == 200:
-        return r.json().get('catalogVersion', None)
+    index = fetch_json(session, index_url, cache_path=cache_path, ttl=ttl)
+    if index is not None:
+        return index.get('catalogVersion', None)
+
+
+def catalog_path(catalog_version, iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, cache_path=DEFAULT_CACHE_PATH):
+    return os.path.join(cache_path, schema_version, 'languages', iso639_3_code, 'catalogs', str(catalog_version), 'Catalog.sqlite')
+
+
+def catalog_url(catalog_version, iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL):
+    return urljoin(base_url, '{schema_version}/languages/{iso639_3_code}/catalogs/{catalog_version}.xz'.format(schema_version=schema_version, iso639_3_code=iso639_3_code, catalog_version=catalog_version))
+
+
+def parse_renditions(value, base_url):
+    renditions = []
+    for rendition in value.splitlines():
+        size, url = rendition.split(',', 1)
+        width, height = size.split('x', 1)
+        renditions.append(dict(
+            width=width,
+            height=height,
+            url=urljoin(base_url, url),
+        ))
+    return renditions
+
+
+class CatalogRowLayout:
+    VALUE, RENDITIONS, RAW_RENDITIONS = range(3)
+
+    __slots__ = ('fields', 'keys', 'version_plan', 'renditions_base_url')
+
+    def __init__(self, names, renditions_base_url):
+        self.fields = {}
+        self.keys = []
+        self.version_plan = []
+        self.renditions_base_url = renditions_base_url
+        for i, name in enumerate(names):
+            if name in ['version', 'latest_version']:
+                if not self.version_plan:
+                    self.keys.append('version')
+                self.version_plan.append((name, i))
+            if name in self.fields:
+                continue
+            if name in ['cover_renditions', 'item_cover_renditions']:
+                self.fields[name] = (CatalogRowLayout.RENDITIONS, i)
+                self.fields['raw_' + name] = (CatalogRowLayout.RAW_RENDITIONS, i)
+                self.keys += [name, 'raw_' + name]
+            elif name != 'version':
+                self.fields[name] = (CatalogRowLayout.VALUE, i)
+                self.keys.append(name)
+
+    def version(self, values):
+        seen = set()
+        found = False
+        version = None
+        for name, i in self.version_plan:
+            if name in seen or (name == 'version' and found):
+                continue
+            seen.add(name)
+            value = values[i]
+            if value is not None or name == 'version':
+                version = value
+                found = True
+        return found, version
+
+
+class CatalogRow(Mapping):
+    __slots__ = ('_layout', '_values', '_renditions')
+
+    def __init__(self, layout, values):
+        self._layout = layout
+        self._values = values
+        self._renditions = None
+
+    def __getitem__(self, key):
+        if key == 'version':
+            found, version = self._layout.version(self._values)
+            if found:
+                return version
+            raise KeyError(key)
+
+        kind, i = self._layout.fields[key]
+        value = self._values[i]
+        if kind == CatalogRowLayout.VALUE:
+            return value
+        if value is None:
+            if kind == CatalogRowLayout.RAW_RENDITIONS:
+                raise KeyError(key)
+            return None
+        if kind == CatalogRowLayout.RAW_RENDITIONS:
+            return value
+
+        if self._renditions is None:
+            self._renditions = {}
+        renditions = self._renditions.get(key)
+        if renditions is None:
+            renditions = self._renditions[key] = parse_renditions(value, self._layout.renditions_base_url)
+        return renditions
+
+    def __iter__(self):
+        for key in self._layout.keys:
+            if key in self:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        if key == 'version':
+            return self._layout.version(self._values)[0]
+        field = self._layout.fields.get(key)
+        if field is None:
+            return False
+        return field[0] != CatalogRowLayout.RAW_RENDITIONS or self._values[field[1]] is not None
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sys.getsizeof(self._values) + sum(sys.getsizeof(value) for value in self._values)
+
+    def copy(self):
+        return CatalogRow(self._layout, self._values)
+
+    def __repr__(self):
+        return repr(dict(self))
 
 
 class CatalogDB:
-    def __init__(self, iso639_3_code=DEFAULT_ISO639_3_CODE, catalog_version=None, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=requests.Session(), cache_path=DEFAULT_CACHE_PATH):
+    def __init__(self, iso639_3_code=DEFAULT_ISO639_3_CODE, catalog_version=None, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=requests.Session(), cache_path=DEFAULT_CACHE_PATH, cache=None, cache_manager=None, storage=STORAGE_DECOMPRESSED, ttl=DEFAULT_TTL):
         self.iso639_3_code = iso639_3_code
-        self.catalog_version = catalog_version if catalog_version else current_catalog_version(iso639_3_code=iso639_3_code, schema_version=schema_version, base_url=base_url, session=session)
+        self.catalog_version = catalog_version if catalog_version else current_catalog_version(iso639_3_code=iso639_3_code, schema_version=schema_version, base_url=base_url, session=session, cache_path=cache_path, ttl=ttl)
         self.schema_version = schema_version
         self.base_url = base_url
         self.session = session
         self.cache_path = cache_path
+        self.cache = cache
+        self.cache_manager = cache_manager
+        self.storage = storage
+        self.cache_namespace = ('catalog', self.schema_version, self.iso639_3_code)
+        self.cache_version = self.catalog_version
+        if cache is not None:
+            cache.set_version(self.cache_namespace, self.cache_version)
+        self.__connections = None
+        self.__connections_lock = threading.Lock()
+        self.__renditions_base_url = urljoin(self.base_url, self.schema_version)
+        self.__layouts = {}
+        self.__last_layout = (None, None)
+        self.__tree = None
 
     def exists(self):
-        return self.__fetch_catalog() is not None
+        return self.__db() is not None
 
-    def __fetch_catalog(self):
-        catalog_path = os.path.join(self.cache_path, self.schema_version, 'languages', self.iso639_3_code, 'catalogs', str(self.catalog_version), 'Catalog.sqlite')
-        if not os.path.isfile(catalog_path):
-            catalog_xz_url = urljoin(self.base_url, '{schema_version}/languages/{iso639_3_code}/catalogs/{catalog_version}.xz'.format(schema_version=self.schema_version, iso639_3_code=self.iso639_3_code, catalog_version=self.catalog_version))
-            r = self.session.get(catalog_xz_url)
-            if r.status_code == 200:
-                try:
-                    os.makedirs(os.path.dirname(catalog_path))
-                except OSError:
-                    pass
+    def close(self):
+        with self.__connections_lock:
+            connections, self.__connections = self.__connections, None
+        if connections is not None:
+            connections.close()
+
+    def __enter__(self):
+        return self
 
-                with lzma.open(BytesIO(r.content)) as catalog_xz_file:
-                    with open(catalog_path, 'wb') as f:
-                        f.write(catalog_xz_file.read())
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
-        if os.path.isfile(catalog_path):
-            return catalog_path
+    def __db(self):
+        if self.__connections is None:
+            with self.__connections_lock:
+                if self.__connections is None:
+                    self.__connections = open_cached(self.__path(), self.__fetch_catalog, cache_manager=self.cache_manager)
+        return self.__connections
 
-        return None
+    def __path(self):
+        cache_path = working_cache_path(self.cache_path) if self.storage == STORAGE_COMPRESSED else self.cache_path
+        return catalog_path(self.catalog_version, iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, cache_path=cache_path)
+
+    def __fetch_catalog(self):
+        path = self.__path()
+        if not os.path.isfile(path):
+            url = catalog_url(self.catalog_version, iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, base_url=self.base_url)
+            if self.storage == STORAGE_COMPRESSED:
+                xz_path = catalog_path(self.catalog_version, iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, cache_path=self.cache_path) + '.xz'
+                return fetch_compressed(self.session, url, xz_path, path)
+            return fetch_xz(self.session, url, path)
+
+        return path
 
     def dict_factory(self, cursor, row):
-        obj = {}
-        for i, column in enumerate(cursor.description):
-            name = column[0]
-            value = row[i]
-            if name not in obj:
-                if name in ['version', 'latest_version'] and value is not None:
-                    obj['version'] = value
-                if name in ['cover_renditions', 'item_cover_renditions'] and value is not None:
-                    base_url = urljoin(self.base_url, self.schema_version)
-
-                    renditions = []
-                    for rendition in value.splitlines():
-                        size, url = rendition.split(',', 1)
-                        width, height = size.split('x', 1)
-                        renditions.append(dict(
-                            width=width,
-                            height=height,
-                            url=urljoin(base_url, url),
-                        ))
-                    obj[name] = renditions
-                    obj['raw_' + name] = value
-                else:
-                    obj[name] = value
-        return obj
+        description = cursor.description
+        (last_description, layout) = self.__last_layout
+        if description is not last_description:
+            names = tuple(column[0] for column in description)
+            layout = self.__layouts.get(names)
+            if layout is None:
+                layout = self.__layouts[names] = CatalogRowLayout(names, self.__renditions_base_url)
+            self.__last_layout = (description, layout)
+        return CatalogRow(layout, row)
 
+    @cached
     def language_name(self, language_id):
-        catalog_path = self.__fetch_catalog()
-        if not catalog_path:
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(catalog_path) as db:
-            db.row_factory = self.dict_factory
-            c = db.cursor()
-            try:
-                c.execute('''SELECT name FROM language_name WHERE language_id=?''', [language_id])
-                row = c.fetchone()
-                return row['name'] if row else None
-            finally:
-                c.close()
+        row = db.fetchone('''SELECT name FROM language_name WHERE language_id=?''', [language_id], row_factory=self.dict_factory)
+        return row['name'] if row else None
 
+    @cached
     def item_categories(self):
-        catalog_path = self.__fetch_catalog()
-        if not catalog_path:
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(catalog_path) as db:
-            db.row_factory = self.dict_factory
-            c = db.cursor()
-            try:
-                c.execute('''SELECT * FROM item_category''')
-                return c.fetchall()
-            finally:
-                c.close()
+        return db.fetchall('''SELECT * FROM item_category''', row_factory=self.dict_factory)
 
+    @cached
     def collection(self, collection_id):
-        catalog_path = self.__fetch_catalog()
-        if not catalog_path:
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(catalog_path) as db:
-            db.row_factory = self.dict_factory
-            c = db.cursor()
-            try:
-                c.execute('''SELECT * FROM library_collection WHERE id=?''', [collection_id])
-                return c.fetchone()
-            finally:
-                c.close()
+        return db.fetchone('''SELECT * FROM library_collection WHERE id=?''', [collection_id], row_factory=self.dict_factory)
 
+    @cached
     def sections(self, collection_id):
-        catalog_path = self.__fetch_catalog()
-        if not catalog_path:
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(catalog_path) as db:
-            db.row_factory = self.dict_factory
-            c = db.cursor()
-            try:
-                c.execute('''SELECT * FROM library_section WHERE library_collection_id=? ORDER BY position''', [collection_id])
-                return c.fetchall()
-            finally:
-                c.close()
+        return db.fetchall('''SELECT * FROM library_section WHERE library_collection_id=? ORDER BY position''', [collection_id], row_factory=self.dict_factory)
 
+    @cached
     def collections(self, section_ids):
-        catalog_path = self.__fetch_catalog()
-        if not catalog_path:
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(catalog_path) as db:
-            db.row_factory = self.dict_factory
-            c = db.cursor()
-            try:
-                c.execute('''SELECT * FROM library_collection WHERE library_section_id IN ({}) ORDER BY position'''.format(
-                    ','.join('?' * len(section_ids))
-                ), section_ids)
-                return c.fetchall()
-            finally:
-                c.close()
+        return db.fetchall('''SELECT * FROM library_collection WHERE library_section_id IN ({}) ORDER BY position'''.format(
+            ','.join('?' * len(section_ids))
+        ), section_ids, row_factory=self.dict_factory)
 
+    @cached
     def items(self, section_ids=None):
-        catalog_path = self.__fetch_catalog()
-        if not catalog_path:
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(catalog_path) as db:
-            db.row_factory = self.dict_factory
-            c = db.cursor()
-            try:
-                if section_ids is not None:
-                    c.execute('''SELECT item.*, library_item.* FROM library_item INNER JOIN item ON library_item.item_id=item.id WHERE library_section_id IN ({}) ORDER BY position'''.format(
-                        ','.join('?' * len(section_ids))
-                    ), section_ids)
-                else:
-                    c.execute('''SELECT item.*, library_item.* FROM library_item INNER JOIN item ON library_item.item_id=item.id ORDER BY external_id''')
-                return c.fetchall()
-            finally:
-                c.close()
+        if section_ids is not None:
+            return db.fetchall('''SELECT item.*, library_item.* FROM library_item INNER JOIN item ON library_item.item_id=item.id WHERE library_section_id IN ({}) ORDER BY position'''.format(
+                ','.join('?' * len(section_ids))
+            ), section_ids, row_factory=self.dict_factory)
+        else:
+            return db.fetchall('''SELECT item.*, library_item.* FROM library_item INNER JOIN item ON library_item.item_id=item.id ORDER BY external_id''', row_factory=self.dict_factory)
+
+    def iter_items(self, section_ids=None, batch_size=DEFAULT_BATCH_SIZE):
+        db = self.__db()
+        if not db:
+            return
+
+        if section_ids is not None:
+            rows = db.iterate('''SELECT item.*, library_item.* FROM library_item INNER JOIN item ON library_item.item_id=item.id WHERE library_section_id IN ({}) ORDER BY position'''.format(
+                ','.join('?' * len(section_ids))
+            ), section_ids, row_factory=self.dict_factory, batch_size=batch_size)
+        else:
+            rows = db.iterate('''SELECT item.*, library_item.* FROM library_item INNER JOIN item ON library_item.item_id=item.id ORDER BY external_id''', row_factory=self.dict_factory, batch_size=batch_size)
+        for row in rows:
+            yield row
 
     def nodes(self, section_ids):
         return sorted(self.collections(section_ids) + self.items(section_ids), key=lambda node: node['position'])
 
+    @cached
     def item(self, item_id=None, uri=None):
-        catalog_path = self.__fetch_catalog()
-        if not catalog_path:
+        db = self.__db()
+        if not db:
+            return None
+
+        if item_id:
+            return db.fetchone('''SELECT * FROM item WHERE id=?''', [item_id], row_factory=self.dict_factory)
+        else:
+            return db.fetchone('''SELECT * FROM item WHERE uri=?''', [uri], row_factory=self.dict_factory)
+
+    def items_by_ids(self, item_ids, batch_size=DEFAULT_BATCH_SIZE):
+        return self.__items_by('id', item_ids, batch_size, normalize=int)
+
+    def items_by_uris(self, uris, batch_size=DEFAULT_BATCH_SIZE):
+        return self.__items_by('uri', uris, batch_size)
+
+    def __items_by(self, column, keys, batch_size, normalize=None):
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(catalog_path) as db:
-            db.row_factory = self.dict_factory
-            c = db.cursor()
+        items = OrderedDict((key, None) for key in keys)
+        keys_by_value = OrderedDict()
+        for key in items:
             try:
-                if item_id:
-                    c.execute('''SELECT * FROM item WHERE id=?''', [item_id])
-                else:
-                    c.execute('''SELECT * FROM item WHERE uri=?''', [uri])
-                return c.fetchone()
-            finally:
-                c.close()
+                value = normalize(key) if normalize is not None else key
+            except (TypeError, ValueError):
+                continue
+            keys_by_value.setdefault(value, []).append(key)
+
+        values = list(keys_by_value)
+        for start in range(0, len(values), batch_size):
+            batch = values[start:start + batch_size]
+            for item in db.fetchall('''SELECT * FROM item WHERE {} IN ({})'''.format(column, ','.join('?' * len(batch))), batch, row_factory=self.dict_factory):
+                for key in keys_by_value.get(item[column], []):
+                    items[key] = item
+        return items
+
+    def tree(self, snapshot=True):
+        if self.__tree is not None:
+            return self.__tree
+
+        db = self.__db()
+        if not db:
+            return None
+
+        snapshot_path = os.path.join(os.path.dirname(db.path), 'Catalog.tree.json.gz')
+        tree = CatalogTree.load(snapshot_path) if snapshot else None
+        if tree is None:
+            tree = CatalogTree(
+                db.fetchall('''SELECT * FROM library_collection''', row_factory=self.dict_factory),
+                db.fetchall('''SELECT * FROM library_section''', row_factory=self.dict_factory),
+                db.fetchall('''SELECT item.*, library_item.* FROM library_item INNER JOIN item ON library_item.item_id=item.id''', row_factory=self.dict_factory),
+            )
+            if snapshot:
+                tree.save(snapshot_path)
+
+        self.__tree = tree
+        return tree
+
+    def item_versions(self):
+        db = self.__db()
+        if not db:
+            return None
+
+        return dict((item['id'], item) for item in db.fetchall('''SELECT * FROM item''', row_factory=self.dict_factory))
+
+    def diff(self, old_version):
+        if not os.path.isfile(catalog_path(old_version, iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, cache_path=self.cache_path)):
+            return None
+
+        items = self.item_versions()
+        if items is None:
+            return None
+        with CatalogDB(iso639_3_code=self.iso639_3_code, catalog_version=old_version, schema_version=self.schema_version, base_url=self.base_url, session=self.session, cache_path=self.cache_path) as old_catalog:
+            old_items = old_catalog.item_versions()
+
+        added = []
+        changed = []
+        for item_id, item in sorted(items.items()):
+            old_item = old_items.get(item_id)
+            if old_item is None:
+                added.append(dict(id=item_id, uri=item['uri'], version=item.get('version')))
+            elif old_item.get('version') != item.get('version'):
+                changed.append(dict(id=item_id, uri=item['uri'], old_version=old_item.get('version'), version=item.get('version')))
+        removed = [dict(id=item_id, uri=item['uri'], version=item.get('version')) for item_id, item in sorted(old_items.items()) if item_id not in items]
+
+        return dict(added=added, removed=removed, changed=changed)
+
+
+class CatalogWatcher:
+    def __init__(self, iso639_3_code=DEFAULT_ISO639_3_CODE, interval=DEFAULT_POLL_INTERVAL, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=requests.Session(), cache_path=DEFAULT_CACHE_PATH):
+        self.iso639_3_code = iso639_3_code
+        self.interval = interval
+        self.schema_version = schema_version
+        self.base_url = base_url
+        self.session = session
+        self.cache_path = cache_path
+        self.catalog_version = None
+        self.error = None
+        self.__subscribers = []
+        self.__lock = threading.Lock()
+        self.__stopped = threading.Event()
+        self.__thread = None
+
+    def subscribe(self, callback):
+        with self.__lock:
+            self.__subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.__lock:
+            self.__subscribers.remove(callback)
+
+    def poll(self):
+        catalog_version = current_catalog_version(iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, base_url=self.base_url, session=self.session, cache_path=self.cache_path)
+        with self.__lock:
+            previous_version = self.catalog_version
+            if not catalog_version or catalog_version == previous_version:
+                return previous_version
+            self.catalog_version = catalog_version
+            subscribers = list(self.__subscribers)
+
+        for callback in subscribers:
+            callback(previous_version, catalog_version)
+        return catalog_version
+
+    def catalog(self, **kwargs):
+        catalog_version = self.catalog_version or self.poll()
+        if not catalog_version:
+            return None
+
+        return CatalogDB(iso639_3_code=self.iso639_3_code, catalog_version=catalog_version, schema_version=self.schema_version, base_url=self.base_url, session=self.session, cache_path=self.cache_path, **kwargs)
+
+    def start(self):
+        if self.__thread is None:
+            self.__stopped.clear()
+            self.__thread = threading.Thread(target=self.__run, name='CatalogWatcher-' + self.iso639_3_code)
+            self.__thread.daemon = True
+            self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__stopped.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __run(self):
+        while not self.__stopped.is_set():
+            try:
+                self.poll()
+                self.error = None
+            except Exception as e:
+                self.error = e
+            self.__stopped.wait(self.interval)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
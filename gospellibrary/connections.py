@@ -0,0 +1,168 @@
+import os
+import sqlite3
+import threading
+import weakref
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
+from gospellibrary import instrumentation
+from gospellibrary.fetch import FileLock
+
+DEFAULT_CACHED_STATEMENTS = 64
+DEFAULT_BATCH_SIZE = 500
+
+
+def connect_read_only(path, cached_statements=DEFAULT_CACHED_STATEMENTS):
+    uri = 'file:{}?mode=ro&immutable=1'.format(quote(os.path.abspath(path)))
+    try:
+        return sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=cached_statements)
+    except TypeError:
+        return connect_query_only(path, cached_statements=cached_statements)
+
+
+def connect_query_only(path, cached_statements=DEFAULT_CACHED_STATEMENTS):
+    db = sqlite3.connect(path, check_same_thread=False, cached_statements=cached_statements)
+    db.execute('''PRAGMA query_only=1''')
+    return db
+
+
+def open_cached(path, fetch, cache_manager=None):
+    hit = os.path.isfile(path)
+    for _ in range(2):
+        if not fetch():
+            return None
+
+        lock = FileLock(path, shared=True)
+        lock.acquire()
+        if os.path.isfile(path):
+            break
+        lock.release()
+        hit = False
+    else:
+        return None
+
+    if cache_manager is not None:
+        cache_manager.record_access(path, hit)
+        if not hit:
+            cache_manager.evict()
+
+    return ConnectionPool(path, lock=lock)
+
+
+class ThreadConnection:
+    __slots__ = ('db', 'generation', '__weakref__')
+
+    def __init__(self, db, generation):
+        self.db = db
+        self.generation = generation
+
+
+class ConnectionPool:
+    def __init__(self, path, cached_statements=DEFAULT_CACHED_STATEMENTS, lock=None):
+        self.path = path
+        self.cached_statements = cached_statements
+        self.lock = lock
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        self.__connections = {}
+        self.__generation = 0
+
+    def connection(self):
+        holder = getattr(self.__local, 'holder', None)
+        if holder is None or holder.generation != self.__generation:
+            with instrumentation.span('connect', path=self.path):
+                db = connect_read_only(self.path, cached_statements=self.cached_statements)
+            connections, lock = self.__connections, self.__lock
+
+            def release(ref):
+                with lock:
+                    db = connections.pop(ref, None)
+                if db is not None:
+                    db.close()
+
+            with self.__lock:
+                holder = ThreadConnection(db, self.__generation)
+                connections[weakref.ref(holder, release)] = db
+            self.__local.holder = holder
+        return holder.db
+
+    def cursor(self, row_factory=None):
+        c = self.connection().cursor()
+        if row_factory is not None:
+            c.row_factory = row_factory
+        return c
+
+    def fetchone(self, sql, parameters=(), row_factory=None):
+        if instrumentation.enabled():
+            rows = self.__instrumented(sql, parameters, row_factory, True)
+            return rows[0] if rows else None
+
+        c = self.cursor(row_factory)
+        try:
+            c.execute(sql, parameters)
+            return c.fetchone()
+        finally:
+            c.close()
+
+    def fetchall(self, sql, parameters=(), row_factory=None):
+        if instrumentation.enabled():
+            return self.__instrumented(sql, parameters, row_factory, False)
+
+        c = self.cursor(row_factory)
+        try:
+            c.execute(sql, parameters)
+            return c.fetchall()
+        finally:
+            c.close()
+
+    def iterate(self, sql, parameters=(), row_factory=None, batch_size=DEFAULT_BATCH_SIZE):
+        c = self.cursor(row_factory)
+        try:
+            with instrumentation.span('query', sql=sql):
+                c.execute(sql, parameters)
+            while True:
+                rows = c.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+        finally:
+            c.close()
+
+    def __instrumented(self, sql, parameters, row_factory, one):
+        c = self.cursor()
+        try:
+            with instrumentation.span('query', sql=sql) as span:
+                c.execute(sql, parameters)
+                if one:
+                    row = c.fetchone()
+                    rows = [row] if row is not None else []
+                else:
+                    rows = c.fetchall()
+                span.set(rows=len(rows))
+
+            if row_factory is None:
+                return rows
+            with instrumentation.span('row_build', sql=sql, rows=len(rows)):
+                return [row_factory(c, row) for row in rows]
+        finally:
+            c.close()
+
+    def close(self):
+        with self.__lock:
+            connections = list(self.__connections.values())
+            self.__connections.clear()
+            self.__generation += 1
+        for db in connections:
+            db.close()
+        if self.lock is not None:
+            self.lock.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,99 @@
+import io
+import json
+import os
+
+import requests
+
+from gospellibrary.catalogs import CatalogDB, DEFAULT_BASE_URL, DEFAULT_CACHE_PATH, DEFAULT_ISO639_3_CODE, DEFAULT_SCHEMA_VERSION, DEFAULT_TTL
+from gospellibrary.fetch import STORAGE_DECOMPRESSED, makedirs
+from gospellibrary.item_packages import DEFAULT_BATCH_SIZE, ItemPackage
+
+FORMAT_NDJSON = 'ndjson'
+FORMAT_PARQUET = 'parquet'
+
+ITEM_COLUMNS = (('id', 'int64'), ('external_id', 'string'), ('language_id', 'int64'), ('item_category_id', 'int64'), ('uri', 'string'), ('title', 'string'), ('version', 'int64'))
+SUBITEM_COLUMNS = (('item_id', 'int64'), ('id', 'int64'), ('uri', 'string'), ('position', 'int64'), ('title', 'string'), ('title_html', 'string'), ('doc_id', 'string'), ('doc_version', 'int64'))
+PARAGRAPH_COLUMNS = (('item_id', 'int64'), ('subitem_id', 'int64'), ('subitem_uri', 'string'), ('paragraph_id', 'string'), ('verse_number', 'string'), ('html', 'string'))
+
+
+class NDJSONWriter:
+    def __init__(self, path):
+        self.f = io.open(path, 'w', encoding='utf-8')
+
+    def write(self, row):
+        self.f.write(json.dumps(row, ensure_ascii=False, sort_keys=True) + u'\n')
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetWriter:
+    def __init__(self, path, columns, batch_size=DEFAULT_BATCH_SIZE):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.columns = [name for (name, _) in columns]
+        self.schema = pyarrow.schema([(name, getattr(pyarrow, type_name)()) for (name, type_name) in columns])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        self.batch_size = batch_size
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            arrays = [self.pyarrow.array([row.get(name) for row in self.rows], type=self.schema.field(name).type) for name in self.columns]
+            self.writer.write_table(self.pyarrow.Table.from_arrays(arrays, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def open_writer(path, name, columns, format, batch_size):
+    if format == FORMAT_PARQUET:
+        return ParquetWriter(os.path.join(path, name + '.parquet'), columns, batch_size=batch_size)
+    if format == FORMAT_NDJSON:
+        return NDJSONWriter(os.path.join(path, name + '.ndjson'))
+    raise ValueError('Unsupported export format: {}'.format(format))
+
+
+def export_language(path, iso639_3_code=DEFAULT_ISO639_3_CODE, format=FORMAT_NDJSON, item_filter=None, catalog_version=None, batch_size=DEFAULT_BATCH_SIZE, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=requests.Session(), cache_path=DEFAULT_CACHE_PATH, cache_manager=None, storage=STORAGE_DECOMPRESSED, ttl=DEFAULT_TTL):
+    makedirs(path)
+    stats = dict(items=0, missing=0, subitems=0, paragraphs=0)
+    writers = []
+    try:
+        for (name, columns) in (('items', ITEM_COLUMNS), ('subitems', SUBITEM_COLUMNS), ('paragraphs', PARAGRAPH_COLUMNS)):
+            writers.append(open_writer(path, name, columns, format, batch_size))
+        (items_writer, subitems_writer, paragraphs_writer) = writers
+
+        with CatalogDB(iso639_3_code=iso639_3_code, catalog_version=catalog_version, schema_version=schema_version, base_url=base_url, session=session, cache_path=cache_path, ttl=ttl) as catalog:
+            seen = set()
+            for item in catalog.iter_items(batch_size=batch_size):
+                if item['id'] in seen or (item_filter is not None and not item_filter(item)):
+                    continue
+                seen.add(item['id'])
+
+                with ItemPackage(item_id=item['id'], item_version=item['version'], iso639_3_code=iso639_3_code, schema_version=schema_version, base_url=base_url, session=session, cache_path=cache_path, cache_manager=cache_manager, storage=storage) as item_package:
+                    if not item_package.exists():
+                        stats['missing'] += 1
+                        continue
+
+                    items_writer.write(dict(item))
+                    stats['items'] += 1
+                    for subitem in item_package.iter_subitems(batch_size=batch_size):
+                        subitems_writer.write(dict(subitem, item_id=item['id']))
+                        stats['subitems'] += 1
+                    for paragraph in item_package.iter_paragraphs(batch_size=batch_size):
+                        paragraphs_writer.write(dict(paragraph, item_id=item['id']))
+                        stats['paragraphs'] += 1
+    finally:
+        for writer in writers:
+            writer.close()
+
+    return stats
@@ -0,0 +1,210 @@
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import lzma
+except ImportError:
+    from backports import lzma
+
+from gospellibrary import instrumentation
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+STORAGE_DECOMPRESSED = 'decompressed'
+STORAGE_COMPRESSED = 'compressed'
+
+
+def working_cache_path(cache_path):
+    return os.path.join(cache_path, 'working')
+
+
+def makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+
+
+class FileLock:
+    def __init__(self, path, shared=False):
+        self.path = path + '.lock'
+        self.shared = shared
+        self.fd = None
+
+    def acquire(self, blocking=True):
+        makedirs(os.path.dirname(self.path))
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, (fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX) | (0 if blocking else fcntl.LOCK_NB))
+            except (IOError, OSError):
+                os.close(fd)
+                if blocking:
+                    raise
+                return False
+        self.fd = fd
+        return True
+
+    def release(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __del__(self):
+        self.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def write_chunks(chunks, path):
+    makedirs(os.path.dirname(path))
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    instrumented = instrumentation.enabled()
+    elapsed = 0.0
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                if chunk:
+                    if instrumented:
+                        start = time.time()
+                        f.write(chunk)
+                        elapsed += time.time() - start
+                        size += len(chunk)
+                    else:
+                        f.write(chunk)
+        os.rename(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    if instrumented:
+        instrumentation.record('write', elapsed, bytes=size, path=path)
+
+
+def decompress_chunk(decompressor, chunk, max_length):
+    if max_length is None:
+        return decompressor.decompress(chunk)
+    return decompressor.decompress(chunk, max_length)
+
+
+def decompress_chunks(chunks, chunk_size=DEFAULT_CHUNK_SIZE):
+    decompressor = lzma.LZMADecompressor()
+    max_length = chunk_size if hasattr(decompressor, 'needs_input') else None
+    instrumented = instrumentation.enabled()
+    elapsed = 0.0
+    size = 0
+    compressed_size = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        compressed_size += len(chunk)
+        while True:
+            start = time.time()
+            try:
+                data = decompress_chunk(decompressor, chunk, max_length)
+            except Exception as e:
+                if instrumented:
+                    instrumentation.record('decompress', elapsed + time.time() - start, error=e, bytes=size, compressed_bytes=compressed_size)
+                raise
+            if instrumented:
+                elapsed += time.time() - start
+                size += len(data)
+            if data:
+                yield data
+            if max_length is None or decompressor.eof or decompressor.needs_input:
+                break
+            chunk = b''
+    if not decompressor.eof:
+        error = lzma.LZMAError('Compressed data ended before the end-of-stream marker was reached')
+        if instrumented:
+            instrumentation.record('decompress', elapsed, error=error, bytes=size, compressed_bytes=compressed_size)
+        raise error
+    if instrumented:
+        instrumentation.record('decompress', elapsed, bytes=size, compressed_bytes=compressed_size)
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            yield chunk
+
+
+def write_xz_chunks(chunks, path, chunk_size=DEFAULT_CHUNK_SIZE):
+    write_chunks(decompress_chunks(chunks, chunk_size=chunk_size), path)
+
+
+def decompress_xz(xz_path, path, chunk_size=DEFAULT_CHUNK_SIZE):
+    write_xz_chunks(read_chunks(xz_path, chunk_size=chunk_size), path, chunk_size=chunk_size)
+    return path
+
+
+def download(session, url, path, chunk_size=DEFAULT_CHUNK_SIZE):
+    with instrumentation.span('fetch', url=url) as span:
+        r = span.time(session.get, url, stream=True)
+        try:
+            span.set(status=r.status_code)
+            if r.status_code >= 500:
+                r.raise_for_status()
+            if r.status_code != 200:
+                return None
+            write_chunks(span.count(r.iter_content(chunk_size=chunk_size), timed=True), path)
+        finally:
+            r.close()
+
+    return path
+
+
+def fetch_xz(session, url, path, chunk_size=DEFAULT_CHUNK_SIZE):
+    if not os.path.isfile(path):
+        with FileLock(path):
+            if not os.path.isfile(path):
+                with instrumentation.span('fetch', url=url) as span:
+                    r = span.time(session.get, url, stream=True)
+                    try:
+                        span.set(status=r.status_code)
+                        if r.status_code == 200:
+                            write_xz_chunks(span.count(r.iter_content(chunk_size=chunk_size), timed=True), path, chunk_size=chunk_size)
+                    finally:
+                        r.close()
+
+    if os.path.isfile(path):
+        return path
+
+    return None
+
+
+def fetch_compressed(session, url, xz_path, path, chunk_size=DEFAULT_CHUNK_SIZE):
+    if not os.path.isfile(xz_path):
+        with FileLock(xz_path):
+            if not os.path.isfile(xz_path):
+                download(session, url, xz_path, chunk_size=chunk_size)
+    if not os.path.isfile(xz_path):
+        return None
+
+    if not os.path.isfile(path):
+        with FileLock(path):
+            if not os.path.isfile(path):
+                try:
+                    decompress_xz(xz_path, path, chunk_size=chunk_size)
+                except lzma.LZMAError:
+                    os.remove(xz_path)
+                    raise
+
+    return path
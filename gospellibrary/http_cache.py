@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from gospellibrary import instrumentation
+from gospellibrary.fetch import write_chunks
+
+DEFAULT_CACHE_PATH = '/tmp/python-gospel-library'
+DEFAULT_TTL = 0
+
+_entries = {}
+_entries_lock = threading.Lock()
+
+
+def metadata_path(url, cache_path=DEFAULT_CACHE_PATH):
+    return os.path.join(cache_path, 'http', hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+
+def load_entry(url, cache_path=DEFAULT_CACHE_PATH):
+    path = metadata_path(url, cache_path=cache_path)
+    with _entries_lock:
+        entry = _entries.get(path)
+    if entry is not None:
+        return entry
+
+    try:
+        with open(path, 'rb') as f:
+            entry = json.loads(f.read().decode('utf-8'))
+    except (IOError, OSError, ValueError):
+        return None
+    if 'content' not in entry:
+        return None
+
+    with _entries_lock:
+        _entries[path] = entry
+    return entry
+
+
+def save_entry(url, entry, cache_path=DEFAULT_CACHE_PATH):
+    path = metadata_path(url, cache_path=cache_path)
+    write_chunks([json.dumps(entry).encode('utf-8')], path)
+    with _entries_lock:
+        _entries[path] = entry
+
+
+def fetch_json(session, url, cache_path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL):
+    if cache_path is None:
+        with instrumentation.span('fetch', url=url) as span:
+            r = session.get(url)
+            span.set(status=r.status_code, bytes=len(r.content))
+        if r.status_code == 200:
+            return r.json()
+        return None
+
+    entry = load_entry(url, cache_path=cache_path)
+    now = time.time()
+    if entry is not None and now - entry['fetched_at'] < ttl:
+        return json.loads(entry['content'])
+
+    headers = {}
+    if entry is not None:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    with instrumentation.span('fetch', url=url) as span:
+        r = session.get(url, headers=headers)
+        span.set(status=r.status_code, bytes=len(r.content))
+    if r.status_code == 304 and entry is not None:
+        entry = dict(entry, fetched_at=now)
+    elif r.status_code == 200:
+        entry = dict(
+            url=url,
+            etag=r.headers.get('ETag'),
+            last_modified=r.headers.get('Last-Modified'),
+            fetched_at=now,
+            content=r.content.decode('utf-8'),
+        )
+    else:
+        return None
+
+    save_entry(url, entry, cache_path=cache_path)
+    return json.loads(entry['content'])
@@ -0,0 +1,157 @@
+from collections import namedtuple
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+Event = namedtuple('Event', ['name', 'elapsed', 'attributes', 'error'])
+
+_observers = []
+_observers_lock = threading.Lock()
+
+
+def add_observer(observer):
+    global _observers
+    with _observers_lock:
+        _observers = _observers + [observer]
+    return observer
+
+
+def remove_observer(observer):
+    global _observers
+    with _observers_lock:
+        _observers = [o for o in _observers if o is not observer]
+
+
+def enabled():
+    return bool(_observers)
+
+
+def record(name, elapsed, error=None, **attributes):
+    event = Event(name, elapsed, attributes, error)
+    for observer in _observers:
+        observer(event)
+
+
+class Span:
+    __slots__ = ('name', 'attributes', 'start', 'elapsed')
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.start = None
+        self.elapsed = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def time(self, fn, *args, **kwargs):
+        start = time.time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.elapsed = (self.elapsed or 0.0) + time.time() - start
+
+    def count(self, chunks, key='bytes', timed=False):
+        self.attributes.setdefault(key, 0)
+        chunks = iter(chunks)
+        while True:
+            chunk = self.time(next, chunks, None) if timed else next(chunks, None)
+            if chunk is None:
+                return
+            self.attributes[key] += len(chunk)
+            yield chunk
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = self.elapsed if self.elapsed is not None else time.time() - self.start
+        record(self.name, elapsed, error=exc_value, **self.attributes)
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def time(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    def count(self, chunks, key='bytes', timed=False):
+        return chunks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+def span(name, **attributes):
+    if not _observers:
+        return NULL_SPAN
+    return Span(name, attributes)
+
+
+class PrometheusObserver:
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='gospellibrary'):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self.__metrics = {}
+        self.__lock = threading.Lock()
+
+    def __call__(self, event):
+        with self.__lock:
+            metrics = self.__metrics.get(event.name)
+            if metrics is None:
+                metrics = self.__metrics[event.name] = dict(count=0, errors=0, bytes=0, rows=0, sum=0.0, buckets=[0] * len(self.buckets))
+            metrics['count'] += 1
+            metrics['sum'] += event.elapsed
+            if event.error is not None:
+                metrics['errors'] += 1
+            metrics['bytes'] += event.attributes.get('bytes') or 0
+            metrics['rows'] += event.attributes.get('rows') or 0
+            for i, bound in enumerate(self.buckets):
+                if event.elapsed <= bound:
+                    metrics['buckets'][i] += 1
+
+    def reset(self):
+        with self.__lock:
+            self.__metrics = {}
+
+    def snapshot(self):
+        with self.__lock:
+            return dict((name, dict(metrics, buckets=list(metrics['buckets']))) for name, metrics in self.__metrics.items())
+
+    def exposition(self):
+        metrics = sorted(self.snapshot().items())
+        lines = []
+
+        def counter(suffix, key, help_text):
+            lines.append('# HELP {}_{} {}'.format(self.prefix, suffix, help_text))
+            lines.append('# TYPE {}_{} counter'.format(self.prefix, suffix))
+            for name, values in metrics:
+                lines.append('{}_{}{{event="{}"}} {}'.format(self.prefix, suffix, name, values[key]))
+
+        counter('events_total', 'count', 'Number of instrumented operations.')
+        counter('event_errors_total', 'errors', 'Number of instrumented operations that raised.')
+        counter('event_bytes_total', 'bytes', 'Bytes transferred, decompressed or written.')
+        counter('event_rows_total', 'rows', 'Rows returned by queries or built by row factories.')
+
+        histogram = '{}_event_duration_seconds'.format(self.prefix)
+        lines.append('# HELP {} Duration of instrumented operations.'.format(histogram))
+        lines.append('# TYPE {} histogram'.format(histogram))
+        for name, values in metrics:
+            for bound, count in zip(self.buckets, values['buckets']):
+                lines.append('{}_bucket{{event="{}",le="{}"}} {}'.format(histogram, name, repr(float(bound)), count))
+            lines.append('{}_bucket{{event="{}",le="+Inf"}} {}'.format(histogram, name, values['count']))
+            lines.append('{}_sum{{event="{}"}} {}'.format(histogram, name, repr(values['sum'])))
+            lines.append('{}_count{{event="{}"}} {}'.format(histogram, name, values['count']))
+
+        return '\n'.join(lines) + '\n'
@@ -1,26 +1,51 @@
-from io import BytesIO
+from collections import OrderedDict
+import json
 import requests
 import os
-import sqlite3
+import threading
 
 try:
     from urllib.parse import urljoin
 except ImportError:
     from urlparse import urljoin
 
-try:
-    import lzma
-except ImportError:
-    from backports import lzma
+from gospellibrary.caching import cached
+from gospellibrary.connections import ConnectionPool, open_cached
+from gospellibrary.fetch import STORAGE_COMPRESSED, STORAGE_DECOMPRESSED, fetch_compressed, fetch_xz, working_cache_path
+from gospellibrary.text import build_text_index
 
 DEFAULT_ISO639_3_CODE = 'eng'
 DEFAULT_SCHEMA_VERSION = 'v4'
 DEFAULT_BASE_URL = 'https://edge.ldscdn.org/mobile/GospelStudy/production/'
 DEFAULT_CACHE_PATH = '/tmp/python-gospel-library'
+DEFAULT_BATCH_SIZE = 500
+
+
+def item_package_path(item_id, item_version, iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, cache_path=DEFAULT_CACHE_PATH):
+    return os.path.join(cache_path, schema_version, 'languages', iso639_3_code, 'item_packages', str(item_id), str(item_version), 'Package.sqlite')
+
+
+def item_package_url(item_id, item_version, iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL):
+    return urljoin(base_url, '{schema_version}/languages/{iso639_3_code}/item-packages/{item_id}/{item_version}.xz'.format(schema_version=schema_version, iso639_3_code=iso639_3_code, item_id=item_id, item_version=item_version))
+
+
+def cached_item_packages(iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, cache_path=DEFAULT_CACHE_PATH):
+    item_packages_path = os.path.join(cache_path, schema_version, 'languages', iso639_3_code, 'item_packages')
+    if not os.path.isdir(item_packages_path):
+        return
+
+    for item_id in sorted(os.listdir(item_packages_path)):
+        item_path = os.path.join(item_packages_path, item_id)
+        if not os.path.isdir(item_path):
+            continue
+        for item_version in sorted((name for name in os.listdir(item_path) if name.isdigit()), key=int):
+            path = os.path.join(item_path, item_version, 'Package.sqlite')
+            if os.path.isfile(path):
+                yield (item_id, int(item_version), path)
 
 
 class ItemPackage:
-    def __init__(self, item_id, item_version, iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=requests.Session(), cache_path=DEFAULT_CACHE_PATH):
+    def __init__(self, item_id, item_version, iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=requests.Session(), cache_path=DEFAULT_CACHE_PATH, cache=None, cache_manager=None, storage=STORAGE_DECOMPRESSED):
         self.item_id = item_id
         self.item_version = item_version
         self.iso639_3_code = iso639_3_code
@@ -28,29 +53,66 @@ class ItemPackage:
         self.base_url = base_url
         self.session = session
         self.cache_path = cache_path
+        self.cache = cache
+        self.cache_manager = cache_manager
+        self.storage = storage
+        self.cache_namespace = ('item_package', self.schema_version, self.iso639_3_code, str(self.item_id))
+        self.cache_version = self.item_version
+        if cache is not None:
+            cache.set_version(self.cache_namespace, self.cache_version)
+        self.__connections = None
+        self.__connections_lock = threading.Lock()
+        self.__text_connections = None
 
     def exists(self):
-        return self.__fetch_item_package() is not None
+        return self.__db() is not None
+
+    def close(self):
+        with self.__connections_lock:
+            connections, self.__connections = self.__connections, None
+            text_connections, self.__text_connections = self.__text_connections, None
+        if text_connections is not None:
+            text_connections.close()
+        if connections is not None:
+            connections.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __db(self):
+        if self.__connections is None:
+            with self.__connections_lock:
+                if self.__connections is None:
+                    self.__connections = open_cached(self.__path(), self.__fetch_item_package, cache_manager=self.cache_manager)
+        return self.__connections
+
+    def __text_db(self):
+        if self.__text_connections is None:
+            db = self.__db()
+            if not db:
+                return None
+            with self.__connections_lock:
+                if self.__text_connections is None:
+                    self.__text_connections = ConnectionPool(build_text_index(db.path))
+        return self.__text_connections
+
+    def __path(self):
+        cache_path = working_cache_path(self.cache_path) if self.storage == STORAGE_COMPRESSED else self.cache_path
+        return item_package_path(self.item_id, self.item_version, iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, cache_path=cache_path)
 
     def __fetch_item_package(self):
-        item_package_path = os.path.join(self.cache_path, self.schema_version, 'languages', self.iso639_3_code, 'item_packages', self.item_id, str(self.item_version), 'Package.sqlite')
-        if not os.path.isfile(item_package_path):
-            item_package_xz_url = urljoin(self.base_url, '{schema_version}/languages/{iso639_3_code}/item-packages/{item_id}/{item_version}.xz'.format(schema_version=self.schema_version, iso639_3_code=self.iso639_3_code, item_id=self.item_id, item_version=self.item_version))
-            r = self.session.get(item_package_xz_url)
-            if r.status_code == 200:
-                try:
-                    os.makedirs(os.path.dirname(item_package_path))
-                except OSError:
-                    pass
-
-                with lzma.open(BytesIO(r.content)) as item_package_xz_url:
-                    with open(item_package_path, 'wb') as f:
-                        f.write(item_package_xz_url.read())
+        path = self.__path()
+        if not os.path.isfile(path):
+            url = item_package_url(self.item_id, self.item_version, iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, base_url=self.base_url)
+            if self.storage == STORAGE_COMPRESSED:
+                xz_path = item_package_path(self.item_id, self.item_version, iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, cache_path=self.cache_path) + '.xz'
+                return fetch_compressed(self.session, url, xz_path, path)
+            return fetch_xz(self.session, url, path)
 
-        if os.path.isfile(item_package_path):
-            return item_package_path
-
-        return None
+        return path
 
     def dict_factory(self, cursor, row):
         obj = {}
@@ -61,121 +123,153 @@ class ItemPackage:
                 obj[name] = value
         return obj
 
+    @cached
     def file_id(self):
-        item_package_path = self.__fetch_item_package()
-        if not item_package_path:
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(item_package_path) as db:
-            c = db.cursor()
-            try:
-                c.execute('''SELECT value FROM metadata WHERE key='file_id' LIMIT 1''')
-                row = c.fetchone()
-                return row[0] if row else None
-            finally:
-                c.close()
+        row = db.fetchone('''SELECT value FROM metadata WHERE key='file_id' LIMIT 1''')
+        return row[0] if row else None
 
+    @cached
     def html(self, subitem_uri=None, paragraph_id=None):
-        item_package_path = self.__fetch_item_package()
-        if not item_package_path:
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(item_package_path) as db:
-            original_text_factory = db.text_factory
-            db.text_factory = bytes
-            c = db.cursor()
-            try:
-                if paragraph_id:
-                    c.execute('''SELECT content_html, start_index, end_index FROM paragraph_metadata
-                                     INNER JOIN subitem_content ON paragraph_metadata.subitem_id=subitem_content.subitem_id
-                                     INNER JOIN subitem ON subitem_content.subitem_id=subitem.id
-                                 WHERE uri=? AND paragraph_id=?''', [subitem_uri, paragraph_id])
-                    (html, start_index, end_index) = c.fetchone()
-
-                    return html[start_index:end_index].decode('utf-8')
-                else:
-                    c.execute('''SELECT content_html FROM subitem_content
-                                     INNER JOIN subitem ON subitem_content.subitem_id=subitem.id
-                                 WHERE uri=?''', [subitem_uri])
-                    (html,) = c.fetchone()
-
-                    return html[:].decode('utf-8')
-            finally:
-                c.close()
-                db.text_factory = original_text_factory
+        if paragraph_id:
+            (html, start_index, end_index) = db.fetchone('''SELECT CAST(content_html AS BLOB), start_index, end_index FROM paragraph_metadata
+                                                              INNER JOIN subitem_content ON paragraph_metadata.subitem_id=subitem_content.subitem_id
+                                                              INNER JOIN subitem ON subitem_content.subitem_id=subitem.id
+                                                          WHERE uri=? AND paragraph_id=?''', [subitem_uri, paragraph_id])
 
-    def subitems(self):
-        item_package_path = self.__fetch_item_package()
-        if not item_package_path:
+            return html[start_index:end_index].decode('utf-8')
+        else:
+            (html,) = db.fetchone('''SELECT CAST(content_html AS BLOB) FROM subitem_content
+                                      INNER JOIN subitem ON subitem_content.subitem_id=subitem.id
+                                  WHERE uri=?''', [subitem_uri])
+
+            return html[:].decode('utf-8')
+
+    def paragraphs(self, subitem_uri, paragraph_ids=None):
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(item_package_path) as db:
-            db.row_factory = self.dict_factory
-            c = db.cursor()
-            try:
-                c.execute('''SELECT * FROM subitem ORDER BY position''')
-                return c.fetchall()
-            finally:
-                c.close()
+        row = db.fetchone('''SELECT subitem.id, CAST(content_html AS BLOB) FROM subitem_content
+                                 INNER JOIN subitem ON subitem_content.subitem_id=subitem.id
+                             WHERE uri=?''', [subitem_uri])
+        if not row:
+            return None
 
+        (subitem_id, html) = row
+        html = memoryview(html)
+        rows = db.fetchall('''SELECT paragraph_id, start_index, end_index FROM paragraph_metadata WHERE subitem_id=? ORDER BY start_index''', [subitem_id])
+        if paragraph_ids is not None:
+            rows = select_paragraphs(rows, paragraph_ids)
+
+        return OrderedDict((paragraph_id, html[start_index:end_index]) for (paragraph_id, start_index, end_index) in rows)
+
+    @cached
+    def subitems(self):
+        db = self.__db()
+        if not db:
+            return None
+
+        return db.fetchall('''SELECT * FROM subitem ORDER BY position''', row_factory=self.dict_factory)
+
+    def iter_subitems(self, batch_size=DEFAULT_BATCH_SIZE):
+        db = self.__db()
+        if not db:
+            return
+
+        for row in db.iterate('''SELECT * FROM subitem ORDER BY position''', row_factory=self.dict_factory, batch_size=batch_size):
+            yield row
+
+    def iter_paragraphs(self, subitem_uri=None, batch_size=DEFAULT_BATCH_SIZE):
+        db = self.__db()
+        if not db:
+            return
+
+        if subitem_uri is not None:
+            subitems = db.iterate('''SELECT id, uri FROM subitem WHERE uri=?''', [subitem_uri], batch_size=batch_size)
+        else:
+            subitems = db.iterate('''SELECT id, uri FROM subitem ORDER BY position''', batch_size=batch_size)
+        for (subitem_id, uri) in subitems:
+            row = db.fetchone('''SELECT CAST(content_html AS BLOB) FROM subitem_content WHERE subitem_id=?''', [subitem_id])
+            if not row:
+                continue
+            html = memoryview(row[0])
+            for (paragraph_id, verse_number, start_index, end_index) in db.iterate('''SELECT paragraph_id, verse_number, start_index, end_index FROM paragraph_metadata WHERE subitem_id=? ORDER BY start_index''', [subitem_id], batch_size=batch_size):
+                yield dict(subitem_id=subitem_id, subitem_uri=uri, paragraph_id=paragraph_id, verse_number=verse_number, html=html[start_index:end_index].tobytes().decode('utf-8'))
+
+    @cached
     def subitem(self, uri):
-        item_package_path = self.__fetch_item_package()
-        if not item_package_path:
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(item_package_path) as db:
-            db.row_factory = self.dict_factory
-            c = db.cursor()
-            try:
-                c.execute('''SELECT * FROM subitem WHERE uri=?''', [uri])
-                return c.fetchone()
-            finally:
-                c.close()
+        return db.fetchone('''SELECT * FROM subitem WHERE uri=?''', [uri], row_factory=self.dict_factory)
 
+    @cached
     def subitem_html(self, subitem_id):
-        item_package_path = self.__fetch_item_package()
-        if not item_package_path:
+        db = self.__db()
+        if not db:
+            return None
+
+        row = db.fetchone('''SELECT content_html FROM subitem_content WHERE subitem_id=? LIMIT 1''', [subitem_id])
+        return row[0]
+
+    def text_dict_factory(self, cursor, row):
+        (paragraph_id, start_index, end_index, verse_number, text, markers) = row
+        return dict(paragraph_id=paragraph_id, start_index=start_index, end_index=end_index, verse_number=verse_number, text=text, markers=json.loads(markers))
+
+    @cached
+    def text(self, subitem_uri, paragraph_id):
+        db = self.__text_db()
+        if not db:
+            return None
+
+        row = db.fetchone('''SELECT text FROM paragraph WHERE subitem_uri=? AND paragraph_id=?''', [subitem_uri, paragraph_id])
+        return row[0] if row else None
+
+    @cached
+    def paragraph_text(self, subitem_uri, paragraph_id):
+        db = self.__text_db()
+        if not db:
+            return None
+
+        return db.fetchone('''SELECT paragraph_id, start_index, end_index, verse_number, text, markers FROM paragraph WHERE subitem_uri=? AND paragraph_id=?''', [subitem_uri, paragraph_id], row_factory=self.text_dict_factory)
+
+    def paragraph_texts(self, subitem_uri, paragraph_ids=None):
+        db = self.__text_db()
+        if not db:
             return None
 
-        with sqlite3.connect(item_package_path) as db:
-            c = db.cursor()
-            try:
-                c.execute('''SELECT content_html FROM subitem_content WHERE subitem_id=? LIMIT 1''', [subitem_id])
-                row = c.fetchone()
-                return row[0]
-            finally:
-                c.close()
+        rows = db.fetchall('''SELECT paragraph_id, start_index, end_index, verse_number, text, markers FROM paragraph WHERE subitem_uri=? ORDER BY position''', [subitem_uri])
+        if paragraph_ids is not None:
+            rows = select_paragraphs(rows, paragraph_ids)
+        return OrderedDict((row[0], self.text_dict_factory(None, row)) for row in rows)
 
     def path(self):
         return os.path.dirname(self.__fetch_item_package())
 
+    @cached
     def related_audio_items(self, subitem_id):
-        item_package_path = self.__fetch_item_package()
-        if not item_package_path:
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(item_package_path) as db:
-            db.row_factory = self.dict_factory
-            c = db.cursor()
-            try:
-                c.execute('''SELECT * FROM related_audio_item WHERE subitem_id=?''', [subitem_id])
-                return c.fetchall()
-            finally:
-                c.close()
+        return db.fetchall('''SELECT * FROM related_audio_item WHERE subitem_id=?''', [subitem_id], row_factory=self.dict_factory)
 
+    @cached
     def related_video_items(self, subitem_id):
-        item_package_path = self.__fetch_item_package()
-        if not item_package_path:
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(item_package_path) as db:
-            db.row_factory = self.dict_factory
-            c = db.cursor()
-            try:
-                c.execute('''SELECT * FROM related_video_item WHERE subitem_id=?''', [subitem_id])
-                return c.fetchall()
-            finally:
-                c.close()
+        return db.fetchall('''SELECT * FROM related_video_item WHERE subitem_id=?''', [subitem_id], row_factory=self.dict_factory)
 
     def table_exists(self, db, table_name):
         c = db.cursor()
@@ -187,16 +281,41 @@ class ItemPackage:
 
         return False
 
+    @cached
+    def media_items(self):
+        db = self.__db()
+        if not db:
+            return None
+
+        media_items = []
+        for (kind, table_name) in (('audio', 'related_audio_item'), ('video', 'related_video_item')):
+            if self.table_exists(db.connection(), table_name):
+                for row in db.fetchall('''SELECT subitem.uri AS subitem_uri, {0}.* FROM {0} INNER JOIN subitem ON {0}.subitem_id=subitem.id ORDER BY subitem.position, {0}.id'''.format(table_name), row_factory=self.dict_factory):
+                    row['kind'] = kind
+                    media_items.append(row)
+        return media_items
+
+    @cached
     def related_content_items(self, subitem_id):
-        item_package_path = self.__fetch_item_package()
-        if not item_package_path:
+        db = self.__db()
+        if not db:
             return None
 
-        with sqlite3.connect(item_package_path) as db:
-            db.row_factory = self.dict_factory
-            c = db.cursor()
-            try:
-                c.execute('''SELECT * FROM related_content_item WHERE subitem_id=?''', [subitem_id])
-                return c.fetchall()
-            finally:
-                c.close()
+        return db.fetchall('''SELECT * FROM related_content_item WHERE subitem_id=?''', [subitem_id], row_factory=self.dict_factory)
+
+
+def select_paragraphs(rows, paragraph_ids):
+    if isinstance(paragraph_ids, str):
+        paragraph_ids = [paragraph_ids]
+
+    positions = dict((row[0], i) for i, row in enumerate(rows))
+    selected = set()
+    for paragraph_id in paragraph_ids:
+        if paragraph_id in positions:
+            selected.add(positions[paragraph_id])
+        elif '-' in paragraph_id:
+            first, last = paragraph_id.split('-', 1)
+            if first in positions and last in positions:
+                selected.update(range(positions[first], positions[last] + 1))
+
+    return [row for i, row in enumerate(rows) if i in selected]
@@ -0,0 +1,129 @@
+import os
+import re
+import sqlite3
+import threading
+
+from gospellibrary.fetch import makedirs
+from gospellibrary.item_packages import DEFAULT_CACHE_PATH, DEFAULT_ISO639_3_CODE, DEFAULT_SCHEMA_VERSION, ItemPackage, cached_item_packages
+
+LINKS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS indexed_item_package (item_id TEXT PRIMARY KEY, item_version INTEGER);
+CREATE TABLE IF NOT EXISTS uri (id INTEGER PRIMARY KEY, uri TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS link (item_id TEXT, source_uri_id INTEGER, source_paragraph_id TEXT, ref_id TEXT, target_uri_id INTEGER, target_paragraph_id TEXT);
+CREATE INDEX IF NOT EXISTS link_source ON link (source_uri_id, source_paragraph_id);
+CREATE INDEX IF NOT EXISTS link_target ON link (target_uri_id, target_paragraph_id);
+CREATE INDEX IF NOT EXISTS link_item ON link (item_id);
+'''
+
+LINK_COLUMNS = '''source.uri, link.source_paragraph_id, link.ref_id, target.uri, link.target_paragraph_id'''
+
+ANCHOR_RE = re.compile(r'<a\s([^>]*)>')
+HREF_RE = re.compile(r'\bhref="gospellibrary://content(/[^"?#]*)(?:\?[^"#]*)?(?:#([^"]*))?"')
+
+
+def parse_links(html):
+    for anchor in ANCHOR_RE.finditer(html):
+        attributes = anchor.group(1)
+        if 'scripture-ref' not in attributes:
+            continue
+        href = HREF_RE.search(attributes)
+        if href:
+            yield (href.group(1), href.group(2) or None)
+
+
+def links_index_path(iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, cache_path=DEFAULT_CACHE_PATH):
+    return os.path.join(cache_path, schema_version, 'languages', iso639_3_code, 'links', 'Links.sqlite')
+
+
+class LinkIndex:
+    def __init__(self, iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, cache_path=DEFAULT_CACHE_PATH):
+        self.iso639_3_code = iso639_3_code
+        self.schema_version = schema_version
+        self.cache_path = cache_path
+        self.path = links_index_path(iso639_3_code=iso639_3_code, schema_version=schema_version, cache_path=cache_path)
+        self.__db = None
+        self.__lock = threading.Lock()
+
+    def __connection(self):
+        if self.__db is None:
+            makedirs(os.path.dirname(self.path))
+            self.__db = sqlite3.connect(self.path, check_same_thread=False)
+            self.__db.executescript(LINKS_SCHEMA)
+        return self.__db
+
+    def close(self):
+        with self.__lock:
+            if self.__db is not None:
+                self.__db.close()
+                self.__db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def update(self):
+        latest_versions = {}
+        for (item_id, item_version, _) in cached_item_packages(iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, cache_path=self.cache_path):
+            latest_versions[item_id] = item_version
+
+        stats = dict(indexed=0, removed=0, unchanged=0)
+        with self.__lock:
+            db = self.__connection()
+            indexed_versions = dict(db.execute('''SELECT item_id, item_version FROM indexed_item_package'''))
+
+            for item_id in set(indexed_versions) - set(latest_versions):
+                with db:
+                    db.execute('''DELETE FROM link WHERE item_id=?''', [item_id])
+                    db.execute('''DELETE FROM indexed_item_package WHERE item_id=?''', [item_id])
+                stats['removed'] += 1
+
+            uri_ids = dict(db.execute('''SELECT uri, id FROM uri'''))
+
+            def uri_id(uri):
+                if uri not in uri_ids:
+                    uri_ids[uri] = db.execute('''INSERT INTO uri (uri) VALUES (?)''', [uri]).lastrowid
+                return uri_ids[uri]
+
+            for item_id, item_version in sorted(latest_versions.items()):
+                if indexed_versions.get(item_id) == item_version:
+                    stats['unchanged'] += 1
+                    continue
+
+                with db:
+                    db.execute('''DELETE FROM link WHERE item_id=?''', [item_id])
+                    db.executemany('''INSERT INTO link (item_id, source_uri_id, source_paragraph_id, ref_id, target_uri_id, target_paragraph_id) VALUES (?, ?, ?, ?, ?, ?)''', (
+                        (item_id, uri_id(source_uri), source_paragraph_id, ref_id, uri_id(target_uri), target_paragraph_id)
+                        for (source_uri, source_paragraph_id, ref_id, target_uri, target_paragraph_id) in self.__links(item_id, item_version)
+                    ))
+                    db.execute('''INSERT OR REPLACE INTO indexed_item_package (item_id, item_version) VALUES (?, ?)''', [item_id, item_version])
+                stats['indexed'] += 1
+
+        return stats
+
+    def __links(self, item_id, item_version):
+        with ItemPackage(item_id=item_id, item_version=item_version, iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, cache_path=self.cache_path) as item_package:
+            for subitem in item_package.subitems():
+                for related_content_item in item_package.related_content_items(subitem['id']):
+                    for (target_uri, target_paragraph_id) in parse_links(related_content_item['content_html'] or ''):
+                        yield (subitem['uri'], related_content_item['origin_id'], related_content_item['ref_id'], target_uri, target_paragraph_id)
+
+    def __query(self, side, uri, paragraph_id):
+        sql = '''SELECT {} FROM link INNER JOIN uri AS source ON link.source_uri_id=source.id INNER JOIN uri AS target ON link.target_uri_id=target.id WHERE {}.uri=?'''.format(LINK_COLUMNS, side)
+        parameters = [uri]
+        if paragraph_id is not None:
+            sql += ''' AND link.{}_paragraph_id=?'''.format(side)
+            parameters.append(paragraph_id)
+        sql += ''' ORDER BY source.uri, link.rowid'''
+
+        with self.__lock:
+            rows = self.__connection().execute(sql, parameters).fetchall()
+
+        return [dict(source_uri=source_uri, source_paragraph_id=source_paragraph_id, ref_id=ref_id, target_uri=target_uri, target_paragraph_id=target_paragraph_id) for (source_uri, source_paragraph_id, ref_id, target_uri, target_paragraph_id) in rows]
+
+    def citations_of(self, uri, paragraph_id=None):
+        return self.__query('target', uri, paragraph_id)
+
+    def references_from(self, subitem_uri, paragraph_id=None):
+        return self.__query('source', subitem_uri, paragraph_id)
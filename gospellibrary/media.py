@@ -0,0 +1,258 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import os
+import re
+import sqlite3
+import threading
+import time
+
+try:
+    from urllib.parse import urljoin, urlparse
+except ImportError:
+    from urlparse import urljoin, urlparse
+
+from gospellibrary.fetch import DEFAULT_CHUNK_SIZE, FileLock, makedirs
+from gospellibrary.item_packages import DEFAULT_BASE_URL, DEFAULT_CACHE_PATH, DEFAULT_ISO639_3_CODE, DEFAULT_SCHEMA_VERSION, ItemPackage, cached_item_packages
+from gospellibrary.sync import DEFAULT_BACKOFF_FACTOR, DEFAULT_MAX_CONNECTIONS_PER_HOST, DEFAULT_MAX_WORKERS, DEFAULT_RETRIES, pooled_session
+
+MEDIA_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS indexed_item_package (item_id TEXT PRIMARY KEY, item_version INTEGER);
+CREATE TABLE IF NOT EXISTS media (item_id TEXT, subitem_uri TEXT, kind TEXT, url TEXT, video_id TEXT, title TEXT);
+CREATE INDEX IF NOT EXISTS media_item_id ON media (item_id);
+CREATE INDEX IF NOT EXISTS media_subitem_uri ON media (subitem_uri);
+CREATE INDEX IF NOT EXISTS media_url ON media (url);
+'''
+
+CONTENT_RANGE_RE = re.compile(r'^bytes\s+(?:(\d+)-\d+|\*)/(\d+|\*)$')
+
+MediaEvent = namedtuple('MediaEvent', ['url', 'path', 'status', 'bytes', 'elapsed', 'error'])
+
+
+def media_manifest_path(iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, cache_path=DEFAULT_CACHE_PATH):
+    return os.path.join(cache_path, schema_version, 'languages', iso639_3_code, 'media', 'Media.sqlite')
+
+
+def content_range(value):
+    match = CONTENT_RANGE_RE.match((value or '').strip())
+    if not match:
+        return None, None
+    (start, length) = match.groups()
+    return int(start) if start is not None else None, int(length) if length != '*' else None
+
+
+def media_path(url, cache_path=DEFAULT_CACHE_PATH):
+    parsed = urlparse(url)
+    return os.path.join(cache_path, 'media', parsed.netloc.replace(':', '_'), *[part for part in parsed.path.split('/') if part and part not in ('.', '..')])
+
+
+class MediaManifest:
+    def __init__(self, iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, cache_path=DEFAULT_CACHE_PATH):
+        self.iso639_3_code = iso639_3_code
+        self.schema_version = schema_version
+        self.base_url = base_url
+        self.cache_path = cache_path
+        self.path = media_manifest_path(iso639_3_code=iso639_3_code, schema_version=schema_version, cache_path=cache_path)
+        self.__db = None
+        self.__lock = threading.Lock()
+
+    def __connection(self):
+        if self.__db is None:
+            makedirs(os.path.dirname(self.path))
+            self.__db = sqlite3.connect(self.path, check_same_thread=False)
+            self.__db.executescript(MEDIA_SCHEMA)
+        return self.__db
+
+    def close(self):
+        with self.__lock:
+            if self.__db is not None:
+                self.__db.close()
+                self.__db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def update(self):
+        latest_versions = {}
+        for (item_id, item_version, _) in cached_item_packages(iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, cache_path=self.cache_path):
+            latest_versions[item_id] = item_version
+
+        stats = dict(indexed=0, removed=0, unchanged=0)
+        with self.__lock:
+            db = self.__connection()
+            indexed_versions = dict(db.execute('''SELECT item_id, item_version FROM indexed_item_package'''))
+
+            for item_id in set(indexed_versions) - set(latest_versions):
+                with db:
+                    db.execute('''DELETE FROM media WHERE item_id=?''', [item_id])
+                    db.execute('''DELETE FROM indexed_item_package WHERE item_id=?''', [item_id])
+                stats['removed'] += 1
+
+            for item_id, item_version in sorted(latest_versions.items()):
+                if indexed_versions.get(item_id) == item_version:
+                    stats['unchanged'] += 1
+                    continue
+
+                with db:
+                    db.execute('''DELETE FROM media WHERE item_id=?''', [item_id])
+                    db.executemany('''INSERT INTO media (item_id, subitem_uri, kind, url, video_id, title) VALUES (?, ?, ?, ?, ?, ?)''', self.__media(item_id, item_version))
+                    db.execute('''INSERT OR REPLACE INTO indexed_item_package (item_id, item_version) VALUES (?, ?)''', [item_id, item_version])
+                stats['indexed'] += 1
+
+        return stats
+
+    def __media(self, item_id, item_version):
+        with ItemPackage(item_id=item_id, item_version=item_version, iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, cache_path=self.cache_path) as item_package:
+            for media_item in item_package.media_items() or []:
+                if media_item['kind'] == 'audio':
+                    yield (item_id, media_item['subitem_uri'], 'audio', media_item.get('media_url'), None, media_item.get('title'))
+                else:
+                    yield (item_id, media_item['subitem_uri'], 'video', media_item.get('poster_url'), media_item.get('video_id'), media_item.get('title'))
+
+    def media(self, item_id=None, kind=None, uri_prefix=None):
+        sql = '''SELECT item_id, subitem_uri, kind, url, video_id, title FROM media WHERE 1'''
+        parameters = []
+        if item_id is not None:
+            sql += ''' AND item_id=?'''
+            parameters.append(str(item_id))
+        if kind is not None:
+            sql += ''' AND kind=?'''
+            parameters.append(kind)
+        if uri_prefix:
+            sql += ''' AND substr(subitem_uri, 1, ?)=?'''
+            parameters += [len(uri_prefix), uri_prefix]
+        sql += ''' ORDER BY rowid'''
+
+        with self.__lock:
+            rows = self.__connection().execute(sql, parameters).fetchall()
+
+        return [dict(item_id=item_id, subitem_uri=subitem_uri, kind=kind, url=urljoin(self.base_url, url) if url else None, video_id=video_id, title=title) for (item_id, subitem_uri, kind, url, video_id, title) in rows]
+
+    def urls(self, item_id=None, kind=None, uri_prefix=None):
+        urls = []
+        seen = set()
+        for media_item in self.media(item_id=item_id, kind=kind, uri_prefix=uri_prefix):
+            if media_item['url'] and media_item['url'] not in seen:
+                seen.add(media_item['url'])
+                urls.append(media_item['url'])
+        return urls
+
+
+class RateLimiter:
+    def __init__(self, bytes_per_second):
+        self.bytes_per_second = float(bytes_per_second)
+        self.__next = time.time()
+        self.__lock = threading.Lock()
+
+    def consume(self, size):
+        with self.__lock:
+            now = time.time()
+            start = max(now, self.__next)
+            self.__next = start + size / self.bytes_per_second
+        if start > now:
+            time.sleep(start - now)
+
+
+class MediaResult:
+    def __init__(self):
+        self.downloaded = 0
+        self.resumed = 0
+        self.skipped = 0
+        self.missing = 0
+        self.failed = 0
+        self.bytes_downloaded = 0
+        self.elapsed = 0.0
+        self.errors = {}
+        self.__lock = threading.Lock()
+
+    def add(self, event):
+        with self.__lock:
+            setattr(self, event.status, getattr(self, event.status) + 1)
+            self.bytes_downloaded += event.bytes
+            if event.error is not None:
+                self.errors[event.url] = event.error
+
+    def __repr__(self):
+        return 'MediaResult(downloaded={}, resumed={}, skipped={}, missing={}, failed={}, bytes_downloaded={}, elapsed={:.3f})'.format(self.downloaded, self.resumed, self.skipped, self.missing, self.failed, self.bytes_downloaded, self.elapsed)
+
+
+def download_media(urls, cache_path=DEFAULT_CACHE_PATH, max_workers=DEFAULT_MAX_WORKERS, bandwidth_limit=None, session=None, max_connections_per_host=DEFAULT_MAX_CONNECTIONS_PER_HOST, retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    session = session if session is not None else pooled_session(max_connections_per_host=max_connections_per_host)
+    limiter = RateLimiter(bandwidth_limit) if bandwidth_limit else None
+    result = MediaResult()
+    start = time.time()
+
+    def report(event):
+        result.add(event)
+        if progress is not None:
+            progress(event)
+
+    def download(url, path):
+        part_path = path + '.part'
+        offset = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+        resumed = offset > 0
+        size = 0
+        headers = dict(Range='bytes={}-'.format(offset)) if offset else {}
+        r = session.get(url, headers=headers, stream=True)
+        try:
+            if offset and r.status_code in (206, 416):
+                (start, length) = content_range(r.headers.get('Content-Range'))
+                if (start if r.status_code == 206 else length) != offset:
+                    r.close()
+                    open(part_path, 'wb').close()
+                    return download(url, path)
+            if r.status_code == 416 and offset:
+                os.rename(part_path, path)
+                return 'resumed', 0
+            if r.status_code >= 500:
+                r.raise_for_status()
+            if r.status_code not in (200, 206):
+                return 'missing', 0
+            if r.status_code == 200:
+                resumed = False
+
+            with open(part_path, 'ab' if r.status_code == 206 else 'wb') as f:
+                for chunk in r.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        if limiter is not None:
+                            limiter.consume(len(chunk))
+                        f.write(chunk)
+                        size += len(chunk)
+        finally:
+            r.close()
+
+        os.rename(part_path, path)
+        return 'resumed' if resumed else 'downloaded', size
+
+    def download_url(url):
+        path = media_path(url, cache_path=cache_path)
+        if os.path.isfile(path):
+            return report(MediaEvent(url, path, 'skipped', 0, 0.0, None))
+
+        item_start = time.time()
+        makedirs(os.path.dirname(path))
+        with FileLock(path):
+            if os.path.isfile(path):
+                return report(MediaEvent(url, path, 'skipped', 0, 0.0, None))
+
+            attempt = 0
+            size = 0
+            while True:
+                try:
+                    (status, attempt_size) = download(url, path)
+                    size += attempt_size
+                    return report(MediaEvent(url, path, status, size, time.time() - item_start, None))
+                except Exception as e:
+                    if attempt >= retries:
+                        return report(MediaEvent(url, path, 'failed', size, time.time() - item_start, e))
+                    time.sleep(backoff_factor * (2 ** attempt))
+                    attempt += 1
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for future in [executor.submit(download_url, url) for url in urls]:
+            future.result()
+
+    result.elapsed = time.time() - start
+    return result
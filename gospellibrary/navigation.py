@@ -0,0 +1,94 @@
+import gzip
+import io
+import json
+import os
+
+from gospellibrary.fetch import write_chunks
+
+SNAPSHOT_FORMAT_VERSION = 2
+
+
+class CatalogTree:
+    def __init__(self, collections, sections, items):
+        self.collections = {}
+        self.sections = {}
+        self.items = {}
+        self.items_by_uri = {}
+        self.__children = {}
+
+        for collection in collections:
+            collection = dict(collection, node_type='collection')
+            self.collections[collection['id']] = collection
+            self.__children.setdefault(('section', collection['library_section_id']), []).append(collection)
+        for section in sections:
+            section = dict(section, node_type='section')
+            self.sections[section['id']] = section
+            self.__children.setdefault(('collection', section['library_collection_id']), []).append(section)
+        for item in items:
+            item = dict(item, node_type='item')
+            self.items.setdefault(item['id'], item)
+            self.items_by_uri.setdefault(item['uri'], item)
+            self.__children.setdefault(('section', item['library_section_id']), []).append(item)
+
+        for children in self.__children.values():
+            children.sort(key=lambda node: node['position'])
+
+    def roots(self):
+        return self.__children.get(('section', None), [])
+
+    def root(self):
+        roots = self.roots()
+        return roots[0] if roots else None
+
+    def children(self, node):
+        return self.__children.get((node['node_type'], node['id']), [])
+
+    def parent(self, node):
+        if node['node_type'] == 'section':
+            return self.collections.get(node['library_collection_id'])
+        return self.sections.get(node['library_section_id'])
+
+    def ancestors(self, item_id):
+        item = self.items.get(item_id)
+        if item is None:
+            return None
+
+        ancestors = []
+        node = self.parent(item)
+        while node is not None:
+            ancestors.append(node)
+            node = self.parent(node)
+        ancestors.reverse()
+        return ancestors
+
+    def path_to(self, uri):
+        item = self.items_by_uri.get(uri)
+        if item is None:
+            return None
+
+        return self.ancestors(item['id']) + [item]
+
+    def save(self, path):
+        snapshot = dict(
+            format_version=SNAPSHOT_FORMAT_VERSION,
+            collections=list(self.collections.values()),
+            sections=list(self.sections.values()),
+            items=[node for (node_type, _), children in self.__children.items() if node_type == 'section' for node in children if node['node_type'] == 'item'],
+        )
+        data = io.BytesIO()
+        with gzip.GzipFile(fileobj=data, mode='wb') as f:
+            f.write(json.dumps(snapshot, separators=(',', ':')).encode('utf-8'))
+        write_chunks([data.getvalue()], path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.isfile(path):
+            return None
+
+        with gzip.open(path, 'rb') as f:
+            snapshot = json.loads(f.read().decode('utf-8'))
+        if snapshot.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            return None
+
+        return cls(snapshot['collections'], snapshot['sections'], snapshot['items'])
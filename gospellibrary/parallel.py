@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import requests
+
+from gospellibrary.catalogs import CatalogDB, DEFAULT_BASE_URL, DEFAULT_CACHE_PATH, DEFAULT_SCHEMA_VERSION, DEFAULT_TTL
+from gospellibrary.item_packages import ItemPackage
+
+
+def uri_prefixes(uri):
+    parts = [part for part in uri.split('/') if part]
+    return ['/' + '/'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+class ParallelText:
+    def __init__(self, uri, languages, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=requests.Session(), cache_path=DEFAULT_CACHE_PATH, cache=None, cache_manager=None, max_workers=None, ttl=DEFAULT_TTL):
+        self.uri = uri
+        self.languages = list(languages)
+        self.schema_version = schema_version
+        self.base_url = base_url
+        self.session = session
+        self.cache_path = cache_path
+        self.cache = cache
+        self.cache_manager = cache_manager
+        self.max_workers = max_workers or len(self.languages)
+        self.ttl = ttl
+        self.__items = {}
+        self.__item_packages = {}
+        self.__lock = threading.Lock()
+        self.__executor = None
+
+    def close(self):
+        with self.__lock:
+            item_packages, self.__item_packages = self.__item_packages, {}
+            self.__items = {}
+            executor, self.__executor = self.__executor, None
+        if executor is not None:
+            executor.shutdown()
+        for item_package in item_packages.values():
+            if item_package is not None:
+                item_package.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __map(self, fn):
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            executor = self.__executor
+        return OrderedDict(zip(self.languages, executor.map(fn, self.languages)))
+
+    def __item_package(self, iso639_3_code):
+        with self.__lock:
+            if iso639_3_code in self.__item_packages:
+                return self.__item_packages[iso639_3_code]
+
+        with CatalogDB(iso639_3_code=iso639_3_code, schema_version=self.schema_version, base_url=self.base_url, session=self.session, cache_path=self.cache_path, cache=self.cache, cache_manager=self.cache_manager, ttl=self.ttl) as catalog:
+            items = catalog.items_by_uris(uri_prefixes(self.uri))
+        item = None
+        for candidate in reversed(list((items or {}).values())):
+            if candidate is not None:
+                item = candidate
+                break
+
+        item_package = None
+        if item is not None:
+            item_package = ItemPackage(item_id=item['id'], item_version=item['version'], iso639_3_code=iso639_3_code, schema_version=self.schema_version, base_url=self.base_url, session=self.session, cache_path=self.cache_path, cache=self.cache, cache_manager=self.cache_manager)
+
+        with self.__lock:
+            self.__items[iso639_3_code] = item
+            return self.__item_packages.setdefault(iso639_3_code, item_package)
+
+    def items(self):
+        self.__map(self.__item_package)
+        with self.__lock:
+            return OrderedDict((iso639_3_code, self.__items.get(iso639_3_code)) for iso639_3_code in self.languages)
+
+    def paragraphs(self, paragraph_ids=None):
+        def language_paragraphs(iso639_3_code):
+            item_package = self.__item_package(iso639_3_code)
+            if item_package is None:
+                return None
+            return item_package.paragraphs(self.uri, paragraph_ids)
+
+        aligned = OrderedDict()
+        for iso639_3_code, paragraphs in self.__map(language_paragraphs).items():
+            for paragraph_id, html in (paragraphs or {}).items():
+                if paragraph_id not in aligned:
+                    aligned[paragraph_id] = OrderedDict((language, None) for language in self.languages)
+                aligned[paragraph_id][iso639_3_code] = html
+        return aligned
@@ -0,0 +1,91 @@
+import os
+import shutil
+
+from gospellibrary.catalogs import CatalogDB, DEFAULT_CACHE_PATH, DEFAULT_ISO639_3_CODE, DEFAULT_SCHEMA_VERSION
+from gospellibrary.item_packages import cached_item_packages
+
+DEFAULT_KEEP_CATALOGS = 2
+
+
+def directory_size(path):
+    size = 0
+    for directory, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                size += os.path.getsize(os.path.join(directory, filename))
+            except OSError:
+                pass
+    return size
+
+
+def cached_catalog_versions(iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, cache_path=DEFAULT_CACHE_PATH):
+    catalogs_path = os.path.join(cache_path, schema_version, 'languages', iso639_3_code, 'catalogs')
+    if not os.path.isdir(catalogs_path):
+        return []
+
+    return sorted((int(name) for name in os.listdir(catalogs_path) if name.isdigit() and os.path.isfile(os.path.join(catalogs_path, name, 'Catalog.sqlite'))))
+
+
+def prune_language(iso639_3_code=DEFAULT_ISO639_3_CODE, keep_catalogs=DEFAULT_KEEP_CATALOGS, max_bytes=None, schema_version=DEFAULT_SCHEMA_VERSION, cache_path=DEFAULT_CACHE_PATH):
+    language_path = os.path.join(cache_path, schema_version, 'languages', iso639_3_code)
+    stats = dict(removed_catalogs=[], removed_item_packages=[], bytes_freed=0, bytes=0)
+
+    def remove(path):
+        size = directory_size(path)
+        shutil.rmtree(path, ignore_errors=True)
+        stats['bytes_freed'] += size
+        try:
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+
+    catalog_versions = cached_catalog_versions(iso639_3_code=iso639_3_code, schema_version=schema_version, cache_path=cache_path)
+    kept_versions = catalog_versions[-keep_catalogs:] if keep_catalogs > 0 else []
+    for catalog_version in catalog_versions:
+        if catalog_version not in kept_versions:
+            remove(os.path.join(language_path, 'catalogs', str(catalog_version)))
+            stats['removed_catalogs'].append(catalog_version)
+
+    referenced = {}
+    for catalog_version in kept_versions:
+        with CatalogDB(iso639_3_code=iso639_3_code, catalog_version=catalog_version, schema_version=schema_version, cache_path=cache_path) as catalog:
+            for item_id, item in (catalog.item_versions() or {}).items():
+                referenced.setdefault(str(item_id), {})[item.get('version')] = catalog_version
+
+    item_packages = list(cached_item_packages(iso639_3_code=iso639_3_code, schema_version=schema_version, cache_path=cache_path))
+    newest_versions = {}
+    for (item_id, item_version, _) in item_packages:
+        newest_versions[item_id] = max(item_version, newest_versions.get(item_id, item_version))
+
+    remaining = []
+    for (item_id, item_version, path) in item_packages:
+        if item_version < newest_versions[item_id] and item_version not in referenced.get(item_id, {}):
+            remove(os.path.dirname(path))
+            stats['removed_item_packages'].append((item_id, item_version))
+        else:
+            remaining.append((item_id, item_version, path))
+
+    if max_bytes is not None:
+        total = directory_size(language_path)
+        current_version = kept_versions[-1] if kept_versions else None
+
+        for catalog_version in kept_versions[:-1]:
+            if total <= max_bytes:
+                break
+            before = stats['bytes_freed']
+            remove(os.path.join(language_path, 'catalogs', str(catalog_version)))
+            stats['removed_catalogs'].append(catalog_version)
+            total -= stats['bytes_freed'] - before
+
+        for (item_id, item_version, path) in remaining:
+            if total <= max_bytes:
+                break
+            if referenced.get(item_id, {}).get(item_version) == current_version and current_version is not None:
+                continue
+            before = stats['bytes_freed']
+            remove(os.path.dirname(path))
+            stats['removed_item_packages'].append((item_id, item_version))
+            total -= stats['bytes_freed'] - before
+
+    stats['bytes'] = directory_size(language_path)
+    return stats
@@ -0,0 +1,112 @@
+import os
+import re
+import sqlite3
+import threading
+
+from gospellibrary.fetch import makedirs
+from gospellibrary.item_packages import DEFAULT_CACHE_PATH, DEFAULT_ISO639_3_CODE, DEFAULT_SCHEMA_VERSION, ItemPackage, cached_item_packages
+from gospellibrary.text import strip_tags
+
+DEFAULT_LIMIT = 20
+DEFAULT_SNIPPET_TOKENS = 16
+
+SEARCH_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS indexed_item_package (item_id TEXT PRIMARY KEY, item_version INTEGER);
+CREATE VIRTUAL TABLE IF NOT EXISTS paragraph USING fts5(text, item_id UNINDEXED, subitem_uri UNINDEXED, paragraph_id UNINDEXED, tokenize='unicode61 remove_diacritics 2');
+'''
+
+TERM_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def match_expression(query):
+    terms = [phrase or term for (phrase, term) in TERM_RE.findall(query)]
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in terms if term.strip())
+
+
+def search_index_path(iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, cache_path=DEFAULT_CACHE_PATH):
+    return os.path.join(cache_path, schema_version, 'languages', iso639_3_code, 'search', 'Search.sqlite')
+
+
+class SearchIndex:
+    def __init__(self, iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, cache_path=DEFAULT_CACHE_PATH):
+        self.iso639_3_code = iso639_3_code
+        self.schema_version = schema_version
+        self.cache_path = cache_path
+        self.path = search_index_path(iso639_3_code=iso639_3_code, schema_version=schema_version, cache_path=cache_path)
+        self.__db = None
+        self.__lock = threading.Lock()
+
+    def __connection(self):
+        if self.__db is None:
+            makedirs(os.path.dirname(self.path))
+            self.__db = sqlite3.connect(self.path, check_same_thread=False)
+            self.__db.executescript(SEARCH_SCHEMA)
+        return self.__db
+
+    def close(self):
+        with self.__lock:
+            if self.__db is not None:
+                self.__db.close()
+                self.__db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def update(self):
+        latest_versions = {}
+        for (item_id, item_version, _) in cached_item_packages(iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, cache_path=self.cache_path):
+            latest_versions[item_id] = item_version
+
+        stats = dict(indexed=0, removed=0, unchanged=0)
+        with self.__lock:
+            db = self.__connection()
+            indexed_versions = dict(db.execute('''SELECT item_id, item_version FROM indexed_item_package'''))
+
+            for item_id in set(indexed_versions) - set(latest_versions):
+                with db:
+                    db.execute('''DELETE FROM paragraph WHERE item_id=?''', [item_id])
+                    db.execute('''DELETE FROM indexed_item_package WHERE item_id=?''', [item_id])
+                stats['removed'] += 1
+
+            for item_id, item_version in sorted(latest_versions.items()):
+                if indexed_versions.get(item_id) == item_version:
+                    stats['unchanged'] += 1
+                    continue
+
+                with db:
+                    db.execute('''DELETE FROM paragraph WHERE item_id=?''', [item_id])
+                    db.executemany('''INSERT INTO paragraph (text, item_id, subitem_uri, paragraph_id) VALUES (?, ?, ?, ?)''', self.__paragraphs(item_id, item_version))
+                    db.execute('''INSERT OR REPLACE INTO indexed_item_package (item_id, item_version) VALUES (?, ?)''', [item_id, item_version])
+                stats['indexed'] += 1
+
+        return stats
+
+    def __paragraphs(self, item_id, item_version):
+        with ItemPackage(item_id=item_id, item_version=item_version, iso639_3_code=self.iso639_3_code, schema_version=self.schema_version, cache_path=self.cache_path) as item_package:
+            for subitem in item_package.subitems():
+                for paragraph_id, html in item_package.paragraphs(subitem['uri']).items():
+                    text = strip_tags(html.tobytes().decode('utf-8'))
+                    if text:
+                        yield (text, item_id, subitem['uri'], paragraph_id)
+
+    def search(self, query, limit=DEFAULT_LIMIT, uri_prefix=None, raw=False):
+        if not raw:
+            query = match_expression(query)
+            if not query:
+                return []
+
+        sql = '''SELECT item_id, subitem_uri, paragraph_id, snippet(paragraph, 0, '<b>', '</b>', '...', ?), bm25(paragraph) FROM paragraph WHERE paragraph MATCH ?'''
+        parameters = [DEFAULT_SNIPPET_TOKENS, query]
+        if uri_prefix:
+            sql += ''' AND substr(subitem_uri, 1, ?)=?'''
+            parameters += [len(uri_prefix), uri_prefix]
+        sql += ''' ORDER BY rank LIMIT ?'''
+        parameters.append(limit)
+
+        with self.__lock:
+            rows = self.__connection().execute(sql, parameters).fetchall()
+
+        return [dict(item_id=item_id, subitem_uri=subitem_uri, paragraph_id=paragraph_id, snippet=snippet, rank=rank) for (item_id, subitem_uri, paragraph_id, snippet, rank) in rows]
@@ -0,0 +1,309 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+try:
+    from urllib.parse import urljoin
+except ImportError:
+    from urlparse import urljoin
+
+import requests
+
+from gospellibrary.catalogs import CatalogDB, CatalogRow, CatalogRowLayout, DEFAULT_BASE_URL, DEFAULT_CACHE_PATH, DEFAULT_ISO639_3_CODE, DEFAULT_SCHEMA_VERSION, DEFAULT_TTL, catalog_path, current_catalog_version
+from gospellibrary.connections import connect_read_only
+from gospellibrary.fetch import FileLock
+
+SNAPSHOT_MAGIC = b'GLCATSNP'
+SNAPSHOT_FORMAT_VERSION = 2
+
+HEADER = struct.Struct('<8sIIQQ')
+INT_INDEX_ENTRY = struct.Struct('<qI')
+URI_INDEX_ENTRY = struct.Struct('<III')
+NULL_INT = -2 ** 63
+NULL_LENGTH = 2 ** 32 - 1
+
+KIND_INTEGER = 'i'
+KIND_REAL = 'd'
+KIND_TEXT = 's'
+CELL_FORMATS = {KIND_INTEGER: 'q', KIND_REAL: 'd', KIND_TEXT: 'II'}
+
+TABLES = (
+    ('item', '''SELECT * FROM item ORDER BY id''', ('id',)),
+    ('collection', '''SELECT * FROM library_collection ORDER BY position, id''', ('id', 'library_section_id')),
+    ('section', '''SELECT * FROM library_section ORDER BY position, id''', ('library_collection_id',)),
+    ('library_item', '''SELECT item.*, library_item.* FROM library_item INNER JOIN item ON library_item.item_id=item.id ORDER BY external_id''', ('library_section_id',)),
+)
+
+
+def snapshot_path(catalog_version, iso639_3_code=DEFAULT_ISO639_3_CODE, schema_version=DEFAULT_SCHEMA_VERSION, cache_path=DEFAULT_CACHE_PATH):
+    return os.path.join(os.path.dirname(catalog_path(catalog_version, iso639_3_code=iso639_3_code, schema_version=schema_version, cache_path=cache_path)), 'Catalog.snapshot')
+
+
+def column_kind(values):
+    kinds = set(type(value) for value in values if value is not None)
+    if kinds and kinds <= set([int, bool]):
+        return KIND_INTEGER
+    if kinds and kinds <= set([int, float]):
+        return KIND_REAL
+    return KIND_TEXT
+
+
+def write_snapshot(db_path, path, catalog_version):
+    db = connect_read_only(db_path)
+    try:
+        tables = []
+        for (name, sql, index_columns) in TABLES:
+            c = db.execute(sql)
+            tables.append((name, [column[0] for column in c.description], c.fetchall(), index_columns))
+    finally:
+        db.close()
+
+    strings = bytearray()
+    interned = {}
+
+    def intern(value):
+        if value is None:
+            return (0, NULL_LENGTH)
+        if not isinstance(value, bytes):
+            value = (value if isinstance(value, type(u'')) else str(value)).encode('utf-8')
+        if value not in interned:
+            interned[value] = (len(strings), len(value))
+            strings.extend(value)
+        return interned[value]
+
+    body = bytearray()
+    meta = dict(tables={})
+    for (name, names, rows, index_columns) in tables:
+        kinds = [column_kind([row[i] for row in rows]) for i in range(len(names))]
+        record = struct.Struct('<' + ''.join(CELL_FORMATS[kind] for kind in kinds))
+        records_offset = len(body)
+        for row in rows:
+            cells = []
+            for kind, value in zip(kinds, row):
+                if kind == KIND_TEXT:
+                    cells.extend(intern(value))
+                elif kind == KIND_INTEGER:
+                    cells.append(NULL_INT if value is None else int(value))
+                else:
+                    cells.append(float('nan') if value is None else float(value))
+            body.extend(record.pack(*cells))
+
+        indexes = {}
+        for index_column in index_columns:
+            column = names.index(index_column)
+            if kinds[column] != KIND_INTEGER:
+                continue
+            entries = sorted((row[column], i) for i, row in enumerate(rows) if row[column] is not None)
+            indexes[index_column] = [len(body), len(entries)]
+            for (key, i) in entries:
+                body.extend(INT_INDEX_ENTRY.pack(key, i))
+
+        meta['tables'][name] = dict(columns=[[column_name, kind] for column_name, kind in zip(names, kinds)], count=len(rows), records_offset=records_offset, indexes=indexes)
+
+    (_, item_names, item_rows, _) = tables[0]
+    uri_column = item_names.index('uri')
+    uri_rows = sorted((i for i, row in enumerate(item_rows) if row[uri_column] is not None), key=lambda i: item_rows[i][uri_column].encode('utf-8'))
+    meta['uri_index'] = [len(body), len(uri_rows)]
+    for i in uri_rows:
+        body.extend(URI_INDEX_ENTRY.pack(*(intern(item_rows[i][uri_column]) + (i,))))
+
+    meta['strings_offset'] = len(body)
+    meta = json.dumps(meta).encode('utf-8')
+    meta_offset = HEADER.size
+    body_offset = meta_offset + len(meta) + (-(meta_offset + len(meta)) % 8)
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, catalog_version, meta_offset, len(meta)))
+            f.write(meta)
+            f.write(b'\0' * (body_offset - meta_offset - len(meta)))
+            f.write(body)
+            f.write(strings)
+        os.rename(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    return path
+
+
+def build_snapshot(db_path, path, catalog_version):
+    if os.path.isfile(path):
+        return path
+
+    with FileLock(path):
+        if not os.path.isfile(path):
+            write_snapshot(db_path, path, catalog_version)
+    return path
+
+
+def open_catalog_snapshot(iso639_3_code=DEFAULT_ISO639_3_CODE, catalog_version=None, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=requests.Session(), cache_path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL):
+    catalog_version = catalog_version if catalog_version else current_catalog_version(iso639_3_code=iso639_3_code, schema_version=schema_version, base_url=base_url, session=session, cache_path=cache_path, ttl=ttl)
+    if not catalog_version:
+        return None
+
+    path = snapshot_path(catalog_version, iso639_3_code=iso639_3_code, schema_version=schema_version, cache_path=cache_path)
+    if not os.path.isfile(path):
+        with CatalogDB(iso639_3_code=iso639_3_code, catalog_version=catalog_version, schema_version=schema_version, base_url=base_url, session=session, cache_path=cache_path) as catalog:
+            if not catalog.exists():
+                return None
+            build_snapshot(catalog_path(catalog_version, iso639_3_code=iso639_3_code, schema_version=schema_version, cache_path=cache_path), path, catalog_version)
+
+    return CatalogSnapshot(path, schema_version=schema_version, base_url=base_url)
+
+
+class SnapshotTable:
+    def __init__(self, mm, body_offset, strings_offset, meta, renditions_base_url):
+        self.mm = mm
+        self.strings_offset = strings_offset
+        self.kinds = [kind for (_, kind) in meta['columns']]
+        self.count = meta['count']
+        self.records_offset = body_offset + meta['records_offset']
+        self.indexes = dict((name, (body_offset + offset, count)) for name, (offset, count) in meta['indexes'].items())
+        self.record = struct.Struct('<' + ''.join(CELL_FORMATS[kind] for kind in self.kinds))
+        self.layout = CatalogRowLayout([name for (name, _) in meta['columns']], renditions_base_url)
+
+    def string(self, offset, length):
+        if length == NULL_LENGTH:
+            return None
+        start = self.strings_offset + offset
+        return self.mm[start:start + length].decode('utf-8')
+
+    def row(self, index):
+        cells = self.record.unpack_from(self.mm, self.records_offset + index * self.record.size)
+        values = []
+        i = 0
+        for kind in self.kinds:
+            if kind == KIND_TEXT:
+                values.append(self.string(cells[i], cells[i + 1]))
+                i += 2
+            else:
+                value = cells[i]
+                if kind == KIND_INTEGER:
+                    values.append(None if value == NULL_INT else value)
+                else:
+                    values.append(None if value != value else value)
+                i += 1
+        return CatalogRow(self.layout, tuple(values))
+
+    def rows(self):
+        return [self.row(index) for index in range(self.count)]
+
+    def __key(self, offset, position):
+        return INT_INDEX_ENTRY.unpack_from(self.mm, offset + position * INT_INDEX_ENTRY.size)
+
+    def lookup(self, column, key):
+        if column not in self.indexes:
+            return []
+
+        (offset, count) = self.indexes[column]
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.__key(offset, mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        rows = []
+        while lo < count:
+            (value, index) = self.__key(offset, lo)
+            if value != key:
+                break
+            rows.append(self.row(index))
+            lo += 1
+        return rows
+
+    def lookup_all(self, column, keys):
+        rows = []
+        for key in sorted(set(int(key) for key in keys)):
+            rows.extend(self.lookup(column, key))
+        return sorted(rows, key=lambda row: row['position'])
+
+
+class CatalogSnapshot:
+    def __init__(self, path, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.__mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, format_version, self.catalog_version, meta_offset, meta_length) = HEADER.unpack_from(self.__mm, 0)
+        if magic != SNAPSHOT_MAGIC or format_version != SNAPSHOT_FORMAT_VERSION:
+            self.close()
+            raise ValueError('Unsupported catalog snapshot: {}'.format(path))
+
+        meta = json.loads(self.__mm[meta_offset:meta_offset + meta_length].decode('utf-8'))
+        body_offset = meta_offset + meta_length + (-(meta_offset + meta_length) % 8)
+        strings_offset = body_offset + meta['strings_offset']
+        renditions_base_url = urljoin(base_url, schema_version)
+        self.__tables = dict((name, SnapshotTable(self.__mm, body_offset, strings_offset, table, renditions_base_url)) for name, table in meta['tables'].items())
+        (uri_index_offset, self.__uri_count) = meta['uri_index']
+        self.__uri_index_offset = body_offset + uri_index_offset
+        self.__strings_offset = strings_offset
+
+    def close(self):
+        if self.__mm is not None:
+            self.__mm.close()
+            self.__mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.__tables['item'].count
+
+    def __uri(self, position):
+        (offset, length, index) = URI_INDEX_ENTRY.unpack_from(self.__mm, self.__uri_index_offset + position * URI_INDEX_ENTRY.size)
+        start = self.__strings_offset + offset
+        return index, self.__mm[start:start + length]
+
+    def __find_uri(self, uri):
+        uri = uri.encode('utf-8')
+        lo, hi = 0, self.__uri_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.__uri(mid)[1] < uri:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.__uri_count:
+            index, value = self.__uri(lo)
+            if value == uri:
+                return index
+        return None
+
+    def item(self, item_id=None, uri=None):
+        items = self.__tables['item']
+        if item_id:
+            rows = items.lookup('id', int(item_id))
+            return rows[0] if rows else None
+
+        index = self.__find_uri(uri)
+        return items.row(index) if index is not None else None
+
+    def collection(self, collection_id):
+        rows = self.__tables['collection'].lookup('id', int(collection_id))
+        return rows[0] if rows else None
+
+    def sections(self, collection_id):
+        return self.__tables['section'].lookup('library_collection_id', int(collection_id))
+
+    def collections(self, section_ids):
+        return self.__tables['collection'].lookup_all('library_section_id', section_ids)
+
+    def items(self, section_ids=None):
+        if section_ids is None:
+            return self.__tables['library_item'].rows()
+        return self.__tables['library_item'].lookup_all('library_section_id', section_ids)
+
+    def nodes(self, section_ids):
+        return sorted(self.collections(section_ids) + self.items(section_ids), key=lambda node: node['position'])
@@ -0,0 +1,146 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from gospellibrary.catalogs import CatalogDB, DEFAULT_BASE_URL, DEFAULT_CACHE_PATH, DEFAULT_ISO639_3_CODE, DEFAULT_SCHEMA_VERSION, DEFAULT_TTL
+from gospellibrary.fetch import STORAGE_COMPRESSED, STORAGE_DECOMPRESSED, FileLock, decompress_xz, download
+from gospellibrary.item_packages import item_package_path, item_package_url
+from gospellibrary.text import build_text_index
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+
+SyncEvent = namedtuple('SyncEvent', ['item_id', 'item_version', 'status', 'bytes', 'elapsed', 'error'])
+
+
+class SyncResult:
+    def __init__(self):
+        self.synced = 0
+        self.skipped = 0
+        self.missing = 0
+        self.failed = 0
+        self.bytes_downloaded = 0
+        self.elapsed = 0.0
+        self.errors = {}
+        self.__lock = threading.Lock()
+
+    def add(self, event):
+        with self.__lock:
+            setattr(self, event.status, getattr(self, event.status) + 1)
+            self.bytes_downloaded += event.bytes
+            if event.error is not None:
+                self.errors[event.item_id] = event.error
+
+    def __repr__(self):
+        return 'SyncResult(synced={}, skipped={}, missing={}, failed={}, bytes_downloaded={}, elapsed={:.3f})'.format(self.synced, self.skipped, self.missing, self.failed, self.bytes_downloaded, self.elapsed)
+
+
+def pooled_session(max_connections_per_host=DEFAULT_MAX_CONNECTIONS_PER_HOST):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=max_connections_per_host, pool_block=True)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def sync_language(iso639_3_code=DEFAULT_ISO639_3_CODE, item_filter=None, max_workers=DEFAULT_MAX_WORKERS, decompress_workers=None, catalog_version=None, since_catalog_version=None, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=None, cache_path=DEFAULT_CACHE_PATH, max_connections_per_host=DEFAULT_MAX_CONNECTIONS_PER_HOST, retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR, progress=None, storage=STORAGE_DECOMPRESSED, build_text=False, ttl=DEFAULT_TTL, cache_manager=None):
+    session = session if session is not None else pooled_session(max_connections_per_host=max_connections_per_host)
+    with CatalogDB(iso639_3_code=iso639_3_code, catalog_version=catalog_version, schema_version=schema_version, base_url=base_url, session=session, cache_path=cache_path, ttl=ttl) as catalog:
+        items = catalog.items()
+        diff = catalog.diff(since_catalog_version) if since_catalog_version is not None else None
+    if items is None:
+        return None
+    if diff is not None:
+        updated_ids = set(item['id'] for item in diff['added'] + diff['changed'])
+        items = [item for item in items if item['id'] in updated_ids]
+
+    seen = set()
+    unique_items = []
+    for item in items:
+        if item['id'] not in seen and (item_filter is None or item_filter(item)):
+            seen.add(item['id'])
+            unique_items.append(item)
+
+    return sync_items(unique_items, iso639_3_code=iso639_3_code, max_workers=max_workers, decompress_workers=decompress_workers, schema_version=schema_version, base_url=base_url, session=session, cache_path=cache_path, retries=retries, backoff_factor=backoff_factor, progress=progress, storage=storage, build_text=build_text, cache_manager=cache_manager)
+
+
+def sync_items(items, iso639_3_code=DEFAULT_ISO639_3_CODE, max_workers=DEFAULT_MAX_WORKERS, decompress_workers=None, schema_version=DEFAULT_SCHEMA_VERSION, base_url=DEFAULT_BASE_URL, session=None, cache_path=DEFAULT_CACHE_PATH, max_connections_per_host=DEFAULT_MAX_CONNECTIONS_PER_HOST, retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR, progress=None, storage=STORAGE_DECOMPRESSED, build_text=False, cache_manager=None):
+    session = session if session is not None else pooled_session(max_connections_per_host=max_connections_per_host)
+    result = SyncResult()
+    start = time.time()
+
+    def report(event):
+        result.add(event)
+        if progress is not None:
+            progress(event)
+
+    pending = []
+    for item in items:
+        path = item_package_path(item['id'], item['version'], iso639_3_code=iso639_3_code, schema_version=schema_version, cache_path=cache_path)
+        if storage == STORAGE_COMPRESSED:
+            path += '.xz'
+        if os.path.isfile(path):
+            report(SyncEvent(item['id'], item['version'], 'skipped', 0, 0.0, None))
+        else:
+            pending.append((item, path))
+
+    process_pool = ProcessPoolExecutor(max_workers=decompress_workers) if decompress_workers != 0 and storage != STORAGE_COMPRESSED and pending else None
+    try:
+        def sync_item(item, path):
+            with FileLock(path):
+                if os.path.isfile(path):
+                    return report(SyncEvent(item['id'], item['version'], 'skipped', 0, 0.0, None))
+                download_item(item, path)
+            if cache_manager is not None and os.path.isfile(path):
+                cache_manager.record_access(path, False)
+                cache_manager.evict()
+
+        def download_item(item, path):
+            item_start = time.time()
+            if storage == STORAGE_COMPRESSED:
+                xz_path = path
+            else:
+                xz_path = path + '.xz'
+            url = item_package_url(item['id'], item['version'], iso639_3_code=iso639_3_code, schema_version=schema_version, base_url=base_url)
+            attempt = 0
+            while True:
+                try:
+                    if download(session, url, xz_path) is None:
+                        return report(SyncEvent(item['id'], item['version'], 'missing', 0, time.time() - item_start, None))
+                    size = os.path.getsize(xz_path)
+                    if storage == STORAGE_COMPRESSED:
+                        return report(SyncEvent(item['id'], item['version'], 'synced', size, time.time() - item_start, None))
+                    if process_pool is not None:
+                        process_pool.submit(decompress_xz, xz_path, path).result()
+                        if build_text:
+                            process_pool.submit(build_text_index, path).result()
+                    else:
+                        decompress_xz(xz_path, path)
+                        if build_text:
+                            build_text_index(path)
+                    return report(SyncEvent(item['id'], item['version'], 'synced', size, time.time() - item_start, None))
+                except Exception as e:
+                    if attempt >= retries:
+                        return report(SyncEvent(item['id'], item['version'], 'failed', 0, time.time() - item_start, e))
+                    time.sleep(backoff_factor * (2 ** attempt))
+                    attempt += 1
+                finally:
+                    if storage != STORAGE_COMPRESSED and os.path.exists(xz_path):
+                        os.remove(xz_path)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as thread_pool:
+            for future in [thread_pool.submit(sync_item, item, path) for (item, path) in pending]:
+                future.result()
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
+
+    result.elapsed = time.time() - start
+    return result
@@ -0,0 +1,32 @@
+import asyncio
+
+from gospellibrary.aio import AsyncCatalogDB, AsyncClient, AsyncItemPackage, get_languages
+from gospellibrary.tests.fixtures import item_id
+
+
+async def catalog_and_item_package(test, base_url, cache_path):
+    async with AsyncClient(base_url=base_url, cache_path=cache_path) as client:
+        languages = await get_languages(client)
+        test.assertEqual(languages[0]['iso639_3Code'], 'eng')
+
+        catalog = AsyncCatalogDB(client)
+        item = await catalog.item(uri='/scriptures/book-1')
+        test.assertEqual(catalog.catalog_version, 1)
+        test.assertEqual(item['id'], item_id(1))
+        test.assertEqual(await catalog.language_name(3), u'Español')
+
+        item_package = AsyncItemPackage(client, item['id'], item['version'])
+        test.assertEqual(await item_package.file_id(), 'file-eng-1')
+        test.assertTrue((await item_package.html(subitem_uri='/scriptures/book-1/1', paragraph_id='p1')).startswith('<p class="verse"'))
+        test.assertIsNone(await AsyncItemPackage(client, 1, 1).subitems())
+        catalog.close()
+        item_package.close()
+
+
+async def single_flight(test, base_url, cache_path):
+    async with AsyncClient(base_url=base_url, cache_path=cache_path) as client:
+        item_packages = [AsyncItemPackage(client, item_id(0), 1) for _ in range(5)]
+        file_ids = await asyncio.gather(*[item_package.file_id() for item_package in item_packages])
+        test.assertEqual(file_ids, ['file-eng-0'] * 5)
+        for item_package in item_packages:
+            item_package.close()
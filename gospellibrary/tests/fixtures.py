@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+
+from email.utils import mktime_tz, parsedate_tz
+import io
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+import time
+
+try:
+    from http.server import HTTPServer, SimpleHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer
+    from SimpleHTTPServer import SimpleHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+
+try:
+    import lzma
+except ImportError:
+    from backports import lzma
+
+from gospellibrary.fetch import makedirs
+
+CATALOG_SCHEMA = '''
+CREATE TABLE language_name (id INTEGER PRIMARY KEY, language_id INTEGER, localization_language_id INTEGER, name TEXT);
+CREATE TABLE item_category (id INTEGER PRIMARY KEY, name TEXT);
+CREATE TABLE item (id INTEGER PRIMARY KEY, external_id TEXT, language_id INTEGER, item_category_id INTEGER, uri TEXT, title TEXT, item_cover_renditions TEXT, version INTEGER, latest_version INTEGER, obsolete INTEGER);
+CREATE TABLE library_collection (id INTEGER PRIMARY KEY, external_id TEXT, library_section_id INTEGER, library_section_external_id TEXT, position INTEGER, title_html TEXT, cover_renditions TEXT, type_id INTEGER);
+CREATE TABLE library_section (id INTEGER PRIMARY KEY, external_id TEXT, library_collection_id INTEGER, library_collection_external_id TEXT, position INTEGER, title TEXT, index_title TEXT);
+CREATE TABLE library_item (id INTEGER PRIMARY KEY, external_id TEXT, library_section_id INTEGER, library_section_external_id TEXT, position INTEGER, title_html TEXT, obsolete INTEGER, item_id INTEGER, item_external_id TEXT, item_cover_renditions TEXT);
+CREATE INDEX item_uri ON item (uri);
+'''
+
+ITEM_PACKAGE_SCHEMA = '''
+CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE subitem (id INTEGER PRIMARY KEY, uri TEXT, position INTEGER, title TEXT, title_html TEXT, doc_id TEXT, doc_version INTEGER, content_type INTEGER, web_url TEXT);
+CREATE TABLE subitem_content (id INTEGER PRIMARY KEY, subitem_id INTEGER, content_html BLOB);
+CREATE TABLE paragraph_metadata (id INTEGER PRIMARY KEY, subitem_id INTEGER, paragraph_id TEXT, paragraph_aid TEXT, verse_number TEXT, start_index INTEGER, end_index INTEGER);
+CREATE TABLE related_audio_item (id INTEGER PRIMARY KEY, subitem_id INTEGER, media_url TEXT);
+CREATE TABLE related_video_item (id INTEGER PRIMARY KEY, subitem_id INTEGER, poster_url TEXT, video_id TEXT, title TEXT);
+CREATE TABLE related_content_item (id INTEGER PRIMARY KEY, subitem_id INTEGER, ref_id TEXT, label_html TEXT, origin_id TEXT, content_html TEXT, word_offset INTEGER, byte_location INTEGER);
+CREATE INDEX subitem_uri ON subitem (uri);
+CREATE INDEX paragraph_metadata_subitem_id ON paragraph_metadata (subitem_id);
+'''
+
+LANGUAGES = [
+    dict(id=1, iso639_3Code='eng', bcp47Code='en', nativeName='English', ldsCode='000'),
+    dict(id=3, iso639_3Code='spa', bcp47Code='es', nativeName=u'Español', ldsCode='002'),
+    dict(id=4, iso639_3Code='por', bcp47Code='pt', nativeName=u'Português', ldsCode='059'),
+]
+
+RANGE_RE = re.compile(r'^bytes=(\d+)-$')
+
+
+def language_id(iso639_3_code):
+    return next(language['id'] for language in LANGUAGES if language['iso639_3Code'] == iso639_3_code)
+
+
+def item_id(index, iso639_3_code='eng'):
+    return 100000 + language_id(iso639_3_code) * 10000 + index
+
+
+def item_uri(index):
+    return '/scriptures/book-{}'.format(index)
+
+
+def subitem_uri(index, subitem_index):
+    return '{}/{}'.format(item_uri(index), subitem_index + 1)
+
+
+def paragraph_html(item_index, subitem_index, paragraph_index, iso639_3_code='eng'):
+    verse = paragraph_index + 1
+    return ('<p class="verse" data-aid="{aid}" id="p{verse}"><span class="verse-number">{verse} </span>'
+            '{lang} verse {verse} of chapter {chapter} in book {book}, '
+            '<a class="study-note-ref" href="#note{verse}a"><sup class="marker" data-value="a"></sup>and</a> it came to pass.</p>').format(
+        aid=1000000 + item_index * 10000 + subitem_index * 100 + verse,
+        verse=verse,
+        lang=iso639_3_code,
+        chapter=subitem_index + 1,
+        book=item_index,
+    )
+
+
+def create_catalog(path, iso639_3_code='eng', item_count=3, item_versions=None):
+    makedirs(os.path.dirname(path))
+    item_versions = item_versions or {}
+    db = sqlite3.connect(path)
+    try:
+        db.executescript(CATALOG_SCHEMA)
+        for language in LANGUAGES:
+            db.execute('INSERT INTO language_name (language_id, localization_language_id, name) VALUES (?, ?, ?)', [language['id'], language_id(iso639_3_code), language['nativeName']])
+        db.execute('INSERT INTO item_category (id, name) VALUES (1, ?)', ['Scriptures'])
+        db.execute('INSERT INTO library_collection VALUES (1, ?, NULL, NULL, 0, ?, NULL, 1)', ['_root', 'Library'])
+        db.execute('INSERT INTO library_section VALUES (10, ?, 1, ?, 0, ?, NULL)', ['_root_section', '_root', 'Scriptures'])
+        db.execute('INSERT INTO library_collection VALUES (2, ?, 10, ?, 0, ?, ?, 1)', ['_scriptures', '_root_section', 'Scriptures', '60x80,scriptures/60x80.jpg\n120x160,scriptures/120x160.jpg'])
+        db.execute('INSERT INTO library_section VALUES (20, ?, 2, ?, 0, ?, NULL)', ['_scriptures_section', '_scriptures', 'Books'])
+        for index in range(item_count):
+            version = item_versions.get(index, 1)
+            renditions = '60x80,book-{0}/60x80.jpg\n120x160,book-{0}/120x160.jpg'.format(index)
+            db.execute('INSERT INTO item VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, 0)', [item_id(index, iso639_3_code), '_book_{:03d}'.format(index), language_id(iso639_3_code), item_uri(index), 'Book {}'.format(index), renditions, version, version])
+            db.execute('INSERT INTO library_item VALUES (?, ?, 20, ?, ?, ?, 0, ?, ?, ?)', [1000 + index, '_library_item_{}'.format(index), '_scriptures_section', index + 1, 'Book {}'.format(index), item_id(index, iso639_3_code), '_book_{:03d}'.format(index), renditions])
+        db.commit()
+    finally:
+        db.close()
+    return path
+
+
+def create_item_package(path, item_index=0, iso639_3_code='eng', subitem_count=3, paragraph_count=10):
+    makedirs(os.path.dirname(path))
+    db = sqlite3.connect(path)
+    try:
+        db.executescript(ITEM_PACKAGE_SCHEMA)
+        db.execute('INSERT INTO metadata VALUES (?, ?)', ['file_id', 'file-{}-{}'.format(iso639_3_code, item_index)])
+        for subitem_index in range(subitem_count):
+            subitem_id = item_id(item_index, iso639_3_code) * 1000 + subitem_index
+            uri = subitem_uri(item_index, subitem_index)
+            db.execute('INSERT INTO subitem VALUES (?, ?, ?, ?, ?, ?, 1, 1, NULL)', [subitem_id, uri, subitem_index, 'Chapter {}'.format(subitem_index + 1), 'Chapter {}'.format(subitem_index + 1), 'doc-{}'.format(subitem_id)])
+
+            html = b'<html><body><header><p class="title-number" id="title_number1">Chapter ' + str(subitem_index + 1).encode('utf-8') + b'</p></header><div class="body-block">'
+            for paragraph_index in range(paragraph_count):
+                paragraph = paragraph_html(item_index, subitem_index, paragraph_index, iso639_3_code).encode('utf-8')
+                start_index = len(html)
+                html += paragraph
+                db.execute('INSERT INTO paragraph_metadata (subitem_id, paragraph_id, paragraph_aid, verse_number, start_index, end_index) VALUES (?, ?, ?, ?, ?, ?)', [subitem_id, 'p{}'.format(paragraph_index + 1), None, str(paragraph_index + 1), start_index, len(html)])
+                db.execute('INSERT INTO related_content_item (subitem_id, ref_id, label_html, origin_id, content_html, word_offset, byte_location) VALUES (?, ?, ?, ?, ?, ?, ?)', [
+                    subitem_id,
+                    'note{}a'.format(paragraph_index + 1),
+                    '{}<em>a</em>'.format(paragraph_index + 1),
+                    'p{}'.format(paragraph_index + 1),
+                    '<p id="note{0}a_p1"><a class="scripture-ref" href="gospellibrary://content{1}?verse={0}#p{0}">Ref {0}</a>; <a class="scripture-ref" href="gospellibrary://content/scriptures/dc-testament/dc/84?verse=45#p45">D&amp;C 84:45</a>.</p>'.format(paragraph_index + 1, subitem_uri((item_index + 1) % 3, subitem_index)),
+                    6,
+                    start_index,
+                ])
+            html += b'</div></body></html>'
+            db.execute('INSERT INTO subitem_content (subitem_id, content_html) VALUES (?, ?)', [subitem_id, sqlite3.Binary(html)])
+            db.execute('INSERT INTO related_audio_item (subitem_id, media_url) VALUES (?, ?)', [subitem_id, 'media/{}/{}.mp3'.format(iso639_3_code, subitem_id)])
+            db.execute('INSERT INTO related_video_item (subitem_id, poster_url, video_id, title) VALUES (?, ?, ?, ?)', [subitem_id, 'media/{}/{}.jpg'.format(iso639_3_code, subitem_id), str(subitem_id), 'Video {}'.format(subitem_index + 1)])
+        db.commit()
+    finally:
+        db.close()
+    return path
+
+
+def compress(path, xz_path):
+    makedirs(os.path.dirname(xz_path))
+    with open(path, 'rb') as f:
+        with lzma.open(xz_path, 'wb') as xz_file:
+            xz_file.write(f.read())
+    return xz_path
+
+
+def create_site(root, languages=('eng',), catalog_version=1, item_count=3, subitem_count=3, paragraph_count=10, schema_version='v4', item_versions=None):
+    item_versions = item_versions or {}
+    build_path = os.path.join(root, '.build')
+    languages_path = os.path.join(root, schema_version, 'languages')
+    makedirs(languages_path)
+    with open(os.path.join(languages_path, 'languages.json'), 'w') as f:
+        json.dump(LANGUAGES, f)
+
+    for iso639_3_code in languages:
+        language_path = os.path.join(languages_path, iso639_3_code)
+        makedirs(language_path)
+        with open(os.path.join(language_path, 'index.json'), 'w') as f:
+            json.dump(dict(catalogVersion=catalog_version), f)
+
+        catalog_path = create_catalog(os.path.join(build_path, iso639_3_code, 'catalogs', str(catalog_version), 'Catalog.sqlite'), iso639_3_code=iso639_3_code, item_count=item_count, item_versions=item_versions)
+        compress(catalog_path, os.path.join(language_path, 'catalogs', '{}.xz'.format(catalog_version)))
+
+        for index in range(item_count):
+            version = item_versions.get(index, 1)
+            package_path = os.path.join(build_path, iso639_3_code, 'item_packages', str(item_id(index, iso639_3_code)), str(version), 'Package.sqlite')
+            if not os.path.isfile(package_path):
+                create_item_package(package_path, item_index=index, iso639_3_code=iso639_3_code, subitem_count=subitem_count, paragraph_count=paragraph_count)
+            compress(package_path, os.path.join(language_path, 'item-packages', str(item_id(index, iso639_3_code)), '{}.xz'.format(version)))
+
+    return root
+
+
+def media_content(url, size):
+    return (url.encode('utf-8') * (size // len(url) + 1))[:size]
+
+
+def create_media(root, languages=('eng',), item_count=3, subitem_count=3, size=64 * 1024, missing=()):
+    paths = []
+    for iso639_3_code in languages:
+        for index in range(item_count):
+            for subitem_index in range(subitem_count):
+                subitem_id = item_id(index, iso639_3_code) * 1000 + subitem_index
+                for extension in ('mp3', 'jpg'):
+                    url = 'media/{}/{}.{}'.format(iso639_3_code, subitem_id, extension)
+                    if url in missing:
+                        continue
+                    path = os.path.join(root, *url.split('/'))
+                    makedirs(os.path.dirname(path))
+                    with open(path, 'wb') as f:
+                        f.write(media_content(url, size))
+                    paths.append(path)
+    return paths
+
+
+def fork_pool(processes):
+    if hasattr(multiprocessing, 'get_context'):
+        return multiprocessing.get_context('fork').Pool(processes)
+    return multiprocessing.Pool(processes)
+
+
+class FixtureServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, root):
+        self.root = root
+        self.requests = []
+        self.statuses = []
+        self.delay = 0
+        self.range_start = None
+        self.lock = threading.Lock()
+        HTTPServer.__init__(self, ('127.0.0.1', 0), FixtureRequestHandler)
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{}/'.format(self.server_address[1])
+
+    def request_count(self, suffix=''):
+        with self.lock:
+            return len([path for path in self.requests if path.endswith(suffix)])
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
+
+
+class FixtureRequestHandler(SimpleHTTPRequestHandler):
+    def translate_path(self, path):
+        path = path.split('?', 1)[0].split('#', 1)[0]
+        return os.path.join(self.server.root, *[part for part in path.split('/') if part and part not in ('.', '..')])
+
+    def send_head(self):
+        with self.server.lock:
+            self.server.requests.append(self.path)
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        path = self.translate_path(self.path)
+        if_modified_since = parsedate_tz(self.headers.get('If-Modified-Since') or '')
+        if if_modified_since is not None and os.path.isfile(path) and int(os.path.getmtime(path)) <= mktime_tz(if_modified_since):
+            self.send_response(304)
+            self.end_headers()
+            return None
+
+        byte_range = RANGE_RE.match(self.headers.get('Range') or '')
+        if byte_range and os.path.isfile(path):
+            return self.send_range(path, int(byte_range.group(1)) if self.server.range_start is None else self.server.range_start)
+        return SimpleHTTPRequestHandler.send_head(self)
+
+    def send_range(self, path, start):
+        with open(path, 'rb') as f:
+            content = f.read()
+        if start >= len(content):
+            self.send_response(416)
+            self.send_header('Content-Range', 'bytes */{}'.format(len(content)))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+
+        self.send_response(206)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, len(content) - 1, len(content)))
+        self.send_header('Content-Length', str(len(content) - start))
+        self.end_headers()
+        return io.BytesIO(content[start:])
+
+    def log_request(self, code='-', size='-'):
+        with self.server.lock:
+            self.server.statuses.append((self.path, int(code)))
+
+    def log_message(self, format, *args):
+        pass
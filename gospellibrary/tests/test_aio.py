@@ -0,0 +1,43 @@
+import shutil
+import sys
+import tempfile
+import unittest
+from gospellibrary.tests.fixtures import FixtureServer, create_site, item_id
+
+aio_scenarios = None
+if sys.version_info >= (3, 5):
+    try:
+        import asyncio
+        from gospellibrary.tests import aio_scenarios
+    except ImportError:
+        pass
+
+
+@unittest.skipIf(aio_scenarios is None, 'aiohttp is not installed')
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache_path = tempfile.mkdtemp()
+        create_site(self.root)
+        self.server = FixtureServer(self.root).__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.cache_path)
+
+    def run_scenario(self, scenario):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(scenario(self, self.server.base_url, self.cache_path))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def test_catalog_and_item_package(self):
+        self.run_scenario(aio_scenarios.catalog_and_item_package)
+
+    def test_single_flight(self):
+        self.run_scenario(aio_scenarios.single_flight)
+        self.assertEqual(self.server.request_count('/{}/1.xz'.format(item_id(0))), 1)
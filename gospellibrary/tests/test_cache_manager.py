@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import unittest
+from gospellibrary import cache_manager
+from gospellibrary.cache_manager import CacheManager
+from gospellibrary.item_packages import ItemPackage, item_package_path
+from gospellibrary.tests.fixtures import FixtureServer, create_item_package, create_site, item_id
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+        self.paths = []
+        for index in range(4):
+            path = create_item_package(item_package_path(item_id(index), 1, cache_path=self.cache_path), item_index=index)
+            os.utime(path, (1000 + index, 1000 + index))
+            self.paths.append(path)
+        self.package_bytes = os.path.getsize(self.paths[0])
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_path)
+
+    def test_lru_eviction(self):
+        manager = CacheManager(max_bytes=self.package_bytes * 2, cache_path=self.cache_path, touch_interval=0)
+        with ItemPackage(item_id=item_id(1), item_version=1, cache_path=self.cache_path, cache_manager=manager) as item_package:
+            self.assertEqual(item_package.file_id(), 'file-eng-1')
+
+            evicted = manager.evict()
+
+        self.assertEqual([entry['path'] for entry in evicted], [self.paths[0], self.paths[2]])
+        self.assertEqual([os.path.isfile(path) for path in self.paths], [False, True, False, True])
+        self.assertFalse(os.path.exists(os.path.dirname(os.path.dirname(self.paths[0]))))
+
+        stats = manager.stats()
+        self.assertEqual((stats['entries'], stats['hits'], stats['misses'], stats['hit_rate'], stats['evictions']), (2, 1, 0, 1.0, 2))
+        self.assertLessEqual(stats['bytes'], manager.max_bytes)
+
+    def test_open_packages_are_not_evicted(self):
+        manager = CacheManager(max_bytes=0, cache_path=self.cache_path)
+        item_package = ItemPackage(item_id=item_id(0), item_version=1, cache_path=self.cache_path)
+        self.assertTrue(item_package.exists())
+
+        self.assertEqual(len(manager.evict()), 3)
+        self.assertTrue(os.path.isfile(self.paths[0]))
+
+        item_package.close()
+        self.assertEqual(len(manager.evict()), 1)
+        self.assertEqual(manager.stats()['entries'], 0)
+
+    def test_evict_after_download(self):
+        root = tempfile.mkdtemp()
+        try:
+            create_site(root, item_count=5)
+            with FixtureServer(root) as server:
+                manager = CacheManager(max_bytes=self.package_bytes * 2, cache_path=self.cache_path)
+                with ItemPackage(item_id=item_id(4), item_version=1, base_url=server.base_url, cache_path=self.cache_path, cache_manager=manager) as item_package:
+                    self.assertEqual(item_package.file_id(), 'file-eng-4')
+        finally:
+            shutil.rmtree(root)
+
+        self.assertEqual(manager.misses, 1)
+        self.assertEqual([os.path.isfile(path) for path in self.paths], [False, False, False, True])
+        self.assertTrue(os.path.isfile(item_package_path(item_id(4), 1, cache_path=self.cache_path)))
+
+    def test_index_is_loaded_once(self):
+        sized = []
+        directory_size = cache_manager.directory_size
+        cache_manager.directory_size = lambda path: sized.append(path) or directory_size(path)
+        root = tempfile.mkdtemp()
+        try:
+            manager = CacheManager(max_bytes=self.package_bytes * 2, cache_path=self.cache_path)
+            self.assertEqual(manager.stats()['entries'], 4)
+            self.assertEqual(len(sized), 4)
+
+            create_site(root, item_count=6)
+            with FixtureServer(root) as server:
+                for index in (4, 5):
+                    with ItemPackage(item_id=item_id(index), item_version=1, base_url=server.base_url, cache_path=self.cache_path, cache_manager=manager) as item_package:
+                        self.assertEqual(item_package.file_id(), 'file-eng-{}'.format(index))
+        finally:
+            cache_manager.directory_size = directory_size
+            shutil.rmtree(root)
+
+        self.assertEqual(len(sized), 6)
+        self.assertEqual(manager.stats()['entries'], 2)
+        self.assertEqual([os.path.isfile(path) for path in self.paths], [False] * 4)
+
+        create_item_package(self.paths[0], item_index=0)
+        self.assertEqual(manager.stats()['entries'], 2)
+        manager.refresh()
+        self.assertEqual(manager.stats()['entries'], 3)
+
+    def test_other_processes(self):
+        manager = CacheManager(max_bytes=self.package_bytes * 3, cache_path=self.cache_path, rescan_interval=3600)
+        self.assertEqual(manager.stats()['entries'], 4)
+
+        shutil.rmtree(os.path.dirname(self.paths[0]))
+        evicted = manager.evict()
+        self.assertEqual(evicted, [])
+        self.assertEqual((manager.stats()['entries'], manager.evictions), (3, 0))
+
+        for index in (4, 5):
+            path = create_item_package(item_package_path(item_id(index), 1, cache_path=self.cache_path), item_index=index)
+            os.utime(path, (2000 + index, 2000 + index))
+        self.assertEqual(manager.evict(), [])
+
+        manager.rescan_interval = 0
+        evicted = manager.evict()
+        self.assertEqual([entry['path'] for entry in evicted], self.paths[1:3])
+        self.assertEqual(manager.stats()['entries'], 3)
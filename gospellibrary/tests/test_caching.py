@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+import unittest
+from gospellibrary.caching import LRUCache
+from gospellibrary import catalogs
+from gospellibrary.catalogs import CatalogDB, catalog_path
+from gospellibrary.item_packages import ItemPackage, item_package_path
+from gospellibrary.tests.fixtures import create_catalog, create_item_package, item_id
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+        create_catalog(catalog_path(1, cache_path=self.cache_path))
+        create_catalog(catalog_path(2, cache_path=self.cache_path), item_versions={0: 2})
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_path)
+
+    def test_lru_eviction(self):
+        cache = LRUCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.stats(), dict(entries=2, bytes=cache.bytes, hits=3, misses=1, evictions=1, invalidations=0))
+
+    def test_byte_budget(self):
+        cache = LRUCache(max_bytes=1000)
+        cache.put('a', 'x' * 600)
+        cache.put('b', 'y' * 600)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 'y' * 600)
+        self.assertLessEqual(cache.bytes, 1000)
+
+        cache.put('c', 'z' * 2000)
+        self.assertIsNone(cache.get('c'))
+        self.assertEqual(len(cache), 1)
+
+    def test_catalog_queries(self):
+        cache = LRUCache()
+        with CatalogDB(catalog_version=1, cache_path=self.cache_path, cache=cache) as catalog:
+            item = catalog.item(uri='/scriptures/book-0')
+            self.assertEqual(catalog.item(uri='/scriptures/book-0'), item)
+            self.assertEqual(catalog.sections(1), catalog.sections(1))
+            self.assertEqual(cache.stats()['hits'], 2)
+            self.assertEqual(cache.stats()['misses'], 2)
+
+        with CatalogDB(catalog_version=2, cache_path=self.cache_path, cache=cache) as catalog:
+            self.assertEqual(cache.stats()['entries'], 0)
+            self.assertEqual(cache.stats()['invalidations'], 2)
+            self.assertEqual(catalog.item(uri='/scriptures/book-0')['version'], 2)
+            self.assertEqual(catalog.item(item_id(0))['version'], 2)
+
+    def test_results_are_copies(self):
+        cache = LRUCache()
+        with CatalogDB(catalog_version=1, cache_path=self.cache_path, cache=cache) as catalog:
+            items = catalog.items()
+            del items[:]
+            self.assertEqual(len(catalog.items()), 3)
+            self.assertIsNot(catalog.item(item_id(0)), catalog.item(item_id(0)))
+            catalog.item(item_id(0))['item_cover_renditions'].pop()
+            self.assertEqual(len(catalog.item(item_id(0))['item_cover_renditions']), 2)
+
+        create_item_package(item_package_path(item_id(0), 1, cache_path=self.cache_path))
+        with ItemPackage(item_id=item_id(0), item_version=1, cache_path=self.cache_path, cache=cache) as item_package:
+            item_package.subitems()[0]['title'] = 'Changed'
+            self.assertEqual(item_package.subitems()[0]['title'], 'Chapter 1')
+
+    def test_rows_are_sized_without_parsing_renditions(self):
+        parsed = []
+        parse_renditions = catalogs.parse_renditions
+        catalogs.parse_renditions = lambda value, base_url: parsed.append(value) or parse_renditions(value, base_url)
+        try:
+            cache = LRUCache()
+            with CatalogDB(catalog_version=1, cache_path=self.cache_path, cache=cache) as catalog:
+                catalog.items()
+                self.assertGreater(cache.bytes, 0)
+                self.assertEqual(parsed, [])
+        finally:
+            catalogs.parse_renditions = parse_renditions
@@ -0,0 +1,85 @@
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from gospellibrary.catalogs import CatalogDB, catalog_path
+from gospellibrary.tests.fixtures import create_catalog, item_id
+
+try:
+    from urllib.parse import urljoin
+except ImportError:
+    from urlparse import urljoin
+
+
+def legacy_dict_factory(cursor, row):
+    obj = {}
+    for i, column in enumerate(cursor.description):
+        name = column[0]
+        value = row[i]
+        if name not in obj:
+            if name in ['version', 'latest_version'] and value is not None:
+                obj['version'] = value
+            if name in ['cover_renditions', 'item_cover_renditions'] and value is not None:
+                renditions = []
+                for rendition in value.splitlines():
+                    size, url = rendition.split(',', 1)
+                    width, height = size.split('x', 1)
+                    renditions.append(dict(width=width, height=height, url=urljoin('https://edge.ldscdn.org/mobile/GospelStudy/production/v4', url)))
+                obj[name] = renditions
+                obj['raw_' + name] = value
+            else:
+                obj[name] = value
+    return obj
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+        self.path = create_catalog(catalog_path(1, cache_path=self.cache_path), item_versions={1: 3})
+        self.catalog = CatalogDB(catalog_version=1, cache_path=self.cache_path)
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.cache_path)
+
+    def legacy(self, sql, parameters=()):
+        with sqlite3.connect(self.path) as db:
+            db.row_factory = legacy_dict_factory
+            return db.execute(sql, parameters).fetchall()
+
+    def test_rows_match_dicts(self):
+        self.assertEqual(self.catalog.items(), self.legacy('''SELECT item.*, library_item.* FROM library_item INNER JOIN item ON library_item.item_id=item.id ORDER BY external_id'''))
+        self.assertEqual(self.catalog.collections([10]), self.legacy('''SELECT * FROM library_collection WHERE library_section_id IN (10) ORDER BY position'''))
+        self.assertEqual(self.catalog.collection(1), self.legacy('''SELECT * FROM library_collection WHERE id=1''')[0])
+        self.assertEqual(self.catalog.sections(2), self.legacy('''SELECT * FROM library_section WHERE library_collection_id=2 ORDER BY position'''))
+        self.assertEqual(dict(self.catalog.item(item_id(1))), self.legacy('''SELECT * FROM item WHERE id=?''', [item_id(1)])[0])
+
+    def test_row_access(self):
+        item = self.catalog.item(item_id(1))
+
+        self.assertEqual(item['version'], 3)
+        self.assertEqual(item.get('missing', 'default'), 'default')
+        self.assertNotIn('raw_cover_renditions', item)
+        self.assertEqual(item['raw_item_cover_renditions'], '60x80,book-1/60x80.jpg\n120x160,book-1/120x160.jpg')
+        self.assertIs(item['item_cover_renditions'], item['item_cover_renditions'])
+        self.assertEqual(item['item_cover_renditions'][1], dict(width='120', height='160', url='https://edge.ldscdn.org/mobile/GospelStudy/production/book-1/120x160.jpg'))
+        with self.assertRaises(KeyError):
+            item['missing']
+
+        root = self.catalog.collection(1)
+        self.assertIsNone(root['cover_renditions'])
+        self.assertNotIn('raw_cover_renditions', root)
+
+    def test_batch_lookups(self):
+        items = self.catalog.items_by_ids([item_id(2), str(item_id(0)), 99, item_id(2), 'book-1', None, item_id(0)], batch_size=2)
+        self.assertEqual(list(items), [item_id(2), str(item_id(0)), 99, 'book-1', None, item_id(0)])
+        self.assertEqual(items[str(item_id(0))], self.catalog.item(item_id(0)))
+        self.assertEqual(items[item_id(0)], self.catalog.item(item_id(0)))
+        self.assertEqual(items[item_id(2)]['uri'], '/scriptures/book-2')
+        self.assertIsNone(items[99])
+        self.assertIsNone(items['book-1'])
+        self.assertIsNone(items[None])
+
+        items = self.catalog.items_by_uris(['/scriptures/missing', '/scriptures/book-1', '/scriptures/book-0'], batch_size=1)
+        self.assertEqual([(uri, item and item['id']) for uri, item in items.items()], [('/scriptures/missing', None), ('/scriptures/book-1', item_id(1)), ('/scriptures/book-0', item_id(0))])
+        self.assertEqual(len(self.catalog.items_by_uris([])), 0)
@@ -0,0 +1,75 @@
+import gc
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from gospellibrary.connections import ConnectionPool, connect_query_only
+from gospellibrary.item_packages import ItemPackage
+from gospellibrary.tests.fixtures import create_item_package, item_id
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+        self.item_id = str(item_id(0))
+        self.path = create_item_package(os.path.join(self.cache_path, 'v4', 'languages', 'eng', 'item_packages', self.item_id, '1', 'Package.sqlite'))
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_path)
+
+    def test_read_only(self):
+        with ConnectionPool(self.path) as db:
+            with self.assertRaises(sqlite3.OperationalError):
+                db.connection().execute('''DELETE FROM subitem''')
+
+    def test_query_only(self):
+        db = connect_query_only(self.path)
+        try:
+            self.assertEqual(db.execute('''SELECT COUNT(*) FROM subitem''').fetchone()[0], 3)
+            with self.assertRaises(sqlite3.OperationalError):
+                db.execute('''DELETE FROM subitem''')
+        finally:
+            db.close()
+
+    def test_connection_per_thread(self):
+        with ConnectionPool(self.path) as db:
+            self.assertIs(db.connection(), db.connection())
+
+            connections = []
+            thread = threading.Thread(target=lambda: connections.append(db.connection()))
+            thread.start()
+            thread.join()
+            self.assertIsNot(connections[0], db.connection())
+
+    def test_thread_exit_releases_connection(self):
+        with ConnectionPool(self.path) as db:
+            connections = []
+            for _ in range(3):
+                thread = threading.Thread(target=lambda: connections.append(db.connection()))
+                thread.start()
+                thread.join()
+            gc.collect()
+            for connection in connections:
+                with self.assertRaises(sqlite3.ProgrammingError):
+                    connection.execute('''SELECT 1''')
+            self.assertEqual(db.fetchone('''SELECT COUNT(*) FROM subitem''')[0], 3)
+
+    def test_close(self):
+        db = ConnectionPool(self.path)
+        connection = db.connection()
+        db.close()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            connection.execute('''SELECT 1''')
+        self.assertEqual(db.fetchone('''SELECT COUNT(*) FROM subitem''')[0], 3)
+        db.close()
+
+    def test_item_package(self):
+        with ItemPackage(item_id=self.item_id, item_version=1, cache_path=self.cache_path) as item_package:
+            self.assertEqual(item_package.file_id(), 'file-eng-0')
+            self.assertEqual(len(item_package.subitems()), 3)
+            self.assertEqual(item_package.subitem(uri='/scriptures/book-0/2')['title'], 'Chapter 2')
+            self.assertTrue(item_package.html(subitem_uri='/scriptures/book-0/1', paragraph_id='p3').startswith('<p class="verse" data-aid="1000003" id="p3">'))
+        self.assertEqual(item_package.file_id(), 'file-eng-0')
+        item_package.close()
@@ -0,0 +1,81 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from gospellibrary.catalogs import CatalogDB
+from gospellibrary.export import FORMAT_PARQUET, export_language
+from gospellibrary.item_packages import ItemPackage
+from gospellibrary.tests.fixtures import FixtureServer, create_site, item_id
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache_path = tempfile.mkdtemp()
+        self.export_path = tempfile.mkdtemp()
+        create_site(self.root)
+        self.server = FixtureServer(self.root).__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.cache_path)
+        shutil.rmtree(self.export_path)
+
+    def read_ndjson(self, name):
+        with io.open(os.path.join(self.export_path, name + '.ndjson'), encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_iterators(self):
+        with CatalogDB(base_url=self.server.base_url, cache_path=self.cache_path) as catalog:
+            self.assertEqual(list(catalog.iter_items(batch_size=2)), catalog.items())
+            self.assertEqual(list(catalog.iter_items(section_ids=[20], batch_size=1)), catalog.items(section_ids=[20]))
+
+        with ItemPackage(item_id=item_id(1), item_version=1, base_url=self.server.base_url, cache_path=self.cache_path) as item_package:
+            self.assertEqual(list(item_package.iter_subitems(batch_size=2)), item_package.subitems())
+
+            paragraphs = list(item_package.iter_paragraphs(batch_size=3))
+            self.assertEqual(len(paragraphs), 30)
+            self.assertEqual([(paragraph['subitem_uri'], paragraph['paragraph_id'], paragraph['verse_number']) for paragraph in paragraphs[9:11]], [('/scriptures/book-1/1', 'p10', '10'), ('/scriptures/book-1/2', 'p1', '1')])
+            self.assertEqual(paragraphs[12]['html'], item_package.html(subitem_uri='/scriptures/book-1/2', paragraph_id='p3'))
+            self.assertEqual(len(list(item_package.iter_paragraphs('/scriptures/book-1/3'))), 10)
+            self.assertEqual(list(item_package.iter_paragraphs('/scriptures/missing')), [])
+
+    def test_export_ndjson(self):
+        stats = export_language(self.export_path, item_filter=lambda item: item['id'] != item_id(2), batch_size=4, base_url=self.server.base_url, cache_path=self.cache_path)
+        self.assertEqual(stats, dict(items=2, missing=0, subitems=6, paragraphs=60))
+
+        items = self.read_ndjson('items')
+        self.assertEqual([(item['id'], item['uri'], item['version']) for item in items], [(item_id(0), '/scriptures/book-0', 1), (item_id(1), '/scriptures/book-1', 1)])
+        subitems = self.read_ndjson('subitems')
+        self.assertEqual([(subitem['item_id'], subitem['uri']) for subitem in subitems[2:4]], [(item_id(0), '/scriptures/book-0/3'), (item_id(1), '/scriptures/book-1/1')])
+        paragraphs = self.read_ndjson('paragraphs')
+        self.assertEqual(paragraphs[-1]['item_id'], item_id(1))
+        self.assertIn('eng verse 10 of chapter 3 in book 1', paragraphs[-1]['html'])
+
+    def test_export_missing_package(self):
+        os.remove(os.path.join(self.root, 'v4', 'languages', 'eng', 'item-packages', str(item_id(0)), '1.xz'))
+        stats = export_language(self.export_path, base_url=self.server.base_url, cache_path=self.cache_path)
+        self.assertEqual((stats['items'], stats['missing']), (2, 1))
+        self.assertEqual(len(self.read_ndjson('paragraphs')), 60)
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            export_language(self.export_path, format='xml', base_url=self.server.base_url, cache_path=self.cache_path)
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_export_parquet(self):
+        stats = export_language(self.export_path, format=FORMAT_PARQUET, batch_size=7, base_url=self.server.base_url, cache_path=self.cache_path)
+        self.assertEqual(stats['paragraphs'], 90)
+
+        table = pyarrow.parquet.read_table(os.path.join(self.export_path, 'paragraphs.parquet'))
+        self.assertEqual(table.num_rows, 90)
+        self.assertEqual(table.column('paragraph_id').to_pylist()[:2], ['p1', 'p2'])
+        self.assertEqual(pyarrow.parquet.read_table(os.path.join(self.export_path, 'items.parquet')).column('id').to_pylist(), [item_id(i) for i in range(3)])
@@ -0,0 +1,93 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+try:
+    import lzma
+except ImportError:
+    from backports import lzma
+
+from gospellibrary.catalogs import CatalogDB
+from gospellibrary.fetch import decompress_chunks, fetch_xz
+from gospellibrary.item_packages import ItemPackage
+from gospellibrary.tests.fixtures import FixtureServer, create_site, fork_pool, item_id
+import requests
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache_path = tempfile.mkdtemp()
+        create_site(self.root)
+        self.server = FixtureServer(self.root).__enter__()
+        self.session = requests.Session()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.cache_path)
+
+    def test_fetch_xz(self):
+        path = os.path.join(self.cache_path, 'catalogs', '1', 'Catalog.sqlite')
+        self.assertEqual(fetch_xz(self.session, self.server.base_url + 'v4/languages/eng/catalogs/1.xz', path, chunk_size=1024), path)
+
+        with sqlite3.connect(path) as db:
+            self.assertEqual(db.execute('SELECT COUNT(*) FROM item').fetchone()[0], 3)
+        self.assertEqual(sorted(os.listdir(os.path.dirname(path))), ['Catalog.sqlite', 'Catalog.sqlite.lock'])
+
+    @unittest.skipUnless(hasattr(lzma.LZMADecompressor(), 'needs_input'), 'max_length requires Python 3.5+')
+    def test_decompress_chunks_bounded(self):
+        data = b'\0' * (4 * 1024 * 1024)
+        chunks = list(decompress_chunks([lzma.compress(data)], chunk_size=64 * 1024))
+        self.assertEqual(b''.join(chunks), data)
+        self.assertEqual(max(len(chunk) for chunk in chunks), 64 * 1024)
+
+    def test_fetch_xz_missing(self):
+        path = os.path.join(self.cache_path, 'catalogs', '2', 'Catalog.sqlite')
+        self.assertIsNone(fetch_xz(self.session, self.server.base_url + 'v4/languages/eng/catalogs/2.xz', path))
+        self.assertFalse(os.path.exists(path))
+
+    def test_fetch_xz_truncated(self):
+        xz_path = os.path.join(self.root, 'v4', 'languages', 'eng', 'catalogs', '1.xz')
+        with open(xz_path, 'rb') as f:
+            data = f.read()
+        with open(xz_path, 'wb') as f:
+            f.write(data[:len(data) // 2])
+
+        path = os.path.join(self.cache_path, 'catalogs', '1', 'Catalog.sqlite')
+        with self.assertRaises(Exception):
+            fetch_xz(self.session, self.server.base_url + 'v4/languages/eng/catalogs/1.xz', path)
+        self.assertEqual(os.listdir(os.path.dirname(path)), ['Catalog.sqlite.lock'])
+
+    def test_catalog_and_item_package(self):
+        catalog = CatalogDB(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path)
+        self.assertEqual(catalog.catalog_version, 1)
+        self.assertEqual(catalog.item(uri='/scriptures/book-0')['id'], item_id(0))
+
+        item_package = ItemPackage(item_id=str(item_id(0)), item_version=1, base_url=self.server.base_url, session=self.session, cache_path=self.cache_path)
+        self.assertTrue(item_package.exists())
+        self.assertEqual(item_package.file_id(), 'file-eng-0')
+
+    def test_concurrent_processes_download_once(self):
+        self.server.delay = 0.3
+        url = self.server.base_url + 'v4/languages/eng/item-packages/{}/1.xz'.format(item_id(0))
+        path = os.path.join(self.cache_path, 'item_packages', str(item_id(0)), '1', 'Package.sqlite')
+
+        pool = fork_pool(4)
+        try:
+            results = pool.map(fetch_file_id, [(url, path)] * 4)
+        finally:
+            pool.close()
+            pool.join()
+
+        self.assertEqual(results, ['file-eng-0'] * 4)
+        self.assertEqual(self.server.request_count('.xz'), 1)
+
+
+def fetch_file_id(arguments):
+    (url, path) = arguments
+    fetch_xz(requests.Session(), url, path)
+    with sqlite3.connect(path) as db:
+        return db.execute('''SELECT value FROM metadata WHERE key='file_id' ''').fetchone()[0]
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from gospellibrary.catalogs import CatalogDB, CatalogWatcher, current_catalog_version, get_languages
+from gospellibrary.http_cache import metadata_path
+from gospellibrary.tests.fixtures import FixtureServer, create_site
+import requests
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache_path = tempfile.mkdtemp()
+        create_site(self.root)
+        self.server = FixtureServer(self.root).__enter__()
+        self.session = requests.Session()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.cache_path)
+
+    def set_catalog_version(self, catalog_version):
+        index_path = os.path.join(self.root, 'v4', 'languages', 'eng', 'index.json')
+        with open(index_path, 'w') as f:
+            json.dump(dict(catalogVersion=catalog_version), f)
+        modified = time.time() + 10 * catalog_version
+        os.utime(index_path, (modified, modified))
+
+    def test_revalidation(self):
+        self.assertEqual(current_catalog_version(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path), 1)
+        self.assertEqual(current_catalog_version(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path), 1)
+        self.assertEqual([status for (_, status) in self.server.statuses], [200, 304])
+        self.assertTrue(os.path.isfile(metadata_path(self.server.base_url + 'v4/languages/eng/index.json', cache_path=self.cache_path)))
+
+        self.set_catalog_version(2)
+        self.assertEqual(current_catalog_version(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path), 2)
+        self.assertEqual([status for (_, status) in self.server.statuses], [200, 304, 200])
+
+    def test_ttl(self):
+        languages = get_languages(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path, ttl=60)
+        self.assertEqual(get_languages(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path, ttl=60), languages)
+        self.assertEqual(self.server.request_count('languages.json'), 1)
+
+    def test_ttl_is_per_call(self):
+        self.assertEqual(current_catalog_version(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path, ttl=3600), 1)
+        self.set_catalog_version(2)
+        self.assertEqual(current_catalog_version(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path, ttl=3600), 1)
+        self.assertEqual(current_catalog_version(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path, ttl=0), 2)
+        self.assertEqual(self.server.request_count('index.json'), 2)
+
+    def test_catalog_ttl(self):
+        with CatalogDB(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path, ttl=60) as catalog:
+            self.assertEqual(catalog.catalog_version, 1)
+        with CatalogDB(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path, ttl=60) as catalog:
+            self.assertEqual(catalog.catalog_version, 1)
+        self.assertEqual(self.server.request_count('index.json'), 1)
+
+    def test_results_are_copies(self):
+        languages = get_languages(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path, ttl=60)
+        count = len(languages)
+        del languages[:]
+        self.assertEqual(len(get_languages(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path, ttl=60)), count)
+        self.assertEqual(len(get_languages(base_url=self.server.base_url, session=self.session, cache_path=self.cache_path)), count)
+        with open(metadata_path(self.server.base_url + 'v4/languages/languages.json', cache_path=self.cache_path)) as f:
+            self.assertEqual(len(json.loads(json.load(f)['content'])), count)
+
+    def test_watcher(self):
+        changes = []
+        changed = threading.Event()
+
+        def on_change(previous_version, catalog_version):
+            changes.append((previous_version, catalog_version))
+            if catalog_version == 2:
+                changed.set()
+
+        watcher = CatalogWatcher(interval=0.05, base_url=self.server.base_url, session=self.session, cache_path=self.cache_path)
+        watcher.subscribe(on_change)
+        with watcher:
+            with watcher.catalog() as catalog:
+                self.assertEqual(catalog.catalog_version, 1)
+            self.set_catalog_version(2)
+            self.assertTrue(changed.wait(5))
+
+        self.assertEqual(changes, [(None, 1), (1, 2)])
+        self.assertEqual(watcher.catalog_version, 2)
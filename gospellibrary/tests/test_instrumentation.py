@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from gospellibrary import instrumentation
+from gospellibrary.catalogs import CatalogDB
+from gospellibrary.fetch import fetch_xz
+from gospellibrary.item_packages import ItemPackage, item_package_path
+from gospellibrary.tests.fixtures import FixtureServer, create_site, item_id
+import requests
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache_path = tempfile.mkdtemp()
+        create_site(self.root)
+        self.server = FixtureServer(self.root).__enter__()
+        self.events = []
+        self.observer = instrumentation.add_observer(self.events.append)
+        self.prometheus = instrumentation.add_observer(instrumentation.PrometheusObserver())
+
+    def tearDown(self):
+        instrumentation.remove_observer(self.observer)
+        instrumentation.remove_observer(self.prometheus)
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.cache_path)
+
+    def events_named(self, name):
+        return [event for event in self.events if event.name == name]
+
+    def test_events(self):
+        with ItemPackage(item_id=item_id(0), item_version=1, base_url=self.server.base_url, cache_path=self.cache_path) as item_package:
+            self.assertEqual(len(item_package.subitems()), 3)
+            self.assertIsNone(item_package.subitem('/scriptures/missing'))
+
+        size = os.path.getsize(item_package_path(item_id(0), 1, cache_path=self.cache_path))
+        (fetch,) = self.events_named('fetch')
+        (decompress,) = self.events_named('decompress')
+        (write,) = self.events_named('write')
+        self.assertEqual(fetch.attributes['status'], 200)
+        self.assertEqual(fetch.attributes['bytes'], decompress.attributes['compressed_bytes'])
+        self.assertEqual(decompress.attributes['bytes'], size)
+        self.assertEqual(write.attributes['bytes'], size)
+        self.assertEqual(len(self.events_named('connect')), 1)
+        self.assertEqual([event.attributes['rows'] for event in self.events_named('query')], [3, 0])
+        self.assertEqual([event.attributes['rows'] for event in self.events_named('row_build')], [3, 0])
+        self.assertTrue(all(event.elapsed >= 0 and event.error is None for event in self.events))
+
+        exposition = self.prometheus.exposition()
+        self.assertIn('gospellibrary_events_total{event="query"} 2', exposition)
+        self.assertIn('gospellibrary_event_rows_total{event="query"} 3', exposition)
+        self.assertIn('gospellibrary_event_bytes_total{event="write"} ' + str(size), exposition)
+        self.assertIn('gospellibrary_event_duration_seconds_bucket{event="connect",le="+Inf"} 1', exposition)
+
+    def test_rows_match_uninstrumented(self):
+        with CatalogDB(base_url=self.server.base_url, cache_path=self.cache_path) as catalog:
+            instrumented = catalog.items()
+            instrumentation.remove_observer(self.observer)
+            instrumentation.remove_observer(self.prometheus)
+            self.assertFalse(instrumentation.enabled())
+            self.assertIs(instrumentation.span('query'), instrumentation.NULL_SPAN)
+            catalog.close()
+            self.assertEqual(catalog.items(), instrumented)
+
+        self.assertEqual(len(self.events_named('fetch')), 2)
+        self.assertEqual(self.prometheus.snapshot()['row_build']['rows'], 3)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            with instrumentation.span('query', sql='SELECT 1'):
+                raise ValueError()
+        self.assertIsInstance(self.events[-1].error, ValueError)
+        self.assertEqual(self.prometheus.snapshot()['query']['errors'], 1)
+
+    def test_fetch_excludes_decompress_and_write(self):
+        self.server.delay = 0.2
+        path = os.path.join(self.cache_path, 'Package.sqlite')
+        start = time.time()
+        fetch_xz(requests.Session(), self.server.base_url + 'v4/languages/eng/item-packages/{}/1.xz'.format(item_id(0)), path, chunk_size=256)
+        elapsed = time.time() - start
+
+        (fetch,) = self.events_named('fetch')
+        (decompress,) = self.events_named('decompress')
+        (write,) = self.events_named('write')
+        self.assertGreaterEqual(fetch.elapsed, 0.2)
+        self.assertLessEqual(fetch.elapsed + decompress.elapsed + write.elapsed, elapsed)
+
+    def test_decompress_errors(self):
+        xz_path = os.path.join(self.root, 'v4', 'languages', 'eng', 'catalogs', '1.xz')
+        with open(xz_path, 'rb') as f:
+            data = f.read()
+        with open(xz_path, 'wb') as f:
+            f.write(data[:len(data) // 2])
+
+        with self.assertRaises(Exception):
+            fetch_xz(requests.Session(), self.server.base_url + 'v4/languages/eng/catalogs/1.xz', os.path.join(self.cache_path, 'Catalog.sqlite'))
+        (decompress,) = self.events_named('decompress')
+        self.assertIsNotNone(decompress.error)
+        self.assertEqual(decompress.attributes['compressed_bytes'], len(data) // 2)
+        self.assertEqual(self.prometheus.snapshot()['decompress']['errors'], 1)
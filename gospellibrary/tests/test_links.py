@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+import unittest
+from gospellibrary.item_packages import item_package_path
+from gospellibrary.links import LinkIndex, parse_links
+from gospellibrary.tests.fixtures import create_item_package, item_id
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+        for index in range(3):
+            create_item_package(item_package_path(item_id(index), 1, cache_path=self.cache_path), item_index=index)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_path)
+
+    def test_parse_links(self):
+        html = ('<p><a class="scripture-ref" href="gospellibrary://content/scriptures/dc-testament/dc/84?verse=45&amp;context=1#p45">D&amp;C 84:45</a>; '
+                '<a href="gospellibrary://content/scriptures/bofm/alma/32" class="scripture-ref">Alma 32</a>; '
+                '<a class="study-note-ref" href="#note1a">a</a></p>')
+        self.assertEqual(list(parse_links(html)), [('/scriptures/dc-testament/dc/84', 'p45'), ('/scriptures/bofm/alma/32', None)])
+
+    def test_citations_and_references(self):
+        with LinkIndex(cache_path=self.cache_path) as index:
+            self.assertEqual(index.update(), dict(indexed=3, removed=0, unchanged=0))
+
+            self.assertEqual(len(index.citations_of('/scriptures/dc-testament/dc/84', 'p45')), 90)
+            self.assertEqual(len(index.citations_of('/scriptures/dc-testament/dc/84')), 90)
+            self.assertEqual(index.citations_of('/scriptures/book-1/2', 'p7'), [dict(source_uri='/scriptures/book-0/2', source_paragraph_id='p7', ref_id='note7a', target_uri='/scriptures/book-1/2', target_paragraph_id='p7')])
+
+            references = index.references_from('/scriptures/book-0/1', 'p3')
+            self.assertEqual([(reference['target_uri'], reference['target_paragraph_id']) for reference in references], [('/scriptures/book-1/1', 'p3'), ('/scriptures/dc-testament/dc/84', 'p45')])
+            self.assertEqual(len(index.references_from('/scriptures/book-0/1')), 20)
+            self.assertEqual(index.references_from('/scriptures/missing'), [])
+
+    def test_incremental_update(self):
+        with LinkIndex(cache_path=self.cache_path) as index:
+            index.update()
+            self.assertEqual(index.update(), dict(indexed=0, removed=0, unchanged=3))
+
+            create_item_package(item_package_path(item_id(1), 2, cache_path=self.cache_path), item_index=1, paragraph_count=20)
+            shutil.rmtree(os.path.dirname(os.path.dirname(item_package_path(item_id(2), 1, cache_path=self.cache_path))))
+            self.assertEqual(index.update(), dict(indexed=1, removed=1, unchanged=1))
+
+            self.assertEqual(len(index.citations_of('/scriptures/dc-testament/dc/84', 'p45')), 90)
+            self.assertEqual(len(index.references_from('/scriptures/book-1/1')), 40)
+            self.assertEqual(index.references_from('/scriptures/book-2/1'), [])
@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from gospellibrary.item_packages import ItemPackage, item_package_path
+from gospellibrary.media import MediaManifest, RateLimiter, content_range, download_media, media_path
+from gospellibrary.tests.fixtures import FixtureServer, create_item_package, create_media, item_id, media_content
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache_path = tempfile.mkdtemp()
+        for index in range(3):
+            create_item_package(item_package_path(item_id(index), 1, cache_path=self.cache_path), item_index=index)
+        create_media(self.root, size=16 * 1024, missing=('media/eng/{}.jpg'.format(item_id(2) * 1000 + 2),))
+        self.server = FixtureServer(self.root).__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.cache_path)
+
+    def manifest(self):
+        return MediaManifest(base_url=self.server.base_url, cache_path=self.cache_path)
+
+    def test_media_items(self):
+        with ItemPackage(item_id=item_id(0), item_version=1, cache_path=self.cache_path) as item_package:
+            media_items = item_package.media_items()
+            self.assertEqual([(media_item['kind'], media_item['subitem_uri']) for media_item in media_items], [('audio', '/scriptures/book-0/1'), ('audio', '/scriptures/book-0/2'), ('audio', '/scriptures/book-0/3'), ('video', '/scriptures/book-0/1'), ('video', '/scriptures/book-0/2'), ('video', '/scriptures/book-0/3')])
+            self.assertEqual(media_items[0]['media_url'], 'media/eng/{}.mp3'.format(item_id(0) * 1000))
+            self.assertEqual(media_items[3]['video_id'], str(item_id(0) * 1000))
+
+    def test_manifest(self):
+        with self.manifest() as manifest:
+            self.assertEqual(manifest.update(), dict(indexed=3, removed=0, unchanged=0))
+            self.assertEqual(manifest.update(), dict(indexed=0, removed=0, unchanged=3))
+
+            self.assertEqual(len(manifest.media()), 18)
+            self.assertEqual(len(manifest.media(kind='audio')), 9)
+            self.assertEqual(len(manifest.media(item_id=item_id(1))), 6)
+            self.assertEqual(manifest.media(kind='video', uri_prefix='/scriptures/book-2/3'), [dict(item_id=str(item_id(2)), subitem_uri='/scriptures/book-2/3', kind='video', url=self.server.base_url + 'media/eng/{}.jpg'.format(item_id(2) * 1000 + 2), video_id=str(item_id(2) * 1000 + 2), title='Video 3')])
+            self.assertEqual(manifest.urls(item_id=item_id(0), kind='audio'), [self.server.base_url + 'media/eng/{}.mp3'.format(item_id(0) * 1000 + i) for i in range(3)])
+
+        os.remove(item_package_path(item_id(1), 1, cache_path=self.cache_path))
+        with self.manifest() as manifest:
+            self.assertEqual(manifest.update(), dict(indexed=0, removed=1, unchanged=2))
+            self.assertEqual(manifest.media(item_id=item_id(1)), [])
+
+    def test_download(self):
+        with self.manifest() as manifest:
+            manifest.update()
+            urls = manifest.urls()
+
+        events = []
+        result = download_media(urls, cache_path=self.cache_path, max_workers=4, retries=0, progress=events.append)
+        self.assertEqual((result.downloaded, result.missing, result.failed), (17, 1, 0))
+        self.assertEqual(result.bytes_downloaded, 17 * 16 * 1024)
+        self.assertEqual(len(events), 18)
+        for url in urls[:3]:
+            with open(media_path(url, cache_path=self.cache_path), 'rb') as f:
+                self.assertEqual(f.read(), media_content(url[len(self.server.base_url):], 16 * 1024))
+
+        result = download_media(urls, cache_path=self.cache_path, retries=0)
+        self.assertEqual((result.skipped, result.missing, result.bytes_downloaded), (17, 1, 0))
+        self.assertEqual(self.server.request_count('.mp3'), 9)
+
+    def test_resume(self):
+        url = self.server.base_url + 'media/eng/{}.mp3'.format(item_id(0) * 1000)
+        content = media_content(url[len(self.server.base_url):], 16 * 1024)
+        path = media_path(url, cache_path=self.cache_path)
+        os.makedirs(os.path.dirname(path))
+        with open(path + '.part', 'wb') as f:
+            f.write(content[:5000])
+
+        result = download_media([url], cache_path=self.cache_path)
+        self.assertEqual((result.resumed, result.bytes_downloaded), (1, len(content) - 5000))
+        self.assertEqual(self.server.statuses[-1][1], 206)
+        self.assertFalse(os.path.exists(path + '.part'))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), content)
+
+        os.rename(path, path + '.part')
+        result = download_media([url], cache_path=self.cache_path)
+        self.assertEqual((result.resumed, result.bytes_downloaded), (1, 0))
+        self.assertEqual(self.server.statuses[-1][1], 416)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), content)
+
+    def test_resume_mismatched_range(self):
+        url = self.server.base_url + 'media/eng/{}.mp3'.format(item_id(1) * 1000)
+        content = media_content(url[len(self.server.base_url):], 16 * 1024)
+        path = media_path(url, cache_path=self.cache_path)
+        os.makedirs(os.path.dirname(path))
+        with open(path + '.part', 'wb') as f:
+            f.write(content + b'stale')
+
+        result = download_media([url], cache_path=self.cache_path, retries=0)
+        self.assertEqual((result.downloaded, result.resumed, result.bytes_downloaded), (1, 0, len(content)))
+        self.assertEqual([status for (_, status) in self.server.statuses[-2:]], [416, 200])
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), content)
+
+        os.remove(path)
+        with open(path + '.part', 'wb') as f:
+            f.write(content[:5000])
+        self.server.range_start = 0
+
+        result = download_media([url], cache_path=self.cache_path, retries=0)
+        self.assertEqual((result.downloaded, result.resumed, result.bytes_downloaded), (1, 0, len(content)))
+        self.assertEqual([status for (_, status) in self.server.statuses[-2:]], [206, 200])
+        self.assertFalse(os.path.exists(path + '.part'))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), content)
+
+    def test_content_range(self):
+        self.assertEqual(content_range('bytes 5000-16383/16384'), (5000, 16384))
+        self.assertEqual(content_range('bytes */16384'), (None, 16384))
+        self.assertEqual(content_range('bytes 0-9/*'), (0, None))
+        self.assertEqual(content_range(None), (None, None))
+
+    def test_bandwidth_limit(self):
+        limiter = RateLimiter(1000)
+        start = time.time()
+        for _ in range(3):
+            limiter.consume(100)
+        self.assertGreaterEqual(time.time() - start, 0.19)
+
+        urls = [self.server.base_url + 'media/eng/{}.mp3'.format(item_id(0) * 1000 + i) for i in range(3)]
+        start = time.time()
+        result = download_media(urls, cache_path=self.cache_path, bandwidth_limit=96 * 1024, chunk_size=4096)
+        self.assertEqual(result.downloaded, 3)
+        self.assertGreaterEqual(time.time() - start, 0.4)
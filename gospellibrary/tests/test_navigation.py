@@ -0,0 +1,57 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from gospellibrary.catalogs import CatalogDB, catalog_path
+from gospellibrary.navigation import CatalogTree
+from gospellibrary.tests.fixtures import create_catalog, item_id
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+        self.path = create_catalog(catalog_path(1, cache_path=self.cache_path), item_count=5)
+        with sqlite3.connect(self.path) as db:
+            db.execute('''UPDATE item SET version=NULL, latest_version=4 WHERE id=?''', [item_id(2)])
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_path)
+
+    def test_tree(self):
+        with CatalogDB(catalog_version=1, cache_path=self.cache_path) as catalog:
+            tree = catalog.tree()
+
+            root = tree.root()
+            self.assertEqual(root['id'], 1)
+            self.assertEqual([node['id'] for node in tree.children(root)], [section['id'] for section in catalog.sections(1)])
+
+            section = tree.sections[20]
+            self.assertEqual([(node['node_type'], node['id']) for node in tree.children(section)], [('item', item_id(i)) for i in range(5)])
+            self.assertEqual([node['id'] for node in tree.children(section)], [node['id'] for node in catalog.nodes([20])])
+
+            self.assertEqual([(node['node_type'], node['id']) for node in tree.ancestors(item_id(3))], [('collection', 1), ('section', 10), ('collection', 2), ('section', 20)])
+            self.assertEqual([node['id'] for node in tree.path_to('/scriptures/book-3')], [1, 10, 2, 20, item_id(3)])
+            self.assertIsNone(tree.path_to('/missing'))
+            self.assertIs(catalog.tree(), tree)
+
+    def test_snapshot(self):
+        with CatalogDB(catalog_version=1, cache_path=self.cache_path) as catalog:
+            tree = catalog.tree()
+        snapshot_path = os.path.join(os.path.dirname(self.path), 'Catalog.tree.json.gz')
+        self.assertTrue(os.path.isfile(snapshot_path))
+
+        loaded = CatalogTree.load(snapshot_path)
+        self.assertEqual(loaded.path_to('/scriptures/book-3'), tree.path_to('/scriptures/book-3'))
+        self.assertEqual(loaded.children(loaded.root()), tree.children(tree.root()))
+        self.assertEqual(len(loaded.items), 5)
+
+    def test_nodes_match_catalog_rows(self):
+        with CatalogDB(catalog_version=1, cache_path=self.cache_path) as catalog:
+            for tree in (catalog.tree(), CatalogTree.load(os.path.join(os.path.dirname(self.path), 'Catalog.tree.json.gz'))):
+                item = tree.items[item_id(2)]
+                self.assertEqual(item['version'], catalog.item(item_id(2))['version'])
+                self.assertEqual(item['version'], 4)
+                self.assertEqual(item['item_cover_renditions'], catalog.item(item_id(2))['item_cover_renditions'])
+                self.assertEqual(dict(item, node_type=None), dict(catalog.items([20])[2], node_type=None))
+                self.assertEqual(tree.collections[2]['cover_renditions'], catalog.collection(2)['cover_renditions'])
@@ -0,0 +1,35 @@
+import os
+import shutil
+import tempfile
+import unittest
+from gospellibrary.item_packages import ItemPackage
+from gospellibrary.tests.fixtures import create_item_package, item_id
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+        create_item_package(os.path.join(self.cache_path, 'v4', 'languages', 'eng', 'item_packages', str(item_id(0)), '1', 'Package.sqlite'), paragraph_count=50)
+        self.item_package = ItemPackage(item_id=str(item_id(0)), item_version=1, cache_path=self.cache_path)
+
+    def tearDown(self):
+        self.item_package.close()
+        shutil.rmtree(self.cache_path)
+
+    def test_all_paragraphs(self):
+        paragraphs = self.item_package.paragraphs('/scriptures/book-0/1')
+
+        self.assertEqual(list(paragraphs.keys()), ['p{}'.format(i) for i in range(1, 51)])
+        self.assertIsInstance(paragraphs['p17'], memoryview)
+        self.assertEqual(paragraphs['p17'].tobytes().decode('utf-8'), self.item_package.html(subitem_uri='/scriptures/book-0/1', paragraph_id='p17'))
+
+    def test_paragraph_range(self):
+        paragraphs = self.item_package.paragraphs('/scriptures/book-0/2', ['p21-p43', 'p2', 'p22'])
+
+        self.assertEqual(list(paragraphs.keys()), ['p2'] + ['p{}'.format(i) for i in range(21, 44)])
+        for paragraph_id, html in paragraphs.items():
+            self.assertEqual(html.tobytes().decode('utf-8'), self.item_package.html(subitem_uri='/scriptures/book-0/2', paragraph_id=paragraph_id))
+
+    def test_missing(self):
+        self.assertEqual(list(self.item_package.paragraphs('/scriptures/book-0/1', 'p99').keys()), [])
+        self.assertIsNone(self.item_package.paragraphs('/scriptures/book-0/99'))
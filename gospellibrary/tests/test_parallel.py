@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from gospellibrary.parallel import ParallelText, uri_prefixes
+from gospellibrary.tests.fixtures import FixtureServer, create_site, item_id
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache_path = tempfile.mkdtemp()
+        create_site(self.root, languages=('eng', 'spa', 'por'))
+        self.server = FixtureServer(self.root).__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.cache_path)
+
+    def test_uri_prefixes(self):
+        self.assertEqual(uri_prefixes('/scriptures/bofm/alma/32'), ['/scriptures', '/scriptures/bofm', '/scriptures/bofm/alma', '/scriptures/bofm/alma/32'])
+
+    def test_aligned_paragraphs(self):
+        with ParallelText('/scriptures/book-1/2', ['eng', 'spa', 'por'], base_url=self.server.base_url, cache_path=self.cache_path) as parallel_text:
+            self.assertEqual([(iso639_3_code, item['id']) for iso639_3_code, item in parallel_text.items().items()], [(iso639_3_code, item_id(1, iso639_3_code)) for iso639_3_code in ('eng', 'spa', 'por')])
+
+            paragraphs = parallel_text.paragraphs(['p3-p4'])
+            self.assertEqual(list(paragraphs), ['p3', 'p4'])
+            self.assertEqual(list(paragraphs['p3']), ['eng', 'spa', 'por'])
+            for iso639_3_code, html in paragraphs['p4'].items():
+                self.assertIn('{} verse 4 of chapter 2 in book 1'.format(iso639_3_code), html.tobytes().decode('utf-8'))
+
+            self.assertEqual(len(parallel_text.paragraphs()), 10)
+
+    def test_threads_are_reused(self):
+        with ParallelText('/scriptures/book-1/2', ['eng', 'spa', 'por'], base_url=self.server.base_url, cache_path=self.cache_path) as parallel_text:
+            thread_count = threading.active_count()
+            for _ in range(10):
+                parallel_text.paragraphs(['p1'])
+            self.assertLessEqual(threading.active_count(), thread_count + 3)
+
+    def test_missing_language_item(self):
+        os.remove(os.path.join(self.root, 'v4', 'languages', 'spa', 'item-packages', str(item_id(0, 'spa')), '1.xz'))
+        with ParallelText('/scriptures/book-0/1', ['eng', 'spa'], base_url=self.server.base_url, cache_path=self.cache_path) as parallel_text:
+            paragraphs = parallel_text.paragraphs(['p1'])
+            self.assertIsNotNone(paragraphs['p1']['eng'])
+            self.assertIsNone(paragraphs['p1']['spa'])
+
+        with ParallelText('/scriptures/missing/1', ['eng'], base_url=self.server.base_url, cache_path=self.cache_path) as parallel_text:
+            self.assertEqual(parallel_text.items(), dict(eng=None))
+            self.assertEqual(len(parallel_text.paragraphs()), 0)
+
+    def test_languages_are_fetched_concurrently(self):
+        self.server.delay = 0.2
+        start = time.time()
+        with ParallelText('/scriptures/book-2/3', ['eng', 'spa', 'por'], base_url=self.server.base_url, cache_path=self.cache_path) as parallel_text:
+            self.assertEqual(len(parallel_text.paragraphs()), 10)
+        self.assertEqual(self.server.request_count('.xz'), 6)
+        self.assertLess(time.time() - start, 6 * self.server.delay)
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+from gospellibrary.catalogs import CatalogDB, catalog_path
+from gospellibrary.item_packages import cached_item_packages, item_package_path
+from gospellibrary.pruning import cached_catalog_versions, prune_language
+from gospellibrary.tests.fixtures import create_catalog, create_item_package, item_id
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+        create_catalog(catalog_path(1, cache_path=self.cache_path), item_count=3)
+        create_catalog(catalog_path(2, cache_path=self.cache_path), item_count=4, item_versions={1: 2})
+        create_catalog(catalog_path(3, cache_path=self.cache_path), item_count=4, item_versions={1: 3, 2: 2})
+        for (index, item_version) in [(0, 1), (1, 1), (1, 2), (1, 3), (2, 1), (2, 2), (3, 1)]:
+            create_item_package(item_package_path(item_id(index), item_version, cache_path=self.cache_path), item_index=index)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_path)
+
+    def cached(self):
+        return sorted((int(item_id), item_version) for (item_id, item_version, _) in cached_item_packages(cache_path=self.cache_path))
+
+    def test_diff(self):
+        with CatalogDB(catalog_version=3, cache_path=self.cache_path) as catalog:
+            diff = catalog.diff(1)
+            self.assertEqual(diff['added'], [dict(id=item_id(3), uri='/scriptures/book-3', version=1)])
+            self.assertEqual(diff['removed'], [])
+            self.assertEqual(diff['changed'], [
+                dict(id=item_id(1), uri='/scriptures/book-1', old_version=1, version=3),
+                dict(id=item_id(2), uri='/scriptures/book-2', old_version=1, version=2),
+            ])
+            self.assertIsNone(catalog.diff(99))
+
+        with CatalogDB(catalog_version=1, cache_path=self.cache_path) as catalog:
+            self.assertEqual(catalog.diff(2)['removed'], [dict(id=item_id(3), uri='/scriptures/book-3', version=1)])
+
+    def test_prune_superseded(self):
+        stats = prune_language(keep_catalogs=2, cache_path=self.cache_path)
+
+        self.assertEqual(stats['removed_catalogs'], [1])
+        self.assertEqual(cached_catalog_versions(cache_path=self.cache_path), [2, 3])
+        self.assertEqual(sorted((int(item_id), item_version) for (item_id, item_version) in stats['removed_item_packages']), [(item_id(1), 1)])
+        self.assertEqual(self.cached(), [(item_id(0), 1), (item_id(1), 2), (item_id(1), 3), (item_id(2), 1), (item_id(2), 2), (item_id(3), 1)])
+        self.assertGreater(stats['bytes_freed'], 0)
+
+    def test_prune_disk_budget(self):
+        stats = prune_language(keep_catalogs=3, max_bytes=1, cache_path=self.cache_path)
+
+        self.assertEqual(cached_catalog_versions(cache_path=self.cache_path), [3])
+        self.assertEqual(self.cached(), [(item_id(0), 1), (item_id(1), 3), (item_id(2), 2), (item_id(3), 1)])
+        self.assertEqual(stats['bytes'], sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(os.path.join(self.cache_path, 'v4', 'languages', 'eng')) for f in files))
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+from gospellibrary.item_packages import item_package_path
+from gospellibrary.search import SearchIndex, match_expression
+from gospellibrary.tests.fixtures import create_item_package, item_id
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+        for index in range(3):
+            create_item_package(item_package_path(item_id(index), 1, cache_path=self.cache_path), item_index=index)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_path)
+
+    def test_search(self):
+        with SearchIndex(cache_path=self.cache_path) as index:
+            self.assertEqual(index.update(), dict(indexed=3, removed=0, unchanged=0))
+
+            hits = index.search('"verse 7 of chapter 2"')
+            self.assertEqual(sorted((hit['subitem_uri'], hit['paragraph_id']) for hit in hits), [('/scriptures/book-{}/2'.format(i), 'p7') for i in range(3)])
+            self.assertIn('<b>', hits[0]['snippet'])
+
+            hits = index.search('"verse 7 of chapter 2"', uri_prefix='/scriptures/book-1/')
+            self.assertEqual([(hit['item_id'], hit['subitem_uri'], hit['paragraph_id']) for hit in hits], [(str(item_id(1)), '/scriptures/book-1/2', 'p7')])
+
+            self.assertEqual(len(index.search('verse', limit=5)), 5)
+
+    def test_punctuation(self):
+        self.assertEqual(match_expression('D&C 84:45'), '"D&C" "84:45"')
+        self.assertEqual(match_expression('"verse 7" don\'t say "no'), '"verse 7" "don\'t" "say" """no"')
+
+        with SearchIndex(cache_path=self.cache_path) as index:
+            index.update()
+            for query in ('came to pass.', 'D&C 84:45', 'faith, hope', "don't", 'verse AND', '(chapter'):
+                self.assertIsInstance(index.search(query), list)
+            self.assertEqual(index.search('   '), [])
+
+            self.assertEqual(len(index.search('verse 7, chapter 2.', uri_prefix='/scriptures/book-1/')), 1)
+            self.assertEqual(len(index.search('"verse 7 of chapter 2" OR "verse 8 of chapter 2"', raw=True)), 6)
+
+    def test_incremental_update(self):
+        with SearchIndex(cache_path=self.cache_path) as index:
+            index.update()
+            self.assertEqual(index.update(), dict(indexed=0, removed=0, unchanged=3))
+
+            create_item_package(item_package_path(item_id(1), 2, cache_path=self.cache_path), item_index=1, paragraph_count=20)
+            shutil.rmtree(os.path.dirname(os.path.dirname(item_package_path(item_id(2), 1, cache_path=self.cache_path))))
+            self.assertEqual(index.update(), dict(indexed=1, removed=1, unchanged=1))
+
+            self.assertEqual(len(index.search('"verse 15 of chapter 1"')), 1)
+            self.assertEqual(len(index.search('"book 2"')), 0)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from gospellibrary.catalogs import CatalogDB, catalog_path
+from gospellibrary.snapshots import CatalogSnapshot, open_catalog_snapshot, snapshot_path
+from gospellibrary.tests.fixtures import create_catalog, fork_pool, item_id, item_uri
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+        path = create_catalog(catalog_path(1, cache_path=self.cache_path), item_count=200)
+        with sqlite3.connect(path) as db:
+            db.execute('''UPDATE item SET item_cover_renditions=NULL, version=NULL WHERE id=?''', [item_id(7)])
+            db.execute('''UPDATE item SET title=? WHERE id=?''', [u'Libro de Mormón', item_id(8)])
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_path)
+
+    def test_lookups_match_catalog(self):
+        with open_catalog_snapshot(catalog_version=1, cache_path=self.cache_path) as snapshot, CatalogDB(catalog_version=1, cache_path=self.cache_path) as catalog:
+            self.assertTrue(os.path.isfile(snapshot_path(1, cache_path=self.cache_path)))
+            self.assertEqual(len(snapshot), 200)
+            for index in (0, 7, 8, 113, 199):
+                self.assertEqual(dict(snapshot.item(item_id(index))), dict(catalog.item(item_id(index))))
+                self.assertEqual(dict(snapshot.item(uri=item_uri(index))), dict(catalog.item(uri=item_uri(index))))
+
+            self.assertEqual(snapshot.item(item_id(7))['version'], 1)
+            self.assertNotIn('raw_item_cover_renditions', snapshot.item(item_id(7)))
+            self.assertEqual(snapshot.item(str(item_id(8)))['title'], u'Libro de Mormón')
+            self.assertEqual(snapshot.item(uri='/scriptures/book-1')['item_cover_renditions'], catalog.item(uri='/scriptures/book-1')['item_cover_renditions'])
+            self.assertIsNone(snapshot.item(1))
+            self.assertIsNone(snapshot.item(uri='/scriptures/missing'))
+            self.assertIsNone(snapshot.item(uri='/scriptures/book-99999'))
+            self.assertEqual([item['id'] for item in snapshot.items()], sorted(item_id(i) for i in range(200)))
+
+    def test_library_matches_catalog(self):
+        with open_catalog_snapshot(catalog_version=1, cache_path=self.cache_path) as snapshot, CatalogDB(catalog_version=1, cache_path=self.cache_path) as catalog:
+            self.assertEqual(dict(snapshot.collection(2)), dict(catalog.collection(2)))
+            self.assertIsNone(snapshot.collection(99))
+            self.assertEqual([dict(section) for section in snapshot.sections(1)], [dict(section) for section in catalog.sections(1)])
+            self.assertEqual([dict(collection) for collection in snapshot.collections([10])], [dict(collection) for collection in catalog.collections([10])])
+            self.assertEqual([dict(item) for item in snapshot.items([20])], [dict(item) for item in catalog.items([20])])
+            self.assertEqual([dict(node) for node in snapshot.nodes([10, 20])], [dict(node) for node in catalog.nodes([10, 20])])
+            self.assertEqual([dict(item) for item in snapshot.items()], [dict(item) for item in catalog.items()])
+            self.assertEqual(snapshot.items([30]), [])
+
+    def test_snapshot_is_written_once(self):
+        open_catalog_snapshot(catalog_version=1, cache_path=self.cache_path).close()
+        path = snapshot_path(1, cache_path=self.cache_path)
+        mtime = os.path.getmtime(path)
+        os.remove(catalog_path(1, cache_path=self.cache_path))
+
+        pool = fork_pool(2)
+        try:
+            self.assertEqual(pool.map(lookup_title, [(path, item_uri(5)), (path, item_uri(150))]), ['Book 5', 'Book 150'])
+        finally:
+            pool.close()
+            pool.join()
+        with open_catalog_snapshot(catalog_version=1, cache_path=self.cache_path) as snapshot:
+            self.assertEqual(snapshot.catalog_version, 1)
+        self.assertEqual(os.path.getmtime(path), mtime)
+
+    def test_invalid_snapshot(self):
+        path = os.path.join(self.cache_path, 'Catalog.snapshot')
+        with open(path, 'wb') as f:
+            f.write(b'\0' * 128)
+        with self.assertRaises(ValueError):
+            CatalogSnapshot(path)
+
+
+def lookup_title(arguments):
+    (path, uri) = arguments
+    with CatalogSnapshot(path) as snapshot:
+        return snapshot.item(uri=uri)['title']
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+from gospellibrary.cache_manager import CacheManager
+from gospellibrary.catalogs import CatalogDB, catalog_path
+from gospellibrary.fetch import STORAGE_COMPRESSED, working_cache_path
+from gospellibrary.item_packages import ItemPackage, item_package_path
+from gospellibrary.sync import sync_language
+from gospellibrary.tests.fixtures import FixtureServer, create_site, item_id
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache_path = tempfile.mkdtemp()
+        self.working_path = working_cache_path(self.cache_path)
+        create_site(self.root, item_count=3)
+        self.server = FixtureServer(self.root).__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.cache_path)
+
+    def test_compressed_storage(self):
+        with CatalogDB(catalog_version=1, base_url=self.server.base_url, cache_path=self.cache_path, storage=STORAGE_COMPRESSED) as catalog:
+            self.assertEqual(catalog.item(uri='/scriptures/book-1')['id'], item_id(1))
+        self.assertTrue(os.path.isfile(catalog_path(1, cache_path=self.cache_path) + '.xz'))
+        self.assertFalse(os.path.exists(catalog_path(1, cache_path=self.cache_path)))
+        self.assertTrue(os.path.isfile(catalog_path(1, cache_path=self.working_path)))
+
+        with ItemPackage(item_id=item_id(0), item_version=1, base_url=self.server.base_url, cache_path=self.cache_path, storage=STORAGE_COMPRESSED) as item_package:
+            self.assertEqual(item_package.file_id(), 'file-eng-0')
+            self.assertEqual(item_package.path(), os.path.dirname(item_package_path(item_id(0), 1, cache_path=self.working_path)))
+        self.assertTrue(os.path.isfile(item_package_path(item_id(0), 1, cache_path=self.cache_path) + '.xz'))
+        self.assertFalse(os.path.exists(item_package_path(item_id(0), 1, cache_path=self.cache_path)))
+
+    def test_working_set_is_rebuilt_without_downloading(self):
+        manager = CacheManager(max_bytes=0, cache_path=self.working_path)
+        for _ in range(2):
+            with ItemPackage(item_id=item_id(0), item_version=1, base_url=self.server.base_url, cache_path=self.cache_path, cache_manager=manager, storage=STORAGE_COMPRESSED) as item_package:
+                self.assertEqual(item_package.file_id(), 'file-eng-0')
+            self.assertEqual(len(manager.evict()), 1)
+            self.assertFalse(os.path.exists(item_package_path(item_id(0), 1, cache_path=self.working_path)))
+
+        self.assertEqual(manager.misses, 2)
+        self.assertEqual(self.server.request_count('.xz'), 1)
+
+    def test_corrupt_package_is_downloaded_again(self):
+        xz_path = item_package_path(item_id(0), 1, cache_path=self.cache_path) + '.xz'
+        os.makedirs(os.path.dirname(xz_path))
+        with open(xz_path, 'wb') as f:
+            f.write(b'\xfd7zXZ\x00')
+
+        item_package = ItemPackage(item_id=item_id(0), item_version=1, base_url=self.server.base_url, cache_path=self.cache_path, storage=STORAGE_COMPRESSED)
+        with self.assertRaises(Exception):
+            item_package.file_id()
+        self.assertFalse(os.path.exists(xz_path))
+
+        self.assertEqual(item_package.file_id(), 'file-eng-0')
+        item_package.close()
+
+    def test_sync_compressed(self):
+        result = sync_language('eng', base_url=self.server.base_url, cache_path=self.cache_path, storage=STORAGE_COMPRESSED)
+        self.assertEqual((result.synced, result.failed), (3, 0))
+        for index in range(3):
+            self.assertTrue(os.path.isfile(item_package_path(item_id(index), 1, cache_path=self.cache_path) + '.xz'))
+            self.assertFalse(os.path.exists(item_package_path(item_id(index), 1, cache_path=self.cache_path)))
+
+        request_count = self.server.request_count('.xz')
+        with ItemPackage(item_id=item_id(2), item_version=1, base_url=self.server.base_url, cache_path=self.cache_path, storage=STORAGE_COMPRESSED) as item_package:
+            self.assertEqual(item_package.file_id(), 'file-eng-2')
+        self.assertEqual(self.server.request_count('.xz'), request_count)
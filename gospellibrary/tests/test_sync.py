@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import unittest
+from gospellibrary.cache_manager import CacheManager
+from gospellibrary.item_packages import ItemPackage, item_package_path
+from gospellibrary.sync import sync_language
+from gospellibrary.text import text_index_path
+from gospellibrary.tests.fixtures import FixtureServer, create_site, item_id
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache_path = tempfile.mkdtemp()
+        create_site(self.root, item_count=4, item_versions={3: 2})
+        self.server = FixtureServer(self.root).__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        shutil.rmtree(self.root)
+        shutil.rmtree(self.cache_path)
+
+    def test_sync_language(self):
+        events = []
+        result = sync_language('eng', max_workers=4, decompress_workers=2, base_url=self.server.base_url, cache_path=self.cache_path, progress=events.append)
+
+        self.assertEqual((result.synced, result.skipped, result.missing, result.failed), (4, 0, 0, 0))
+        self.assertEqual(sorted((event.item_id, event.item_version, event.status) for event in events), [(item_id(i), 2 if i == 3 else 1, 'synced') for i in range(4)])
+        self.assertGreater(result.bytes_downloaded, 0)
+        self.assertTrue(os.path.isfile(item_package_path(item_id(3), 2, cache_path=self.cache_path)))
+        self.assertFalse(os.path.exists(item_package_path(item_id(3), 2, cache_path=self.cache_path) + '.xz'))
+        with ItemPackage(item_id=item_id(3), item_version=2, base_url=self.server.base_url, cache_path=self.cache_path) as item_package:
+            self.assertEqual(item_package.file_id(), 'file-eng-3')
+
+        request_count = self.server.request_count('.xz')
+        result = sync_language('eng', base_url=self.server.base_url, cache_path=self.cache_path)
+        self.assertEqual((result.synced, result.skipped), (0, 4))
+        self.assertEqual(self.server.request_count('.xz'), request_count)
+
+    def test_cache_manager(self):
+        manager = CacheManager(max_bytes=0, cache_path=self.cache_path)
+        result = sync_language('eng', max_workers=1, decompress_workers=0, base_url=self.server.base_url, cache_path=self.cache_path, cache_manager=manager)
+
+        self.assertEqual(result.synced, 4)
+        stats = manager.stats()
+        self.assertEqual((stats['misses'], stats['evictions'], stats['entries'], stats['bytes']), (4, 5, 0, 0))
+        self.assertFalse(os.path.exists(item_package_path(item_id(0), 1, cache_path=self.cache_path)))
+
+    def test_item_filter_and_missing(self):
+        os.remove(os.path.join(self.root, 'v4', 'languages', 'eng', 'item-packages', str(item_id(1)), '1.xz'))
+
+        result = sync_language('eng', item_filter=lambda item: item['id'] != item_id(2), decompress_workers=0, base_url=self.server.base_url, cache_path=self.cache_path)
+
+        self.assertEqual((result.synced, result.skipped, result.missing, result.failed), (2, 0, 1, 0))
+        self.assertFalse(os.path.exists(item_package_path(item_id(2), 1, cache_path=self.cache_path)))
+
+    def test_retry(self):
+        xz_path = os.path.join(self.root, 'v4', 'languages', 'eng', 'item-packages', str(item_id(0)), '1.xz')
+        with open(xz_path, 'wb') as f:
+            f.write(b'not xz')
+
+        result = sync_language('eng', item_filter=lambda item: item['id'] == item_id(0), decompress_workers=0, retries=2, backoff_factor=0.01, base_url=self.server.base_url, cache_path=self.cache_path)
+
+        self.assertEqual(result.failed, 1)
+        self.assertIn(item_id(0), result.errors)
+        self.assertEqual(self.server.request_count('/{}/1.xz'.format(item_id(0))), 3)
+
+    def test_sync_since_catalog_version(self):
+        sync_language('eng', decompress_workers=0, base_url=self.server.base_url, cache_path=self.cache_path)
+        create_site(self.root, catalog_version=2, item_count=5, item_versions={0: 2, 3: 2})
+
+        events = []
+        result = sync_language('eng', catalog_version=2, since_catalog_version=1, decompress_workers=0, base_url=self.server.base_url, cache_path=self.cache_path, progress=events.append)
+
+        self.assertEqual((result.synced, result.skipped), (2, 0))
+        self.assertEqual(sorted((event.item_id, event.item_version) for event in events), [(item_id(0), 2), (item_id(4), 1)])
+
+    def test_build_text(self):
+        result = sync_language('eng', decompress_workers=0, base_url=self.server.base_url, cache_path=self.cache_path, build_text=True)
+        self.assertEqual(result.synced, 4)
+        for index in range(4):
+            self.assertTrue(os.path.isfile(text_index_path(item_package_path(item_id(index), 2 if index == 3 else 1, cache_path=self.cache_path))))
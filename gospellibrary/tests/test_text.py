@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+import unittest
+from gospellibrary.item_packages import ItemPackage, item_package_path
+from gospellibrary.text import project_paragraph, strip_tags, text_index_path
+from gospellibrary.tests.fixtures import create_item_package, item_id, paragraph_html
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+        self.path = create_item_package(item_package_path(item_id(0), 1, cache_path=self.cache_path))
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_path)
+
+    def test_project_paragraph(self):
+        self.assertEqual(project_paragraph(paragraph_html(0, 1, 3)), dict(
+            text='eng verse 4 of chapter 2 in book 0, and it came to pass.',
+            verse_number='4',
+            markers=[dict(marker='a', ref_id='note4a', offset=36)],
+        ))
+        self.assertEqual(project_paragraph('<p id="p1">Faith &amp;  <b>hope</b><sup class="marker">b</sup></p>'), dict(text='Faith & hope', verse_number=None, markers=[dict(marker='b', ref_id=None, offset=12)]))
+
+    def test_text(self):
+        with ItemPackage(item_id=item_id(0), item_version=1, cache_path=self.cache_path) as item_package:
+            self.assertFalse(os.path.exists(text_index_path(self.path)))
+            self.assertEqual(item_package.text('/scriptures/book-0/2', 'p4'), 'eng verse 4 of chapter 2 in book 0, and it came to pass.')
+            self.assertTrue(os.path.isfile(text_index_path(self.path)))
+            self.assertIsNone(item_package.text('/scriptures/book-0/2', 'p99'))
+
+            paragraph = item_package.paragraph_text('/scriptures/book-0/2', 'p4')
+            self.assertEqual(paragraph['verse_number'], '4')
+            self.assertEqual(paragraph['markers'], [dict(marker='a', ref_id='note4a', offset=36)])
+            html = item_package.html(subitem_uri='/scriptures/book-0/2', paragraph_id='p4')
+            self.assertEqual(len(html.encode('utf-8')), paragraph['end_index'] - paragraph['start_index'])
+
+            paragraphs = item_package.paragraph_texts('/scriptures/book-0/3', ['p2-p4'])
+            self.assertEqual(list(paragraphs), ['p2', 'p3', 'p4'])
+            self.assertEqual([paragraph['text'] for paragraph in item_package.paragraph_texts('/scriptures/book-0/3').values()], [strip_tags(paragraph_html(0, 2, i)).split(' ', 1)[1] for i in range(10)])
@@ -0,0 +1,121 @@
+import json
+import os
+import re
+import sqlite3
+import tempfile
+
+try:
+    from html import unescape
+except ImportError:
+    from HTMLParser import HTMLParser
+    unescape = HTMLParser().unescape
+
+from gospellibrary.connections import connect_read_only
+from gospellibrary.fetch import FileLock
+
+TAG_RE = re.compile(r'<[^>]*>')
+WHITESPACE_RE = re.compile(r'\s+')
+TOKEN_RE = re.compile(r'<(/?)([A-Za-z][\w-]*)([^>]*)>|([^<]+)')
+CLASS_RE = re.compile(r'\bclass="([^"]*)"')
+HREF_RE = re.compile(r'\bhref="#([^"]*)"')
+DATA_VALUE_RE = re.compile(r'\bdata-value="([^"]*)"')
+
+TEXT_INDEX_FORMAT_VERSION = 1
+
+TEXT_SCHEMA = '''
+CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE paragraph (subitem_uri TEXT, paragraph_id TEXT, position INTEGER, start_index INTEGER, end_index INTEGER, verse_number TEXT, text TEXT, markers TEXT, PRIMARY KEY (subitem_uri, paragraph_id)) WITHOUT ROWID;
+'''
+
+
+def strip_tags(html):
+    return WHITESPACE_RE.sub(' ', unescape(TAG_RE.sub('', html))).strip()
+
+
+def normalize_whitespace(text):
+    return WHITESPACE_RE.sub(' ', text).lstrip()
+
+
+def project_paragraph(html):
+    pieces = []
+    verse_number = None
+    markers = []
+    ref_id = None
+    skip = None
+    skip_tag = None
+    for token in TOKEN_RE.finditer(html):
+        (closing, name, attributes, data) = token.groups()
+        if data is not None:
+            if skip == 'verse-number':
+                verse_number = (verse_number or '') + unescape(data)
+            elif skip == 'marker':
+                markers[-1]['marker'] = markers[-1]['marker'] or unescape(data).strip()
+            else:
+                pieces.append(unescape(data))
+        elif closing:
+            if skip is not None and name == skip_tag:
+                skip = None
+            elif name == 'a':
+                ref_id = None
+        elif skip is None:
+            classes = CLASS_RE.search(attributes)
+            classes = classes.group(1).split() if classes else []
+            if 'verse-number' in classes:
+                skip, skip_tag = 'verse-number', name
+            elif 'marker' in classes:
+                value = DATA_VALUE_RE.search(attributes)
+                markers.append(dict(marker=value.group(1) if value else '', ref_id=ref_id, offset=len(normalize_whitespace(''.join(pieces)))))
+                skip, skip_tag = 'marker', name
+            elif name == 'a':
+                href = HREF_RE.search(attributes)
+                ref_id = href.group(1) if href else None
+
+    return dict(
+        text=normalize_whitespace(''.join(pieces)).rstrip(),
+        verse_number=verse_number.strip() if verse_number is not None else None,
+        markers=markers,
+    )
+
+
+def text_index_path(package_path):
+    return os.path.join(os.path.dirname(package_path), 'Text.sqlite')
+
+
+def build_text_index(package_path):
+    path = text_index_path(package_path)
+    if os.path.isfile(path):
+        return path
+
+    with FileLock(path):
+        if os.path.isfile(path):
+            return path
+
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.Text.sqlite.', suffix='.tmp')
+        os.close(fd)
+        try:
+            package_db = connect_read_only(package_path)
+            db = sqlite3.connect(temp_path)
+            try:
+                db.executescript(TEXT_SCHEMA)
+                db.execute('''INSERT INTO metadata (key, value) VALUES ('format_version', ?)''', [str(TEXT_INDEX_FORMAT_VERSION)])
+                for (subitem_id, subitem_uri, html) in package_db.execute('''SELECT subitem.id, uri, CAST(content_html AS BLOB) FROM subitem_content
+                                                                               INNER JOIN subitem ON subitem_content.subitem_id=subitem.id'''):
+                    rows = package_db.execute('''SELECT paragraph_id, start_index, end_index FROM paragraph_metadata WHERE subitem_id=? ORDER BY start_index''', [subitem_id]).fetchall()
+                    paragraphs = []
+                    for position, (paragraph_id, start_index, end_index) in enumerate(rows):
+                        projection = project_paragraph(html[start_index:end_index].decode('utf-8'))
+                        paragraphs.append((subitem_uri, paragraph_id, position, start_index, end_index, projection['verse_number'], projection['text'], json.dumps(projection['markers'])))
+                    db.executemany('''INSERT OR REPLACE INTO paragraph (subitem_uri, paragraph_id, position, start_index, end_index, verse_number, text, markers) VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', paragraphs)
+                db.commit()
+            finally:
+                db.close()
+                package_db.close()
+            os.rename(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    return path
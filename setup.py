@@ -9,6 +9,11 @@ setup(
     long_description=open('README.md').read(),
     install_requires=[
         'requests>=2.4.3',
-        'backports.lzma>=0.0.13'
+        'backports.lzma>=0.0.13',
+        'futures>=3.0; python_version < "3"',
     ],
+    extras_require={
+        'aio': ['aiohttp>=3.0'],
+        'parquet': ['pyarrow'],
+    },
 )